@@ -0,0 +1,267 @@
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import glob
+import itertools
+import json
+import os
+import sys
+
+from Include.Binary import BinaryRelation, BinaryWriter
+from Include import Profiling
+from Include.Cache import ResultCache
+from Include.Loader import iterateRelationRecords
+from Include.Models import CandidatesKeys, NormalFormsChecker, attributesToJson
+
+
+def iterateRelationSources(input_list: list):
+    '''
+    Generador que recorre las relaciones de las entradas del modo por lotes.
+    Cada entrada puede ser:
+        un directorio: se toman sus archivos .json, .jsonl y .relb
+        un patrón glob: "json/*.json"
+        un archivo .json con una o varias relaciones (o un arreglo de
+        relaciones), o .jsonl con una relación por línea
+        "-": relaciones en formato JSONL desde la entrada estándar
+
+    Entrega pares (origen, relación) donde relación es el RelationModel, o
+    el RelationLoadError que impidió leerla. Los archivos se leen a medida
+    que se consumen las relaciones.
+    '''
+    for item in input_list:
+        if item == "-":
+            path_list = [item]
+        elif os.path.isdir(item):
+            path_list = sorted(glob.glob(os.path.join(item, "*.json")) + glob.glob(os.path.join(item, "*.jsonl")) +
+                               glob.glob(os.path.join(item, "*.relb")))
+        elif glob.has_magic(item):
+            path_list = sorted(glob.glob(item, recursive=True))
+        else:
+            path_list = [item]
+        for path in path_list:
+            yield from iterateRelationRecords(path)
+
+
+def limitKeys(result: dict, key_list: list, key_limit: int = None):
+    '''
+    Agrega al resultado las llaves de key_list. Con key_limit solo se
+    agregan las primeras key_limit, y "keys_complete" indica si key_list
+    (que puede tener una llave de más) no tenía otras; key_list ya debe
+    estar ordenada por máscara
+    '''
+    if key_limit is not None:
+        result["keys_complete"] = len(key_list) <= key_limit
+        key_list = key_list[:key_limit]
+    result["candidate_keys"] = sorted(attributesToJson(key) for key in key_list)
+
+
+def normalFormsToDict(normal_forms: NormalFormsChecker, key_limit: int = None):
+    '''
+    Resume el resultado del análisis en un diccionario serializable a Json.
+    Con key_limit se piden a lo sumo key_limit + 1 llaves, así que no hace
+    falta enumerarlas todas (ver NormalFormsChecker, lazy_keys). Son las
+    mismas con las llaves calculadas o sin ellas (ver CandidatesKeys.keys),
+    y se ordenan por máscara antes de quitar la que sobra
+    '''
+    candidates_keys = normal_forms.candidates_keys
+    minimal_cover = candidates_keys.minimal_cover.irreducible_rel.l_set
+    if key_limit is None:
+        key_list = list(candidates_keys.candidate_keys)
+    else:
+        key_list = sorted(candidates_keys.keys(limit=key_limit + 1), key=candidates_keys.attr_table.encode)
+    result = {}
+    limitKeys(result, key_list, key_limit)
+    result.update({"minimal_cover": sorted([attributesToJson(fd[0]), attributesToJson(fd[1])] for fd in minimal_cover),
+                   "is_2nf": normal_forms.is_2nf,
+                   "is_3nf": normal_forms.is_3nf,
+                   "is_bc_nf": normal_forms.is_bc_nf,
+                   "violations": [violation.toDict() for violation in normal_forms.violations],
+                   "closure_cache": normal_forms.closure_engine.getCacheStats()})
+    return result
+
+
+def entryToDict(entry: dict, key_limit: int = None):
+    '''
+    Convierte una entrada del caché de resultados al formato de
+    normalFormsToDict
+    '''
+    result = {}
+    limitKeys(result, entry["candidate_keys"], key_limit)
+    result.update({"minimal_cover": sorted([attributesToJson(lhs), attributesToJson(rhs)]
+                                           for lhs, rhs in entry["minimal_cover"]),
+                   "is_2nf": entry["is_2nf"],
+                   "is_3nf": entry["is_3nf"],
+                   "is_bc_nf": entry["is_bc_nf"],
+                   "violations": entry["violations"]})
+    return result
+
+
+result_cache_dict = {}
+
+
+def openResultCache(cache_path: str, cache_max_bytes: int = None):
+    '''
+    ResultCache de este proceso para cache_path; cada proceso trabajador
+    abre su propia conexión la primera vez que la necesita
+    '''
+    if cache_path not in result_cache_dict:
+        if cache_max_bytes is None:
+            result_cache_dict[cache_path] = ResultCache(cache_path)
+        else:
+            result_cache_dict[cache_path] = ResultCache(cache_path, cache_max_bytes)
+    return result_cache_dict[cache_path]
+
+
+def analyzeRelation(source_relation: tuple, cache_path: str = None, cache_max_bytes: int = None,
+                    collect_stats: bool = False, key_limit: int = None):
+    '''
+    Analiza una relación (origen, relación) y retorna el diccionario de su
+    línea de resultado. Los errores se reportan en la llave "error".
+    Con cache_path, el resultado se busca primero en ese caché de
+    resultados (ver Include.Cache) y la llave "cache" indica si hubo
+    acierto ("hit") o fallo ("miss"). Con collect_stats, la llave "stats"
+    tiene las estadísticas del análisis (ver Include.Profiling). Con
+    key_limit las llaves candidatas no se enumeran: se reportan a lo sumo
+    key_limit y la llave "keys_complete" indica si son todas.
+    '''
+    source, relation = source_relation
+    result = {"source": source}
+    try:
+        if isinstance(relation, Exception):
+            raise relation
+        result_cache = None
+        if cache_path is not None:
+            result_cache = openResultCache(cache_path, cache_max_bytes)
+            entry = result_cache.get(relation)
+            if entry is not None:
+                if key_limit is None or len(entry["candidate_keys"]) <= key_limit:
+                    result.update(entryToDict(entry, key_limit))
+                else:
+                    # Las primeras key_limit llaves se toman en el mismo orden que sin el caché
+                    normal_forms = result_cache.normalFormsFromEntry(relation, entry)
+                    result.update(normalFormsToDict(normal_forms, key_limit))
+                    del result["closure_cache"]
+                result["cache"] = "hit"
+                return result
+        stats_context = Profiling.collectStats() if collect_stats else contextlib.nullcontext()
+        with stats_context as stats:
+            lazy_keys = key_limit is not None
+            if isinstance(relation, BinaryRelation):
+                normal_forms = relation.analyze(lazy_keys=lazy_keys)
+            else:
+                normal_forms = NormalFormsChecker(relation=relation, lazy_keys=lazy_keys)
+            result.update(normalFormsToDict(normal_forms, key_limit))
+        if stats is not None:
+            result["stats"] = stats.toDict()
+        if result_cache is not None:
+            if normal_forms.candidates_keys.is_complete:
+                result_cache.put(relation, normal_forms)
+            result["cache"] = "miss"
+    except Exception as ex:
+        result["error"] = str(ex)
+    return result
+
+
+def mapBounded(executor, function, item_iter, chunk_size: int = 16, max_pending: int = 4):
+    '''
+    Como executor.map, pero toma de item_iter solo los bloques de chunk_size
+    elementos que caben en max_pending tareas pendientes, de modo que la
+    entrada se lee a medida que se entregan los resultados, en orden
+    '''
+    pending = collections.deque()
+    while True:
+        while len(pending) < max_pending:
+            chunk = list(itertools.islice(item_iter, chunk_size))
+            if not chunk:
+                break
+            pending.append(executor.submit(mapChunk, function, chunk))
+        if not pending:
+            return
+        yield from pending.popleft().result()
+
+
+def mapChunk(function, chunk: list):
+    return [function(item) for item in chunk]
+
+
+def runBatch(input_list: list, output_path: str = None, worker_num: int = 1, cache_path: str = None,
+             cache_max_bytes: int = None, collect_stats: bool = False, profile_path: str = None,
+             key_limit: int = None):
+    '''
+    Analiza todas las relaciones de input_list y escribe una línea Json por
+    relación en output_path (o en la salida estándar), en el orden de entrada.
+    Con worker_num > 1 las relaciones se reparten en un grupo de procesos.
+    Con cache_path se usa ese caché de resultados, compartido por todos los
+    procesos, y al final se muestran sus estadísticas en la salida de errores.
+    Con collect_stats cada línea lleva las estadísticas de su análisis y al
+    final se muestra su suma. Con profile_path todo el lote se analiza en
+    este proceso con cProfile activo, el perfil se guarda en ese archivo y
+    se muestran las estadísticas del lote completo. key_limit se entrega a
+    analyzeRelation.
+    Retorna 0 si todas las relaciones se analizaron, 1 si alguna falló.
+    '''
+    output = open(output_path, "w") if output_path else sys.stdout
+    error_num = 0
+    cache_count = collections.Counter()
+    run_stats = Profiling.AnalysisStats()
+    executor = None
+    if profile_path is not None:
+        worker_num = 1
+        profile_context = Profiling.collectStats(profile_path=profile_path)
+    else:
+        profile_context = contextlib.nullcontext(run_stats)
+    analyze = functools.partial(analyzeRelation, cache_path=cache_path, cache_max_bytes=cache_max_bytes,
+                                collect_stats=collect_stats and profile_path is None, key_limit=key_limit)
+    try:
+        if worker_num > 1:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=worker_num)
+            result_iter = mapBounded(executor, analyze, iterateRelationSources(input_list), max_pending=worker_num * 4)
+        else:
+            result_iter = map(analyze, iterateRelationSources(input_list))
+        with profile_context as run_stats:
+            for result in result_iter:
+                if "error" in result:
+                    error_num += 1
+                if "cache" in result:
+                    cache_count[result["cache"]] += 1
+                if "stats" in result:
+                    run_stats.merge(result["stats"])
+                output.write(json.dumps(result) + "\n")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if output is not sys.stdout:
+            output.close()
+    if cache_path is not None:
+        stat_dict = openResultCache(cache_path, cache_max_bytes).getStats()
+        print("Caché de resultados: {0} aciertos, {1} fallos; {2} entradas, {3:.1f} de {4:.1f} MB, {5} eliminadas"
+              .format(cache_count["hit"], cache_count["miss"], stat_dict["entries"], stat_dict["size"] / 2 ** 20,
+                      stat_dict["max_size"] / 2 ** 20, stat_dict["evictions"]), file=sys.stderr)
+    if collect_stats or profile_path is not None:
+        print(run_stats.describe(), file=sys.stderr)
+    return 1 if error_num else 0
+
+
+def convertToBinary(input_list: list, binary_path: str, with_results: bool = False):
+    '''
+    Escribe las relaciones de input_list en el archivo binario binary_path
+    (ver Include.Binary). Con with_results se calculan y se guardan también
+    la cobertura mínima y las llaves candidatas de cada relación. Las
+    relaciones que no se pueden leer o analizar se reportan en la salida de
+    errores y se omiten. Retorna 0 si se escribieron todas, 1 si no.
+    '''
+    error_num = 0
+    with BinaryWriter(binary_path) as writer:
+        for source, relation in iterateRelationSources(input_list):
+            try:
+                if isinstance(relation, Exception):
+                    raise relation
+                candidates_keys = None
+                if with_results:
+                    candidates_keys = CandidatesKeys(relation=relation)
+                writer.write(relation, candidates_keys)
+            except Exception as ex:
+                error_num += 1
+                print("{0}: {1}".format(source, ex), file=sys.stderr)
+    return 1 if error_num else 0
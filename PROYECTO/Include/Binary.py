@@ -0,0 +1,292 @@
+'''
+Formato binario de relaciones (extensión .relb). Un archivo guarda una o
+más relaciones y se abre con mmap, de modo que leer una relación no
+requiere interpretar texto: las dependencias ya están codificadas como
+máscaras de bits.
+
+Encabezado del archivo (FILE_HEADER, little endian):
+    "RELB", versión, banderas (0), número de relaciones, posición del índice
+Cada relación empieza en una posición múltiplo de 8:
+    RECORD_HEADER: atributos, dependencias, dependencias de la cobertura,
+        llaves, bytes del diccionario, banderas (HAS_COVER, HAS_KEYS)
+    diccionario: nombres de los atributos en orden alfabético, en UTF-8
+        separados por "\\0"; el atributo i ocupa el bit i, como en
+        AttributeTable(T)
+    relleno hasta un múltiplo de 8
+    L: por cada dependencia, la máscara del lado izquierdo y la del derecho
+    cobertura mínima: pares de máscaras, igual que L
+    llaves candidatas: una máscara por llave
+Cada máscara ocupa (atributos + 7) // 8 bytes, en little endian.
+Índice: la posición (u64) de cada relación, al final del archivo.
+'''
+
+import mmap
+import struct
+
+from Include.Models import AttributeTable, CandidatesKeys, IrreducibleFD, NormalFormsChecker, RelationModel
+
+MAGIC = b"RELB"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHQQ")
+RECORD_HEADER = struct.Struct("<IIIIII")
+INDEX_ENTRY = struct.Struct("<Q")
+HAS_COVER = 1
+HAS_KEYS = 2
+
+
+class BinaryFormatError(ValueError):
+    '''
+    El archivo no tiene el formato binario de relaciones
+    '''
+
+
+def maskLength(attr_num: int):
+    return (attr_num + 7) // 8
+
+
+def paddingLength(length: int):
+    return -length % 8
+
+
+class BinaryWriter:
+    '''
+    Escribe relaciones en un archivo .relb. Se usa como administrador de
+    contexto; el índice y el encabezado se escriben al cerrar:
+
+        with BinaryWriter("corpus.relb") as writer:
+            writer.write(relation)
+            writer.write(other_relation, normal_forms.candidates_keys)
+    '''
+    def __init__(self, binary_path: str):
+        self.file = open(binary_path, "wb")
+        self.offset_list = []
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, relation: RelationModel, candidates_keys: CandidatesKeys = None,
+              minimal_cover: IrreducibleFD = None):
+        '''
+        Agrega la relación. Con candidates_keys se guardan también su
+        cobertura mínima y sus llaves candidatas; con solo minimal_cover,
+        únicamente la cobertura
+        '''
+        if candidates_keys is not None:
+            minimal_cover = candidates_keys.minimal_cover
+        attr_table = AttributeTable(relation.t_set)
+        if any("\0" in attr for attr in attr_table.attr_list):
+            raise ValueError("Los nombres de los atributos no pueden contener el carácter nulo")
+        name_bytes = b"\0".join(attr.encode("utf-8") for attr in attr_table.attr_list)
+        mask_len = maskLength(len(attr_table.attr_list))
+        fd_mask_list = attr_table.encodeFDs(relation.l_set)
+        cover_mask_list = []
+        key_mask_list = []
+        flags = 0
+        if minimal_cover is not None:
+            flags |= HAS_COVER
+            cover_mask_list = attr_table.encodeFDs(minimal_cover.irreducible_rel.l_set)
+        if candidates_keys is not None:
+            flags |= HAS_KEYS
+            key_mask_list = candidates_keys.candidate_key_masks
+        self.offset_list.append(self.file.tell())
+        self.file.write(RECORD_HEADER.pack(len(attr_table.attr_list), len(fd_mask_list), len(cover_mask_list),
+                                           len(key_mask_list), len(name_bytes), flags))
+        self.file.write(name_bytes + b"\0" * paddingLength(RECORD_HEADER.size + len(name_bytes)))
+        for lhs_mask, rhs_mask in list(fd_mask_list) + list(cover_mask_list):
+            self.file.write(lhs_mask.to_bytes(mask_len, "little"))
+            self.file.write(rhs_mask.to_bytes(mask_len, "little"))
+        for key_mask in key_mask_list:
+            self.file.write(key_mask.to_bytes(mask_len, "little"))
+        self.file.write(b"\0" * paddingLength(self.file.tell()))
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        for offset in self.offset_list:
+            self.file.write(INDEX_ENTRY.pack(offset))
+        self.file.seek(0)
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, len(self.offset_list), index_offset))
+        self.file.close()
+
+
+class BinaryRelation(RelationModel):
+    '''
+    Vista de una relación dentro de un buffer con el formato .relb (por
+    ejemplo, el mmap de BinaryCorpus). Las máscaras se leen directamente
+    del buffer cuando se piden; t_set y l_set solo se construyen si se
+    usan, así que la vista sirve donde se espera un RelationModel.
+
+    Al serializarla con pickle (para enviarla a un proceso trabajador) se
+    copian solo los bytes de esta relación.
+    '''
+    def __init__(self, buffer, offset: int = 0):
+        self.buffer = memoryview(buffer)
+        self.offset = offset
+        (self.attr_num, self.fd_num, self.cover_num, self.key_num, name_len,
+         self.flags) = RECORD_HEADER.unpack_from(self.buffer, offset)
+        self.name_offset = offset + RECORD_HEADER.size
+        self.mask_len = maskLength(self.attr_num)
+        self.fd_offset = self.name_offset + name_len + paddingLength(RECORD_HEADER.size + name_len)
+        self.cover_offset = self.fd_offset + self.fd_num * 2 * self.mask_len
+        self.key_offset = self.cover_offset + self.cover_num * 2 * self.mask_len
+        self.end_offset = self.key_offset + self.key_num * self.mask_len
+        if self.end_offset > len(self.buffer):
+            raise BinaryFormatError("La relación en la posición {0} está incompleta".format(offset))
+        self.name_len = name_len
+        self._attr_list = None
+        self._t_set = None
+        self._l_set = None
+
+    def __reduce__(self):
+        return BinaryRelation, (bytes(self.buffer[self.offset:self.end_offset]),)
+
+    @property
+    def attr_list(self):
+        if self._attr_list is None:
+            name_bytes = bytes(self.buffer[self.name_offset:self.name_offset + self.name_len])
+            self._attr_list = name_bytes.decode("utf-8").split("\0") if self.attr_num else []
+        return self._attr_list
+
+    @property
+    def attr_table(self):
+        return AttributeTable(self.attr_list)
+
+    @property
+    def t_set(self):
+        if self._t_set is None:
+            self._t_set = set(self.attr_list)
+        return self._t_set
+
+    @property
+    def l_set(self):
+        if self._l_set is None:
+            self._l_set = self.attr_table.decodeFDs(self.iterateFDMasks())
+        return self._l_set
+
+    @property
+    def has_cover(self):
+        return bool(self.flags & HAS_COVER)
+
+    @property
+    def has_keys(self):
+        return bool(self.flags & HAS_KEYS)
+
+    def readMask(self, offset: int):
+        return int.from_bytes(self.buffer[offset:offset + self.mask_len], "little")
+
+    def iterateFDMasks(self):
+        '''
+        Generador de las dependencias de L como pares de máscaras
+        '''
+        return self.__iterateFDMasks(self.fd_offset, self.fd_num)
+
+    def coverFDMasks(self):
+        '''
+        Cobertura mínima guardada (lista de pares de máscaras), o None
+        '''
+        if not self.has_cover:
+            return None
+        return list(self.__iterateFDMasks(self.cover_offset, self.cover_num))
+
+    def keyMasks(self):
+        '''
+        Llaves candidatas guardadas (lista de máscaras), o None
+        '''
+        if not self.has_keys:
+            return None
+        return [self.readMask(self.key_offset + index * self.mask_len) for index in range(self.key_num)]
+
+    def analyze(self, worker_num: int = 1, lazy_keys: bool = False):
+        '''
+        Retorna el NormalFormsChecker de la relación, usando la cobertura y
+        las llaves guardadas en lugar de calcularlas. Las dependencias de L
+        pasan como máscaras, sin decodificar ni validar l_set. Si no hay
+        llaves guardadas, con lazy_keys no se enumeran (ver CandidatesKeys)
+        '''
+        minimal_cover = IrreducibleFD(relation=self, cover_fd_masks=self.coverFDMasks(),
+                                      fd_mask_list=list(self.iterateFDMasks()))
+        candidates_keys = CandidatesKeys(worker_num=worker_num, minimal_cover=minimal_cover, key_masks=self.keyMasks(),
+                                         lazy=lazy_keys)
+        return NormalFormsChecker(candidates_keys=candidates_keys)
+
+    def toRelation(self):
+        '''
+        Copia la relación en un RelationModel que no depende del buffer
+        '''
+        relation = RelationModel()
+        relation.t_set = set(self.t_set)
+        relation.l_set = set(self.l_set)
+        return relation
+
+    def __iterateFDMasks(self, offset: int, fd_num: int):
+        mask_len = self.mask_len
+        for _ in range(fd_num):
+            yield self.readMask(offset), self.readMask(offset + mask_len)
+            offset += 2 * mask_len
+
+
+class BinaryCorpus:
+    '''
+    Abre un archivo .relb con mmap. Se usa como una secuencia de
+    BinaryRelation (len, índices, iteración) y como administrador de
+    contexto; las vistas entregadas no se deben usar después de cerrarlo
+    '''
+    def __init__(self, binary_path: str):
+        self.binary_path = binary_path
+        with open(binary_path, "rb") as file:
+            try:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BinaryFormatError("{0}: el archivo está vacío".format(binary_path))
+        try:
+            if len(self.map) < FILE_HEADER.size:
+                raise BinaryFormatError("{0}: el archivo está incompleto".format(binary_path))
+            magic, version, _, self.relation_num, self.index_offset = FILE_HEADER.unpack_from(self.map)
+            if magic != MAGIC:
+                raise BinaryFormatError("{0}: no es un archivo de relaciones binario".format(binary_path))
+            if version != VERSION:
+                raise BinaryFormatError("{0}: versión {1} no soportada".format(binary_path, version))
+            if self.index_offset + self.relation_num * INDEX_ENTRY.size > len(self.map):
+                raise BinaryFormatError("{0}: el índice está incompleto".format(binary_path))
+        except BinaryFormatError:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.relation_num
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.relation_num
+        if not 0 <= index < self.relation_num:
+            raise IndexError("índice de relación fuera de rango")
+        offset, = INDEX_ENTRY.unpack_from(self.map, self.index_offset + index * INDEX_ENTRY.size)
+        return BinaryRelation(self.map, offset)
+
+    def __iter__(self):
+        for index in range(self.relation_num):
+            yield self[index]
+
+    def close(self):
+        '''
+        Cierra el mmap. Si alguna vista sigue en uso, el mapa se libera
+        cuando esa vista se destruye
+        '''
+        if self.map is None:
+            return
+        try:
+            self.map.close()
+        except BufferError:
+            pass
+        self.map = None
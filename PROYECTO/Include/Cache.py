@@ -0,0 +1,203 @@
+'''
+Caché persistente de resultados del análisis. La llave de cada entrada es
+la huella de la relación (relationFingerprint), de modo que el orden de
+T y de L, o las dependencias repetidas, no cambian la llave. Cada entrada
+guarda la cobertura mínima, las llaves candidatas y el resultado de las
+formas normales.
+
+Las entradas se guardan en una base SQLite, que permite que varios
+procesos lean y escriban el mismo archivo a la vez. Cuando el tamaño de
+las entradas supera max_bytes se eliminan las usadas hace más tiempo.
+'''
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from Include.Models import AttributeTable, CandidatesKeys, IrreducibleFD, NormalFormsChecker, RelationModel
+
+CACHE_FORMAT_VERSION = 3
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ud_mcic_db_t4", "results.sqlite")
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+LOCK_TIMEOUT = 30.0
+
+
+def relationFingerprint(relation: RelationModel):
+    '''
+    Huella SHA-256 de la relación: se calcula sobre T ordenado y sobre las
+    dependencias de L sin repetir, cada una con sus lados ordenados
+    '''
+    fd_set = set((tuple(sorted(lhs)), tuple(sorted(rhs))) for lhs, rhs in relation.l_set)
+    canonical = json.dumps([CACHE_FORMAT_VERSION, sorted(relation.t_set), sorted(fd_set)], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def normalFormsToEntry(normal_forms: NormalFormsChecker):
+    '''
+    Diccionario que se guarda en el caché. Los conjuntos de atributos se
+    guardan como listas ordenadas de nombres; las llaves, en el orden en
+    que se encontraron
+    '''
+    candidates_keys = normal_forms.candidates_keys
+    attr_table = candidates_keys.attr_table
+    return {"minimal_cover": sorted([sorted(lhs), sorted(rhs)]
+                                    for lhs, rhs in candidates_keys.minimal_cover.irreducible_rel.l_set),
+            "candidate_keys": [sorted(attr_table.decode(key_mask)) for key_mask in candidates_keys.candidate_key_masks],
+            "is_2nf": normal_forms.is_2nf,
+            "is_3nf": normal_forms.is_3nf,
+            "is_bc_nf": normal_forms.is_bc_nf,
+            "violations": [violation.toDict() for violation in normal_forms.violations]}
+
+
+class ResultCache:
+    '''
+    Caché de resultados en el archivo SQLite cache_path. Cada proceso debe
+    abrir su propio ResultCache; las escrituras se hacen en transacciones y
+    SQLite las serializa entre procesos.
+
+    hits y misses cuentan los aciertos y fallos de esta instancia;
+    getStats() entrega además los totales acumulados en el archivo.
+    '''
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(cache_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.__transaction():
+            self.connection.execute("CREATE TABLE IF NOT EXISTS entries (fingerprint TEXT PRIMARY KEY, "
+                                    "payload BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS entries_access ON entries (last_access)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            for name in ("hits", "misses", "evictions"):
+                self.connection.execute("INSERT OR IGNORE INTO stats VALUES (?, 0)", (name,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def get(self, relation: RelationModel):
+        '''
+        Retorna la entrada de la relación (ver normalFormsToEntry), o None
+        si no está en el caché
+        '''
+        fingerprint = relationFingerprint(relation)
+        with self.__transaction():
+            row = self.connection.execute("SELECT payload FROM entries WHERE fingerprint = ?",
+                                          (fingerprint,)).fetchone()
+            if row is None:
+                self.misses += 1
+                self.__addStat("misses", 1)
+                return None
+            self.hits += 1
+            self.__addStat("hits", 1)
+            self.connection.execute("UPDATE entries SET last_access = ? WHERE fingerprint = ?",
+                                    (time.time(), fingerprint))
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, relation: RelationModel, normal_forms: NormalFormsChecker):
+        '''
+        Guarda el resultado del análisis de la relación y elimina las
+        entradas usadas hace más tiempo si se supera max_bytes
+        '''
+        payload = zlib.compress(json.dumps(normalFormsToEntry(normal_forms)).encode("utf-8"))
+        with self.__transaction():
+            self.connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                                    (relationFingerprint(relation), payload, len(payload), time.time()))
+            self.__evict()
+
+    def getNormalForms(self, relation: RelationModel, worker_num: int = 1, progress=None, lazy_keys: bool = False,
+                       cover_progress=None):
+        '''
+        Retorna el NormalFormsChecker de la relación. Si está en el caché,
+        se construye con la cobertura y las llaves guardadas; si no, se
+        calcula y se guarda. progress se entrega a la búsqueda de llaves o
+        de atributos primos (ver CandidatesKeys) y cover_progress al cálculo
+        de la cobertura mínima (ver CanonicalCover). Con lazy_keys las llaves
+        no se enumeran, y el resultado solo se guarda si aun así quedaron
+        completas
+        '''
+        entry = self.get(relation)
+        if entry is None:
+            minimal_cover = IrreducibleFD(relation=relation, progress=cover_progress)
+            candidates_keys = CandidatesKeys(worker_num=worker_num, minimal_cover=minimal_cover, progress=progress,
+                                             lazy=lazy_keys)
+            normal_forms = NormalFormsChecker(candidates_keys=candidates_keys)
+            if normal_forms.candidates_keys.is_complete:
+                self.put(relation, normal_forms)
+            return normal_forms
+        return self.normalFormsFromEntry(relation, entry, worker_num)
+
+    def normalFormsFromEntry(self, relation: RelationModel, entry: dict, worker_num: int = 1):
+        '''
+        NormalFormsChecker de la relación construido con la cobertura y las
+        llaves de su entrada (ver get), sin calcularlas
+        '''
+        attr_table = AttributeTable(relation.t_set)
+        cover_fd_masks = [(attr_table.encode(lhs), attr_table.encode(rhs)) for lhs, rhs in entry["minimal_cover"]]
+        key_masks = [attr_table.encode(key) for key in entry["candidate_keys"]]
+        minimal_cover = IrreducibleFD(relation=relation, cover_fd_masks=cover_fd_masks)
+        candidates_keys = CandidatesKeys(worker_num=worker_num, minimal_cover=minimal_cover, key_masks=key_masks)
+        return NormalFormsChecker(candidates_keys=candidates_keys)
+
+    def getStats(self):
+        '''
+        Estadísticas del caché: aciertos y fallos de esta instancia
+        ("hits", "misses") y del archivo ("total_hits", "total_misses",
+        "evictions"), número de entradas y bytes ocupados
+        '''
+        stat_dict = dict(self.connection.execute("SELECT name, value FROM stats").fetchall())
+        entry_num, size = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "total_hits": stat_dict["hits"],
+                "total_misses": stat_dict["misses"],
+                "evictions": stat_dict["evictions"],
+                "entries": entry_num,
+                "size": size,
+                "max_size": self.max_bytes}
+
+    def clear(self):
+        with self.__transaction():
+            self.connection.execute("DELETE FROM entries")
+            self.connection.execute("UPDATE stats SET value = 0")
+
+    @contextlib.contextmanager
+    def __transaction(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def __addStat(self, name: str, value: int):
+        self.connection.execute("UPDATE stats SET value = value + ? WHERE name = ?", (value, name))
+
+    def __evict(self):
+        size, = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if size <= self.max_bytes:
+            return
+        evicted_num = 0
+        for fingerprint, entry_size in self.connection.execute(
+                "SELECT fingerprint, size FROM entries ORDER BY last_access").fetchall():
+            if size <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM entries WHERE fingerprint = ?", (fingerprint,))
+            size -= entry_size
+            evicted_num += 1
+        self.__addStat("evictions", evicted_num)
@@ -0,0 +1,402 @@
+import collections
+import itertools
+
+from Include.Models import (AttributeClosure, CandidatesKeys, CanonicalCover, IrreducibleFD, RelationModel, iterateBits,
+                            minimizeKey)
+
+
+PROJECTION_MAX_FD_NUM = 20000
+
+SMALL_SCHEMA_ATTR_NUM = 10
+
+
+def projectFDMasks(fd_mask_list: list, schema_mask: int, max_fd_num: int = None):
+    '''
+    Cobertura de las dependencias de fd_mask_list proyectadas sobre los
+    atributos de schema_mask, sin recorrer los subconjuntos de schema_mask.
+    Los atributos de fuera se eliminan uno a uno por resolución (Gottlob):
+    al eliminar C, cada par X -> C, CY -> A se reemplaza por XY -> A. En
+    cada paso se elimina el atributo que produce menos combinaciones y se
+    descartan las dependencias cuyo lado izquierdo contiene al de otra con
+    el mismo lado derecho.
+
+    La proyección puede crecer exponencialmente en casos patológicos: si
+    se entrega max_fd_num y el conjunto intermedio lo supera, retorna None
+    '''
+    fd_set = set()
+    producer_dict = collections.defaultdict(list)
+    for lhs_mask, rhs_mask in fd_mask_list:
+        for bit in iterateBits(rhs_mask & ~lhs_mask):
+            producer_dict[bit].append(lhs_mask)
+    # Solo participan las dependencias que producen un atributo del esquema
+    # o uno que se usa, directa o indirectamente, para producirlo
+    reached_mask = schema_mask
+    pending_list = list(iterateBits(schema_mask))
+    while pending_list:
+        bit = pending_list.pop()
+        for lhs_mask in producer_dict.get(bit, ()):
+            fd_set.add((lhs_mask, bit))
+            for lhs_bit in iterateBits(lhs_mask & ~reached_mask):
+                reached_mask |= lhs_bit
+                pending_list.append(lhs_bit)
+    pending_mask = 0
+    for lhs_mask, rhs_bit in fd_set:
+        pending_mask |= (lhs_mask | rhs_bit) & ~schema_mask
+    while pending_mask:
+        producer_dict = collections.defaultdict(list)
+        consumer_dict = collections.defaultdict(list)
+        for fd_mask in fd_set:
+            if fd_mask[1] & pending_mask:
+                producer_dict[fd_mask[1]].append(fd_mask)
+            for bit in iterateBits(fd_mask[0] & pending_mask):
+                consumer_dict[bit].append(fd_mask)
+        # Los atributos que ninguna dependencia produce, o que ninguna usa,
+        # se eliminan todos a la vez: la resolución no agrega nada
+        free_mask = 0
+        for bit in iterateBits(pending_mask):
+            if not producer_dict[bit] or not consumer_dict[bit]:
+                free_mask |= bit
+        if free_mask:
+            pending_mask &= ~free_mask
+            fd_set = set(fd_mask for fd_mask in fd_set if not (fd_mask[0] | fd_mask[1]) & free_mask)
+            continue
+        attr_bit = min(iterateBits(pending_mask),
+                       key=lambda bit: len(producer_dict[bit]) * len(consumer_dict[bit]))
+        pending_mask &= ~attr_bit
+        producer_list = producer_dict[attr_bit]
+        consumer_list = consumer_dict[attr_bit]
+        fd_set.difference_update(producer_list)
+        fd_set.difference_update(consumer_list)
+        for producer_lhs, _ in producer_list:
+            for consumer_lhs, rhs_bit in consumer_list:
+                lhs_mask = producer_lhs | (consumer_lhs & ~attr_bit)
+                if not rhs_bit & lhs_mask:
+                    fd_set.add((lhs_mask, rhs_bit))
+        fd_set = removeSubsumedFD(fd_set)
+        if max_fd_num is not None and len(fd_set) > max_fd_num:
+            return None
+    return CanonicalCover(sorted(fd_set)).fd_mask_list
+
+
+def projectFDMasksBySubsets(closure_engine: AttributeClosure, schema_mask: int):
+    '''
+    Cobertura de las dependencias proyectadas sobre schema_mask a partir de
+    los cierres de sus subconjuntos, por niveles de tamaño: X -> A se agrega
+    si A está en el cierre de X y ningún subconjunto de X ya lo determina;
+    los superconjuntos de una superllave del esquema no aportan nada y se
+    omiten. Su costo crece con 2^|schema_mask| pero no depende del tamaño de
+    T ni de L, por lo que conviene para esquemas pequeños
+    '''
+    bit_list = list(iterateBits(schema_mask))
+    determinant_dict = collections.defaultdict(list)
+    superkey_list = []
+    fd_list = []
+    for size in range(len(bit_list)):
+        for combination in itertools.combinations(bit_list, size):
+            lhs_mask = sum(combination)
+            if any(not superkey_mask & ~lhs_mask for superkey_mask in superkey_list):
+                continue
+            closure = closure_engine.calculateMask(lhs_mask) & schema_mask
+            for bit in iterateBits(closure & ~lhs_mask):
+                if not any(not determinant_mask & ~lhs_mask for determinant_mask in determinant_dict[bit]):
+                    determinant_dict[bit].append(lhs_mask)
+                    fd_list.append((lhs_mask, bit))
+            if closure == schema_mask:
+                superkey_list.append(lhs_mask)
+    return CanonicalCover(fd_list).fd_mask_list
+
+
+def removeSubsumedFD(fd_set: set):
+    '''
+    Quita las dependencias X -> A para las que existe otra Y -> A con Y
+    contenido en X
+    '''
+    lhs_dict = collections.defaultdict(list)
+    for lhs_mask, rhs_bit in fd_set:
+        lhs_dict[rhs_bit].append(lhs_mask)
+    result_set = set()
+    for rhs_bit, lhs_list in lhs_dict.items():
+        kept_list = []
+        for lhs_mask in sorted(lhs_list, key=lambda mask: bin(mask).count("1")):
+            if not any(kept_mask & ~lhs_mask == 0 for kept_mask in kept_list):
+                kept_list.append(lhs_mask)
+                result_set.add((lhs_mask, rhs_bit))
+    return result_set
+
+
+def isLosslessJoin(fd_mask_list: list, t_mask: int, schema_mask_list: list):
+    '''
+    Indica si la reunión natural de las proyecciones sobre schema_mask_list
+    reconstruye siempre la relación. Primero se prueban dos condiciones
+    suficientes que solo usan cierres: con dos esquemas, que su intersección
+    determine a alguno de ellos; en general, que algún esquema sea
+    superllave y la descomposición preserve las dependencias (Biskup, Dayal
+    y Bernstein). Si no se cumplen se hace la prueba de la persecución
+    (chase), que es exacta
+    '''
+    closure_engine = AttributeClosure.fromFDMasks(fd_mask_list)
+    if len(schema_mask_list) == 2:
+        closure = closure_engine.calculateMask(schema_mask_list[0] & schema_mask_list[1])
+        return not schema_mask_list[0] & ~closure or not schema_mask_list[1] & ~closure
+    if any(closure_engine.calculateMask(schema_mask) == t_mask for schema_mask in schema_mask_list):
+        if not lostDependencies(closure_engine, fd_mask_list, schema_mask_list):
+            return True
+    return chaseTableau(fd_mask_list, t_mask, schema_mask_list)
+
+
+def chaseTableau(fd_mask_list: list, t_mask: int, schema_mask_list: list):
+    '''
+    Prueba de la persecución: la tabla tiene una fila por esquema y una
+    columna por atributo; el símbolo 0 es el distinguido y los demás son
+    distintos entre sí. Los símbolos que una dependencia iguala se unen en
+    una estructura de conjuntos disjuntos, y solo se vuelven a revisar las
+    dependencias cuyo lado izquierdo usa una columna que cambió. Cada fila
+    guarda la máscara de las columnas cuyo símbolo puede compartir con otra
+    fila; una fila con un símbolo único en el lado izquierdo no coincide con
+    ninguna otra y no se agrupa. La reunión es sin pérdida si alguna fila
+    termina con solo símbolos distinguidos
+    '''
+    column_list = [bit.bit_length() - 1 for bit in iterateBits(t_mask)]
+    parent_list = [0]
+    row_list = []
+    shared_mask_list = list(schema_mask_list)
+    for schema_mask in schema_mask_list:
+        row = {}
+        for column in column_list:
+            if schema_mask >> column & 1:
+                row[column] = 0
+            else:
+                row[column] = len(parent_list)
+                parent_list.append(len(parent_list))
+        row_list.append(row)
+
+    def find(symbol: int):
+        while parent_list[symbol] != symbol:
+            parent_list[symbol] = parent_list[parent_list[symbol]]
+            symbol = parent_list[symbol]
+        return symbol
+
+    fd_column_list = []
+    column_fd_dict = collections.defaultdict(list)
+    for lhs_mask, rhs_mask in fd_mask_list:
+        lhs_column_list = [bit.bit_length() - 1 for bit in iterateBits(lhs_mask)]
+        for column in lhs_column_list:
+            column_fd_dict[column].append(len(fd_column_list))
+        fd_column_list.append((lhs_mask, lhs_column_list,
+                               [bit.bit_length() - 1 for bit in iterateBits(rhs_mask & ~lhs_mask)]))
+    pending_list = list(range(len(fd_column_list)))
+    is_pending_list = [True] * len(fd_column_list)
+    while pending_list:
+        fd_index = pending_list.pop()
+        is_pending_list[fd_index] = False
+        lhs_mask, lhs_column_list, rhs_column_list = fd_column_list[fd_index]
+        group_dict = collections.defaultdict(list)
+        for row_index, row in enumerate(row_list):
+            if not lhs_mask & ~shared_mask_list[row_index]:
+                group_dict[tuple(find(row[column]) for column in lhs_column_list)].append(row_index)
+        for group_index_list in group_dict.values():
+            if len(group_index_list) < 2:
+                continue
+            for column in rhs_column_list:
+                root_set = set(find(row_list[row_index][column]) for row_index in group_index_list)
+                if len(root_set) < 2:
+                    continue
+                symbol = min(root_set)
+                for root in root_set:
+                    parent_list[root] = symbol
+                for row_index in group_index_list:
+                    shared_mask_list[row_index] |= 1 << column
+                for changed_index in column_fd_dict[column]:
+                    if not is_pending_list[changed_index]:
+                        is_pending_list[changed_index] = True
+                        pending_list.append(changed_index)
+    return any(all(find(symbol) == 0 for symbol in row.values()) for row in row_list)
+
+
+def lostDependencies(closure_engine: AttributeClosure, fd_mask_list: list, schema_mask_list: list):
+    '''
+    Lista de las dependencias de fd_mask_list que no se deducen de la unión
+    de sus proyecciones sobre schema_mask_list. Para cada X -> Y se hace
+    crecer Z = X con el cierre de Z ∩ Ri restringido a Ri, sin calcular las
+    proyecciones
+    '''
+    lost_list = []
+    for lhs_mask, rhs_mask in fd_mask_list:
+        reached_mask = lhs_mask
+        is_changed = True
+        while is_changed and rhs_mask & ~reached_mask:
+            is_changed = False
+            for schema_mask in schema_mask_list:
+                new_mask = reached_mask | (closure_engine.calculateMask(reached_mask & schema_mask) & schema_mask)
+                if new_mask != reached_mask:
+                    reached_mask = new_mask
+                    is_changed = True
+        if rhs_mask & ~reached_mask:
+            lost_list.append((lhs_mask, rhs_mask))
+    return lost_list
+
+
+def removeContainedSchemas(schema_mask_list: list):
+    '''
+    Quita los esquemas contenidos en otro, conservando el orden
+    '''
+    result_list = []
+    for index, schema_mask in enumerate(schema_mask_list):
+        is_contained = False
+        for other_index, other_mask in enumerate(schema_mask_list):
+            if other_index != index and not schema_mask & ~other_mask and (schema_mask != other_mask or other_index < index):
+                is_contained = True
+                break
+        if not is_contained:
+            result_list.append(schema_mask)
+    return result_list
+
+
+class RelationDecomposer:
+    '''
+    Esta clase descompone una relación R (T, L) a partir de su cobertura
+    mínima (IrreducibleFD):
+
+    synthesize3NF: síntesis de Bernstein. Un esquema por cada lado izquierdo
+        de la cobertura mínima, más una llave candidata si ningún esquema la
+        contiene. Preserva las dependencias y su reunión es sin pérdida.
+    decomposeBCNF: descomposición sin pérdida en FNBC. Cada esquema se
+        revisa con la cobertura de sus dependencias proyectadas, que se
+        obtiene de la del esquema del que se separó (projectFDMasks); una
+        dependencia cuyo lado izquierdo X no es superllave parte el esquema
+        en X+ y en el esquema sin X+ - X. Si la proyección supera
+        PROJECTION_MAX_FD_NUM dependencias, el esquema se parte con la prueba
+        de pares de Tsou y Fischer, polinomial pero que puede partir de más.
+        Puede no preservar las dependencias.
+
+    Los esquemas son máscaras de atributos; toRelations los convierte en
+    RelationModel con las dependencias proyectadas (projectFDMasks).
+    candidates_keys es opcional: si se entrega, su primera llave se usa en
+    la síntesis; si no, se obtiene una reduciendo T.
+    '''
+    def __init__(self, json_path: str = None, relation: RelationModel = None, minimal_cover: IrreducibleFD = None,
+                 candidates_keys: CandidatesKeys = None):
+        if candidates_keys is not None:
+            minimal_cover = candidates_keys.minimal_cover
+        elif minimal_cover is None:
+            minimal_cover = IrreducibleFD(json_path, relation)
+        self.minimal_cover = minimal_cover
+        self.candidates_keys = candidates_keys
+        self.attr_table = minimal_cover.attr_table
+        self.closure_engine = minimal_cover.closure_engine
+        self.t_mask = self.attr_table.encode(minimal_cover.relation.t_set)
+        self.cover_mask_list = list(self.closure_engine.fd_mask_list)
+        self.projection_dict = {self.t_mask: self.cover_mask_list}
+
+    def synthesize3NF(self):
+        '''
+        Lista de máscaras de los esquemas de la síntesis en 3 FN
+        '''
+        group_dict = {}
+        for lhs_mask, rhs_mask in self.cover_mask_list:
+            group_dict[lhs_mask] = group_dict.get(lhs_mask, lhs_mask) | rhs_mask
+        schema_mask_list = removeContainedSchemas(list(group_dict.values()))
+        if not any(self.closure_engine.calculateMask(schema_mask) == self.t_mask for schema_mask in schema_mask_list):
+            schema_mask_list.append(self.__findKey())
+        return schema_mask_list
+
+    def decomposeBCNF(self):
+        '''
+        Lista de máscaras de los esquemas de la descomposición en FNBC
+        '''
+        schema_mask_list = []
+        pending_list = [(self.t_mask, self.cover_mask_list)]
+        while pending_list:
+            schema_mask, fd_mask_list = pending_list.pop()
+            if fd_mask_list is None:
+                bcnf_mask, removed_bit = self.__splitByPairs(schema_mask)
+                schema_mask_list.append(bcnf_mask)
+                if removed_bit:
+                    pending_list.append((schema_mask & ~removed_bit, None))
+                continue
+            violation = self.__findViolation(schema_mask, fd_mask_list)
+            if violation is None:
+                schema_mask_list.append(schema_mask)
+                self.projection_dict[schema_mask] = fd_mask_list
+                continue
+            closure = self.closure_engine.calculateMask(violation) & schema_mask
+            for child_mask in (schema_mask & ~(closure & ~violation), closure):
+                pending_list.append((child_mask, projectFDMasks(fd_mask_list, child_mask, PROJECTION_MAX_FD_NUM)))
+        return removeContainedSchemas(schema_mask_list)
+
+    def isLosslessJoin(self, schema_mask_list: list):
+        return isLosslessJoin(self.cover_mask_list, self.t_mask, schema_mask_list)
+
+    def lostDependencies(self, schema_mask_list: list):
+        '''
+        Dependencias de la cobertura mínima que la descomposición no preserva
+        '''
+        return self.attr_table.decodeFDs(lostDependencies(self.closure_engine, self.cover_mask_list, schema_mask_list))
+
+    def preservesDependencies(self, schema_mask_list: list):
+        return not lostDependencies(self.closure_engine, self.cover_mask_list, schema_mask_list)
+
+    def toRelations(self, schema_mask_list: list):
+        '''
+        Convierte los esquemas en relaciones con su cobertura proyectada.
+        Las proyecciones que decomposeBCNF ya calculó quedan en
+        projection_dict y no se repiten
+        '''
+        relation_list = []
+        for schema_mask in schema_mask_list:
+            if schema_mask not in self.projection_dict:
+                self.projection_dict[schema_mask] = self.projectFDMasks(schema_mask)
+            relation = RelationModel()
+            relation.t_set = self.attr_table.decode(schema_mask)
+            relation.l_set = self.attr_table.decodeFDs(self.projection_dict[schema_mask])
+            relation_list.append(relation)
+        return relation_list
+
+    def projectFDMasks(self, schema_mask: int):
+        '''
+        Cobertura de las dependencias proyectadas sobre schema_mask: por
+        subconjuntos si el esquema tiene a lo sumo SMALL_SCHEMA_ATTR_NUM
+        atributos, por resolución en otro caso
+        '''
+        if bin(schema_mask).count("1") <= SMALL_SCHEMA_ATTR_NUM:
+            return projectFDMasksBySubsets(self.closure_engine, schema_mask)
+        return projectFDMasks(self.cover_mask_list, schema_mask)
+
+    def __findKey(self):
+        if self.candidates_keys is not None and self.candidates_keys.candidate_key_masks:
+            return self.candidates_keys.candidate_key_masks[0]
+        return minimizeKey(self.closure_engine, self.t_mask, self.t_mask)
+
+    def __findViolation(self, schema_mask: int, fd_mask_list: list):
+        '''
+        Lado izquierdo de una dependencia de fd_mask_list (cobertura de las
+        dependencias del esquema) que no es superllave del esquema, o None
+        '''
+        for lhs_mask, rhs_mask in fd_mask_list:
+            if rhs_mask & ~lhs_mask and schema_mask & ~self.closure_engine.calculateMask(lhs_mask):
+                return lhs_mask
+        return None
+
+    def __splitByPairs(self, schema_mask: int):
+        '''
+        Paso de Tsou y Fischer: mientras el esquema Y tenga atributos A y B
+        con A en el cierre de Y - AB, se quita B. El Y final está en FNBC y,
+        si se quitó algo, Y - A -> A para el último A, así que el esquema
+        original se puede partir sin pérdida en Y y en el esquema sin A.
+        Retorna (Y, A), con A = 0 si el esquema ya estaba en FNBC
+        '''
+        removed_bit = 0
+        pair = self.__findPair(schema_mask)
+        while pair is not None:
+            removed_bit, other_bit = pair
+            schema_mask &= ~other_bit
+            pair = self.__findPair(schema_mask)
+        return schema_mask, removed_bit
+
+    def __findPair(self, schema_mask: int):
+        for other_bit in iterateBits(schema_mask):
+            rest_mask = schema_mask & ~other_bit
+            for bit in iterateBits(rest_mask):
+                if self.closure_engine.impliesMask(rest_mask & ~bit, bit):
+                    return bit, other_bit
+        return None
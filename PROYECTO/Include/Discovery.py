@@ -0,0 +1,351 @@
+'''
+Descubrimiento de dependencias funcionales a partir de datos tabulares
+(CSV), con el algoritmo TANE: particiones despojadas y búsqueda por niveles
+en el retículo de conjuntos de atributos.
+
+La partición de un conjunto X agrupa las filas que coinciden en todos los
+atributos de X; la versión despojada omite los grupos de una sola fila y se
+guarda como un par de array("i"): los números de fila, grupo tras grupo, y
+la posición en que termina cada grupo.
+Con e(X) = (filas en grupos) - (número de grupos), la dependencia X -> A se
+cumple si y solo si e(X) = e(X ∪ {A}).
+
+Los valores de cada columna se codifican como enteros en un array("i") a
+medida que el archivo se lee por bloques de chunk_rows filas, y la
+partición de X ∪ {B} se obtiene refinando la de X con los códigos de B.
+Solo se conservan las particiones de los dos últimos niveles y mientras
+quepan en memory_budget; las que no caben se recalculan cuando se
+necesitan.
+
+    discovery = DependencyDiscovery("clientes.csv")
+    NormalFormsChecker(relation=discovery.relation)
+'''
+import collections
+import csv
+import itertools
+import json
+import sys
+from array import array
+
+from Include import Profiling
+from Include.Models import RelationModel, iterateBits
+
+DEFAULT_MEMORY_BUDGET = 512 * 2 ** 20
+CHUNK_ROWS = 65536
+CODE_BYTES = array("i").itemsize
+DISTINCT_VALUE_BYTES = 120
+
+
+class DiscoveryError(ValueError):
+    '''
+    El archivo CSV no se puede usar para descubrir dependencias
+    '''
+
+
+class MemoryBudgetError(DiscoveryError):
+    '''
+    Los datos codificados no caben en el presupuesto de memoria
+    '''
+
+
+def refinePartition(partition: tuple, codes: array):
+    '''
+    Partición despojada de X ∪ {B}, a partir de la de X y de los códigos de
+    la columna B: cada grupo se divide según el valor de B
+    '''
+    row_array, end_array = partition
+    refined_row_array = array("i")
+    refined_end_array = array("i")
+    start = 0
+    for end in end_array:
+        group_dict = {}
+        for row in row_array[start:end]:
+            code = codes[row]
+            group = group_dict.get(code)
+            if group is None:
+                group_dict[code] = [row]
+            else:
+                group.append(row)
+        for group in group_dict.values():
+            if len(group) > 1:
+                refined_row_array.extend(group)
+                refined_end_array.append(len(refined_row_array))
+        start = end
+    return refined_row_array, refined_end_array
+
+
+def partitionError(partition: tuple):
+    return len(partition[0]) - len(partition[1])
+
+
+def partitionBytes(partition: tuple):
+    return (len(partition[0]) + len(partition[1])) * CODE_BYTES
+
+
+class DependencyDiscovery:
+    '''
+    Descubre las dependencias funcionales mínimas y no triviales que se
+    cumplen en el archivo CSV csv_path. El resultado queda en:
+        attr_list: los nombres de las columnas (la primera fila, o col_0,
+            col_1... con has_header=False)
+        fd_mask_list: pares (lado izquierdo, atributo) como máscaras, donde
+            el bit i es la columna i
+        l_set: las dependencias en el formato de RelationModel, agrupadas
+            por lado izquierdo
+        relation: RelationModel con T = attr_list y L = l_set
+
+    memory_budget: bytes para los datos codificados y las particiones; si
+    los datos no caben se lanza MemoryBudgetError.
+    max_lhs: tamaño máximo del lado izquierdo (None: sin límite).
+    max_rows: solo se leen las primeras max_rows filas.
+    Los valores se comparan como texto, y una celda vacía es un valor más.
+    '''
+    def __init__(self, csv_path: str, memory_budget: int = DEFAULT_MEMORY_BUDGET, max_lhs: int = None,
+                 max_rows: int = None, chunk_rows: int = CHUNK_ROWS, delimiter: str = ",", has_header: bool = True,
+                 encoding: str = "utf-8"):
+        self.csv_path = csv_path
+        self.memory_budget = memory_budget
+        self.max_lhs = max_lhs
+        self.max_rows = max_rows
+        self.chunk_rows = chunk_rows
+        self.partition_dict = {}
+        self.error_dict = {}
+        self.partition_bytes = 0
+        self.peak_partition_bytes = 0
+        self.partition_num = 0
+        self.fd_mask_list = []
+        with Profiling.stage("discovery.read"):
+            with open(csv_path, newline="", encoding=encoding) as file:
+                self.readColumns(csv.reader(file, delimiter=delimiter), has_header)
+        with Profiling.stage("discovery.search"):
+            self.searchLattice()
+        self.l_set = self.buildLSet()
+        self.relation = RelationModel()
+        self.relation.t_set = set(self.attr_list)
+        self.relation.l_set = self.l_set
+
+    def readColumns(self, reader, has_header: bool):
+        '''
+        Codifica las columnas bloque por bloque: el código de un valor es el
+        número de valores distintos de su columna vistos antes que él
+        '''
+        first_row = next(reader, None)
+        if first_row is None:
+            raise DiscoveryError("{0}: el archivo está vacío".format(self.csv_path))
+        if has_header:
+            self.attr_list = [name.strip() for name in first_row]
+            if not all(self.attr_list) or len(set(self.attr_list)) != len(self.attr_list):
+                raise DiscoveryError("{0}: los nombres de las columnas deben ser distintos y no vacíos"
+                                     .format(self.csv_path))
+            row_iter = reader
+        else:
+            self.attr_list = ["col_{0}".format(index) for index in range(len(first_row))]
+            row_iter = itertools.chain([first_row], reader)
+        if self.max_rows is not None:
+            row_iter = itertools.islice(row_iter, self.max_rows)
+        attr_num = len(self.attr_list)
+        self.codes_list = [array("i") for _ in range(attr_num)]
+        value_dict_list = [{} for _ in range(attr_num)]
+        self.row_num = 0
+        self.data_bytes = 0
+        while True:
+            chunk = [row for row in itertools.islice(row_iter, self.chunk_rows) if row]
+            if not chunk:
+                break
+            for index, row in enumerate(chunk):
+                if len(row) != attr_num:
+                    raise DiscoveryError("{0}: la fila {1} tiene {2} valores y se esperaban {3}"
+                                         .format(self.csv_path, self.row_num + index + 1, len(row), attr_num))
+            for column, (codes, value_dict) in enumerate(zip(self.codes_list, value_dict_list)):
+                get_code = value_dict.setdefault
+                codes.extend([get_code(row[column], len(value_dict)) for row in chunk])
+            self.row_num += len(chunk)
+            self.data_bytes = (self.row_num * attr_num * CODE_BYTES +
+                               sum(len(value_dict) for value_dict in value_dict_list) * DISTINCT_VALUE_BYTES)
+            if self.data_bytes > self.memory_budget:
+                raise MemoryBudgetError("{0}: las primeras {1} filas ya ocupan {2:.1f} MB de {3:.1f} MB; use max_rows "
+                                        "o un presupuesto mayor".format(self.csv_path, self.row_num,
+                                                                       self.data_bytes / 2 ** 20,
+                                                                       self.memory_budget / 2 ** 20))
+        self.data_bytes = self.row_num * attr_num * CODE_BYTES
+        self.distinct_num_list = [len(value_dict) for value_dict in value_dict_list]
+
+    def searchLattice(self):
+        '''
+        Búsqueda por niveles de TANE. C+(X) (cplus_dict) son los atributos A
+        para los que X - {A} -> A aún puede ser una dependencia mínima. Los
+        conjuntos con C+ vacío y las superllaves (e(X) = 0) se descartan;
+        para una superllave X se entregan antes las dependencias X -> A que
+        son mínimas
+        '''
+        attr_num = len(self.attr_list)
+        full_mask = (1 << attr_num) - 1
+        cplus_dict = {0: full_mask}
+        level_list = [1 << index for index in range(attr_num)]
+        level_size = 1
+        while level_list:
+            Profiling.count("discovery_levels")
+            for attr_set in level_list:
+                cplus_mask = full_mask
+                for bit in iterateBits(attr_set):
+                    cplus_mask &= cplus_dict[attr_set & ~bit]
+                attr_error = self.errorOf(attr_set)
+                for bit in iterateBits(attr_set & cplus_mask):
+                    Profiling.count("discovery_fd_tests")
+                    if self.errorOf(attr_set & ~bit) == attr_error:
+                        self.fd_mask_list.append((attr_set & ~bit, bit))
+                        cplus_mask &= ~bit
+                        cplus_mask &= attr_set
+                cplus_dict[attr_set] = cplus_mask
+            kept_list = []
+            for attr_set in level_list:
+                cplus_mask = cplus_dict[attr_set]
+                if not cplus_mask:
+                    continue
+                if self.errorOf(attr_set) == 0:
+                    if self.max_lhs is None or level_size <= self.max_lhs:
+                        for bit in iterateBits(cplus_mask & ~attr_set):
+                            if self.isMinimalFD(attr_set, bit):
+                                self.fd_mask_list.append((attr_set, bit))
+                    continue
+                kept_list.append(attr_set)
+            if self.max_lhs is not None and level_size > self.max_lhs:
+                break
+            self.dropPartitions(level_size - 1)
+            for attr_set in list(cplus_dict):
+                if bin(attr_set).count("1") < level_size:
+                    del cplus_dict[attr_set]
+            level_list = self.generateNextLevel(kept_list)
+            level_size += 1
+
+    def isMinimalFD(self, lhs_mask: int, bit: int):
+        '''
+        Indica si ningún subconjunto de lhs_mask sin uno de sus atributos
+        determina a bit
+        '''
+        for lhs_bit in iterateBits(lhs_mask):
+            Profiling.count("discovery_fd_tests")
+            subset_mask = lhs_mask & ~lhs_bit
+            if self.errorOf(subset_mask) == self.errorOf(subset_mask | bit):
+                return False
+        return True
+
+    def generateNextLevel(self, level_list: list):
+        '''
+        Conjuntos de un atributo más que se forman uniendo dos conjuntos del
+        nivel con el mismo prefijo (todos sus atributos salvo el de mayor
+        índice), y cuyos subconjuntos de un atributo menos están todos en el
+        nivel
+        '''
+        level_set = set(level_list)
+        block_dict = collections.defaultdict(list)
+        for attr_set in level_list:
+            high_bit = 1 << (attr_set.bit_length() - 1)
+            block_dict[attr_set & ~high_bit].append(high_bit)
+        next_level_list = []
+        for prefix_mask, high_list in block_dict.items():
+            high_list.sort()
+            for index, first_bit in enumerate(high_list):
+                for second_bit in high_list[index + 1:]:
+                    attr_set = prefix_mask | first_bit | second_bit
+                    if all(attr_set & ~bit in level_set for bit in iterateBits(prefix_mask)):
+                        next_level_list.append(attr_set)
+        return next_level_list
+
+    def errorOf(self, attr_set: int):
+        error = self.error_dict.get(attr_set)
+        if error is None:
+            error = partitionError(self.partitionOf(attr_set))
+        return error
+
+    def partitionOf(self, attr_set: int):
+        '''
+        Partición despojada de attr_set. Se refina la partición guardada de
+        menor error de un subconjunto con un atributo menos; si no hay ninguna,
+        se calcula recursivamente quitando el atributo de mayor índice
+        '''
+        partition = self.partition_dict.get(attr_set)
+        if partition is not None:
+            return partition
+        if not attr_set:
+            partition = (array("i", range(self.row_num)), array("i", [self.row_num])) if self.row_num > 1 else \
+                (array("i"), array("i"))
+            self.storePartition(0, partition)
+            return partition
+        parent_partition = None
+        added_bit = 0
+        for bit in iterateBits(attr_set):
+            candidate_partition = self.partition_dict.get(attr_set & ~bit)
+            if candidate_partition is not None and (parent_partition is None or
+                                                    self.error_dict[attr_set & ~bit] <
+                                                    self.error_dict[attr_set & ~added_bit]):
+                parent_partition = candidate_partition
+                added_bit = bit
+        if parent_partition is None:
+            added_bit = 1 << (attr_set.bit_length() - 1)
+            parent_partition = self.partitionOf(attr_set & ~added_bit)
+        partition = refinePartition(parent_partition, self.codes_list[added_bit.bit_length() - 1])
+        self.partition_num += 1
+        Profiling.count("discovery_partitions")
+        self.storePartition(attr_set, partition)
+        return partition
+
+    def storePartition(self, attr_set: int, partition: tuple):
+        '''
+        Guarda el error de la partición y, si cabe en el presupuesto, la
+        partición misma
+        '''
+        self.error_dict[attr_set] = partitionError(partition)
+        size = partitionBytes(partition)
+        if self.data_bytes + self.partition_bytes + size > self.memory_budget:
+            return
+        self.partition_dict[attr_set] = partition
+        self.partition_bytes += size
+        self.peak_partition_bytes = max(self.peak_partition_bytes, self.partition_bytes)
+
+    def dropPartitions(self, max_size: int):
+        '''
+        Libera las particiones de los conjuntos de a lo sumo max_size
+        atributos, que la búsqueda ya no vuelve a refinar
+        '''
+        for attr_set in list(self.partition_dict):
+            if bin(attr_set).count("1") <= max_size:
+                self.partition_bytes -= partitionBytes(self.partition_dict.pop(attr_set))
+
+    def buildLSet(self):
+        rhs_dict = collections.defaultdict(int)
+        for lhs_mask, bit in self.fd_mask_list:
+            rhs_dict[lhs_mask] |= bit
+        return set((self.decode(lhs_mask), self.decode(rhs_mask)) for lhs_mask, rhs_mask in rhs_dict.items())
+
+    def decode(self, mask: int):
+        return frozenset(self.attr_list[bit.bit_length() - 1] for bit in iterateBits(mask))
+
+
+def discoverRelation(csv_path: str, **options):
+    '''
+    RelationModel con las columnas del archivo CSV y sus dependencias
+    mínimas (ver DependencyDiscovery)
+    '''
+    return DependencyDiscovery(csv_path, **options).relation
+
+
+def runDiscovery(csv_path: str, output_path: str = None, memory_budget_mb: int = None, max_lhs: int = None):
+    '''
+    Descubre las dependencias de csv_path y escribe la relación en
+    output_path (o en la salida estándar) con el formato del archivo Json.
+    Retorna 0, o 1 si el archivo no se pudo procesar
+    '''
+    memory_budget = memory_budget_mb * 2 ** 20 if memory_budget_mb is not None else DEFAULT_MEMORY_BUDGET
+    try:
+        discovery = DependencyDiscovery(csv_path, memory_budget, max_lhs)
+    except (OSError, ValueError) as ex:
+        print(ex, file=sys.stderr)
+        return 1
+    if output_path:
+        discovery.relation.saveAsJson(output_path)
+    else:
+        print(json.dumps(discovery.relation.toDict()))
+    print("{0} filas, {1} columnas, {2} dependencias mínimas".format(discovery.row_num, len(discovery.attr_list),
+                                                                     len(discovery.fd_mask_list)), file=sys.stderr)
+    return 0
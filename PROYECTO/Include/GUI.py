@@ -0,0 +1,305 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from tkinter import *
+from tkinter import ttk
+from tkinter.filedialog import askopenfilename
+
+from Include.Cache import ResultCache
+from Include.Loader import loadRelation
+from Include.Models import (CandidatesKeys, IrreducibleFD, NormalFormsChecker, formatManualRelation,
+                            parseManualRelation)
+
+
+MAX_SHOWN_VIOLATIONS = 10
+POLL_INTERVAL_MS = 100
+PROGRESS_INTERVAL = 0.1
+
+
+def formatViolations(violation_list: list):
+    '''
+    Texto con las dependencias que impiden la forma normal, una por línea
+    '''
+    line_list = [violation.describe() for violation in violation_list[:MAX_SHOWN_VIOLATIONS]]
+    if len(violation_list) > MAX_SHOWN_VIOLATIONS:
+        line_list.append("... y {0} más".format(len(violation_list) - MAX_SHOWN_VIOLATIONS))
+    return "".join("\n" + line for line in line_list)
+
+
+class AnalysisCancelled(Exception):
+    '''
+    El usuario canceló el análisis
+    '''
+
+
+class AnalysisWorker(threading.Thread):
+    '''
+    Hilo que analiza una relación fuera del ciclo de eventos de Tk. No toca
+    la interfaz: deja sus mensajes en message_queue, que la ventana revisa
+    con root.after:
+        ("progress", nivel, conjuntos revisados, tamaño del nivel, llaves)
+        ("done", NormalFormsChecker)
+        ("error", excepción)
+        ("cancelled",)
+    load_relation es una función que retorna la relación; se llama dentro
+    del hilo, así que leer un archivo grande tampoco bloquea la ventana.
+    cancel() pide detener el trabajo: el cálculo de la cobertura mínima y
+    la búsqueda de atributos primos lo notan en su siguiente reporte de
+    progreso (ver CanonicalCover y CandidatesKeys), y el hilo lo revisa
+    además entre etapas. La ventana solo muestra las formas normales, así
+    que las llaves candidatas no se enumeran (lazy).
+    '''
+    def __init__(self, load_relation):
+        super().__init__(daemon=True)
+        self.load_relation = load_relation
+        self.message_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.last_report = 0.0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            relation = self.load_relation()
+            self.checkCancelled()
+            normal_forms = self.analyze(relation)
+            self.checkCancelled()
+            self.message_queue.put(("done", normal_forms))
+        except AnalysisCancelled:
+            self.message_queue.put(("cancelled",))
+        except Exception as ex:
+            self.message_queue.put(("error", ex))
+
+    def analyze(self, relation):
+        '''
+        Analiza la relación con el caché de resultados, o sin él si no se
+        puede abrir. La conexión al caché se abre en este hilo porque una
+        conexión SQLite solo se puede usar en el hilo que la creó. La
+        ventana solo muestra las formas normales, así que las llaves
+        candidatas no se enumeran (lazy_keys)
+        '''
+        try:
+            result_cache = ResultCache()
+        except (OSError, sqlite3.Error):
+            minimal_cover = IrreducibleFD(relation=relation, progress=self.onCoverProgress)
+            self.checkCancelled()
+            candidates_keys = CandidatesKeys(minimal_cover=minimal_cover, progress=self.onProgress, lazy=True)
+            return NormalFormsChecker(candidates_keys=candidates_keys)
+        with result_cache:
+            return result_cache.getNormalForms(relation, progress=self.onProgress, lazy_keys=True,
+                                               cover_progress=self.onCoverProgress)
+
+    def onCoverProgress(self, checked_num: int, total_num: int):
+        self.checkCancelled()
+
+    def onProgress(self, level_num: int, checked_num: int, level_size: int, key_num: int):
+        self.checkCancelled()
+        now = time.monotonic()
+        if now - self.last_report >= PROGRESS_INTERVAL:
+            self.last_report = now
+            self.message_queue.put(("progress", level_num, checked_num, level_size, key_num))
+
+    def checkCancelled(self):
+        if self.cancel_event.is_set():
+            raise AnalysisCancelled()
+
+
+class NormalFormsGUI:
+    def __init__(self):
+        self.root = Tk()
+        self.root.title("Normal Forms")
+        self.mainframe = ttk.Frame(self.root, padding="3 3 12 12")
+        self.mainframe.grid(column=0, row=0, sticky=(N, W, E, S))
+        self.mainframe.columnconfigure(0, weight=1)
+        self.mainframe.rowconfigure(0, weight=1)
+        self.last_init_dir = "C:/Users/Estudiantes/Documents"
+
+        self.file_name = StringVar()
+        self.nf_list = ["2 FN", "3 FN", "BC NF"]
+        self.nf_choice = StringVar()
+        self.message = StringVar()
+        self.input_option = IntVar()
+        self.manual_lset = StringVar()
+        self.manual_tset = StringVar()
+        self.worker = None
+
+        ttk.Label(self.mainframe, text="Choose input option:").grid(column=1, row=1, sticky=W)
+
+        radiobtn_file = ttk.Radiobutton(self.mainframe, text="From File", variable=self.input_option, value=1, command=self.onRadioBtnClic)
+        radiobtn_file.grid(column=1, row=2, columnspan=1, sticky=(W, E))
+
+        radiobtn_manual = ttk.Radiobutton(self.mainframe, text="Manuel Input", variable=self.input_option, value=2, command=self.onRadioBtnClic)
+        radiobtn_manual.grid(column=2, row=2, columnspan=1, sticky=(W, E))
+
+        self.input_option.set(1)
+
+        ttk.Label(self.mainframe, text="From file input:").grid(column=2, row=3, sticky=W)
+
+        file_entry = ttk.Entry(self.mainframe, width=7, textvariable=self.file_name, state="readonly")
+        file_entry.grid(column=2, row=4, columnspan=2, sticky=(W, E))
+        ttk.Label(self.mainframe, text="File name:").grid(column=1, row=4, sticky=W)
+
+        ttk.Label(self.mainframe, text="Manual input:").grid(column=2, row=5, sticky=W)
+
+        ttk.Label(self.mainframe, text="Write L set in this way: ABC->D,BE->F,AB->E. Here we have \nthree functional dependencies. "
+                                       "With multi-character names separate the\nattributes of each side with spaces: customer_id order_id->total").grid(column=1, row=6, columnspan=2, sticky=W)
+        self.manual_entry_lset = ttk.Entry(self.mainframe, width=10, textvariable=self.manual_lset)
+        self.manual_entry_lset.grid(column=1, row=7, columnspan=2, sticky=(W, E))
+
+        ttk.Label(self.mainframe,text="Write T set in this way: ABCDEF. Here we have six attributes.\n"
+                                      "Multi-character names go separated by commas: customer_id, order_id, total").grid(column=1, row=8, columnspan=2, sticky=W)
+        self.manual_entry_tset = ttk.Entry(self.mainframe, width=10, textvariable=self.manual_tset)
+        self.manual_entry_tset.grid(column=1, row=9, columnspan=2, sticky=(W, E))
+
+        fn_entry = OptionMenu(self.mainframe, self.nf_choice, *self.nf_list, command=self.resetMessage)
+        fn_entry.grid(column=2, row=10, columnspan=2, sticky=(W, E))
+        ttk.Label(self.mainframe, text="Choose Normal Form:").grid(column=1, row=10, sticky=W)
+        self.nf_choice.set(self.nf_list[0])
+
+        self.check_btn = ttk.Button(self.mainframe, text="Check", command=self.onCheckClic)
+        self.check_btn.grid(column=1, row=11, sticky=W)
+        self.cancel_btn = ttk.Button(self.mainframe, text="Cancel", command=self.onCancelClic, state=DISABLED)
+        self.cancel_btn.grid(column=2, row=11)
+        self.examine_btn = ttk.Button(self.mainframe, text="Examine", command=self.onExamineClic)
+        self.examine_btn.grid(column=3, row=11, sticky=E)
+
+        self.onRadioBtnClic()
+
+        ttk.Label(self.mainframe, textvariable=self.message).grid(column=1, row=12, columnspan=3, sticky=(W, E))
+
+        for child in self.mainframe.winfo_children():
+            child.grid_configure(padx=15, pady=15)
+
+        file_entry.focus()
+        self.root.bind('<Return>', self.onCheckClic)
+
+        self.root.mainloop()
+
+    def onRadioBtnClic(self):
+        if self.input_option.get() == 1:
+            self.manual_entry_lset.configure(state=DISABLED)
+            self.manual_entry_tset.configure(state=DISABLED)
+        elif self.input_option.get() == 2:
+            self.manual_entry_lset.configure(state=NORMAL)
+            self.manual_entry_tset.configure(state=NORMAL)
+        else:
+            self.input_option.set(1)
+
+    def onCheckClic(self, event=None):
+        if self.worker is not None:
+            return
+        if self.input_option.get() == 1:
+            file_name = self.file_name.get()
+            if not file_name:
+                self.message.set("Not file found")
+                return
+            self.startAnalysis(lambda: loadRelation(file_name))
+        elif self.input_option.get() == 2:
+            if not self.manual_lset.get():
+                self.message.set("Debe ingresar información válida en la caja de L set.")
+                return
+            if not self.manual_tset.get():
+                self.message.set("Debe ingresar información válida en la caja de T set.")
+                return
+            try:
+                relation = parseManualRelation(self.manual_tset.get(), self.manual_lset.get())
+            except ValueError as ex:
+                self.message.set(str(ex))
+                return
+            except Exception:
+                self.message.set("Debe ingresar información válida en la caja de L set y T set.")
+                return
+            self.startAnalysis(lambda: relation)
+        else:
+            self.input_option.set(1)
+            self.onRadioBtnClic()
+
+    def startAnalysis(self, load_relation):
+        '''
+        Inicia el análisis en un AnalysisWorker y revisa sus mensajes cada
+        POLL_INTERVAL_MS milisegundos, de modo que la ventana sigue
+        respondiendo mientras tanto
+        '''
+        self.worker = AnalysisWorker(load_relation)
+        self.check_btn.configure(state=DISABLED)
+        self.cancel_btn.configure(state=NORMAL)
+        self.message.set("Analizando...")
+        self.worker.start()
+        self.root.after(POLL_INTERVAL_MS, self.pollWorker)
+
+    def pollWorker(self):
+        while True:
+            try:
+                message = self.worker.message_queue.get_nowait()
+            except queue.Empty:
+                self.root.after(POLL_INTERVAL_MS, self.pollWorker)
+                return
+            if message[0] == "progress":
+                if not self.worker.cancel_event.is_set():
+                    self.message.set("Buscando llaves candidatas: nivel {0}, {1} de {2} conjuntos, "
+                                     "{3} llaves encontradas".format(*message[1:]))
+                continue
+            if message[0] == "done":
+                self.showResult(message[1])
+            elif message[0] == "error":
+                self.message.set("It was not possible to open the file " + str(message[1]))
+            else:
+                self.message.set("Análisis cancelado")
+            self.worker = None
+            self.check_btn.configure(state=NORMAL)
+            self.cancel_btn.configure(state=DISABLED)
+            return
+
+    def onCancelClic(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.message.set("Cancelando...")
+
+    def showResult(self, normal_forms: NormalFormsChecker):
+        if self.nf_choice.get() == self.nf_list[0]:
+            if normal_forms.is_2nf:
+                self.message.set("Está en 2 Forma Normal")
+            else:
+                self.message.set("NO Está en 2 Forma Normal" +
+                                 formatViolations(normal_forms.violations_2nf))
+        elif self.nf_choice.get() == self.nf_list[1]:
+            if normal_forms.is_3nf:
+                self.message.set("Está en 3 Forma Normal")
+            else:
+                self.message.set("NO Está en 3 Forma Normal" +
+                                 formatViolations(normal_forms.violations_2nf + normal_forms.violations_3nf))
+        elif self.nf_choice.get() == self.nf_list[2]:
+            if normal_forms.is_bc_nf:
+                self.message.set("Está en Boyce-Codd Forma Normal")
+            else:
+                self.message.set("NO Está en Boyce-Codd Forma Normal" +
+                                 formatViolations(normal_forms.violations))
+        else:
+            self.message.set("Not a valid normal form")
+
+    def onExamineClic(self):
+        file_name = askopenfilename(initialdir=self.last_init_dir,
+                           filetypes =(("JSONFile", "*.json"),("All Files","*.*")),
+                           title = "Choose a file.")
+        self.last_init_dir = os.path.split(file_name)[0]
+        if self.input_option.get() == 1:
+            self.file_name.set(file_name)
+        elif self.input_option.get() == 2:
+            try:
+                relation = loadRelation(file_name)
+                t_text, l_text = formatManualRelation(relation)
+                self.manual_tset.set(t_text)
+                self.manual_lset.set(l_text)
+            except Exception:
+                self.message.set("El archivo no continue información válida")
+        else:
+            self.input_option.set(1)
+            self.onRadioBtnClic()
+
+
+
+    def resetMessage(self, value):
+        self.message.set("")
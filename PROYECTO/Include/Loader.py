@@ -0,0 +1,255 @@
+import json
+import os
+import sys
+
+from Include.Binary import BinaryCorpus
+from Include.Models import RelationModel, toAttributeSet
+
+READ_CHUNK_SIZE = 1 << 16
+
+
+class RelationLoadError(ValueError):
+    '''
+    Error al leer una relación. source indica el archivo y la posición
+    (línea o índice) de la relación que lo produjo
+    '''
+    def __init__(self, message: str, source: str = None):
+        self.source = source
+        super().__init__("{0}: {1}".format(source, message) if source else message)
+
+
+class RelationSyntaxError(RelationLoadError):
+    '''
+    El texto no es Json válido
+    '''
+
+
+class RelationSchemaError(RelationLoadError):
+    '''
+    El Json no tiene la forma de una relación: faltan "t_set" o "l_set", o
+    sus elementos no son del tipo esperado
+    '''
+
+
+class UnknownAttributeError(RelationSchemaError):
+    '''
+    Una dependencia de "l_set" usa un atributo que no está en "t_set"
+    '''
+
+
+def parseRelation(data, source: str = None):
+    '''
+    Construye un RelationModel a partir del diccionario data de un archivo
+    Json. Los tipos y los atributos de cada dependencia se validan en la
+    misma pasada en que se construyen los frozensets de L. Lanza
+    RelationSchemaError o UnknownAttributeError
+    '''
+    if not isinstance(data, dict):
+        raise RelationSchemaError("Una relación debe ser un objeto Json con \"t_set\" y \"l_set\"", source)
+    if "t_set" not in data:
+        raise RelationSchemaError('No se encontró conjunto T en el archivo Json. "t_set"', source)
+    if "l_set" not in data:
+        raise RelationSchemaError('No se encontró conjunto L en el archivo Json. "l_set"', source)
+    t_data = data["t_set"]
+    if isinstance(t_data, str):
+        t_set = set(t_data)
+    elif isinstance(t_data, list) and all(isinstance(attr, str) and attr for attr in t_data):
+        t_set = set(t_data)
+    else:
+        raise RelationSchemaError('"t_set" debe ser una lista de nombres de atributos', source)
+    l_data = data["l_set"]
+    if not isinstance(l_data, list):
+        raise RelationSchemaError('"l_set" debe ser una lista de dependencias', source)
+    l_set = set()
+    for index, element in enumerate(l_data):
+        if not isinstance(element, list) or len(element) != 2:
+            raise RelationSchemaError("La dependencia {0} de \"l_set\" debe ser un par [lado izquierdo, lado derecho]"
+                                      .format(index), source)
+        func_dep = []
+        for side in element:
+            if not isinstance(side, str) and not (isinstance(side, list) and all(isinstance(attr, str) for attr in side)):
+                raise RelationSchemaError("Los lados de la dependencia {0} deben ser cadenas o listas de nombres"
+                                          .format(index), source)
+            attr_set = toAttributeSet(side, t_set)
+            if not attr_set <= t_set:
+                raise UnknownAttributeError("La dependencia {0} usa atributos que no están en T: {1}"
+                                            .format(index, ", ".join(sorted(attr_set - t_set))), source)
+            func_dep.append(attr_set)
+        l_set.add(tuple(func_dep))
+    relation = RelationModel()
+    relation.t_set = t_set
+    relation.l_set = l_set
+    return relation
+
+
+def iterateJsonLines(file, source: str):
+    '''
+    Generador de pares (origen, valor) de un archivo JSONL, una relación por
+    línea. Una línea inválida entrega un RelationSyntaxError y la lectura
+    continúa con la siguiente
+    '''
+    for line_num, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        name = "{0}:{1}".format(source, line_num)
+        try:
+            yield name, json.loads(line)
+        except ValueError as ex:
+            yield name, RelationSyntaxError(str(ex), name)
+
+
+def iterateJsonValues(file, source: str, chunk_size: int = READ_CHUNK_SIZE):
+    '''
+    Generador de pares (origen, valor) de un archivo Json, leído por bloques
+    de chunk_size caracteres. El archivo puede tener un objeto, varios
+    objetos seguidos o un arreglo de objetos; los elementos de un arreglo
+    se entregan uno por uno, sin cargar el arreglo completo. Un error de
+    sintaxis termina la lectura del archivo
+    '''
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    is_eof = False
+    in_array = False
+    array_len = 0
+    value_index = 0
+
+    def skipSpaces():
+        nonlocal buffer, position, is_eof
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or is_eof:
+                return
+            buffer = file.read(chunk_size)
+            position = 0
+            is_eof = not buffer
+
+    while True:
+        skipSpaces()
+        if position >= len(buffer):
+            if in_array:
+                yield source, RelationSyntaxError("El arreglo Json no se cerró", source)
+            return
+        if in_array:
+            if buffer[position] == "]":
+                in_array = False
+                position += 1
+                continue
+            if array_len:
+                if buffer[position] != ",":
+                    yield source, RelationSyntaxError("Se esperaba ',' entre los elementos del arreglo", source)
+                    return
+                position += 1
+                skipSpaces()
+            name = "{0}[{1}]".format(source, array_len)
+        elif buffer[position] == "[" and not value_index:
+            in_array = True
+            position += 1
+            continue
+        else:
+            name = "{0}[{1}]".format(source, value_index) if value_index else source
+        read_size = chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                break
+            except ValueError as ex:
+                if is_eof:
+                    yield name, RelationSyntaxError(str(ex), name)
+                    return
+                chunk = file.read(read_size)
+                read_size *= 2
+                buffer = buffer[position:] + chunk
+                position = 0
+                is_eof = not chunk
+        position = end
+        if in_array:
+            array_len += 1
+        else:
+            value_index += 1
+        yield name, value
+        if position > chunk_size:
+            buffer = buffer[position:]
+            position = 0
+
+
+def iterateRelationRecords(path: str):
+    '''
+    Generador de pares (origen, relación) del archivo path: ".jsonl" se lee
+    por líneas y cualquier otro archivo como Json (ver iterateJsonValues);
+    "-" lee JSONL desde la entrada estándar, y ".relb" es el formato binario
+    de Include.Binary, cuyas relaciones se entregan como BinaryRelation.
+    Cuando una relación no se puede leer, en lugar del RelationModel se
+    entrega el RelationLoadError, de modo que quien consume puede
+    reportarlo y seguir con las demás
+    '''
+    if path == "-":
+        for name, value in iterateJsonLines(sys.stdin, "<stdin>"):
+            yield name, toRelation(name, value)
+        return
+    if os.path.splitext(path)[1] == ".relb":
+        yield from iterateBinaryRelations(path)
+        return
+    try:
+        file = open(path)
+    except OSError as ex:
+        yield path, RelationLoadError(str(ex), path)
+        return
+    with file:
+        if os.path.splitext(path)[1] == ".jsonl":
+            value_iter = iterateJsonLines(file, path)
+        else:
+            value_iter = iterateJsonValues(file, path)
+        for name, value in value_iter:
+            yield name, toRelation(name, value)
+
+
+def iterateBinaryRelations(path: str):
+    try:
+        corpus = BinaryCorpus(path)
+    except (OSError, ValueError) as ex:
+        yield path, RelationLoadError(str(ex), path)
+        return
+    with corpus:
+        for index in range(len(corpus)):
+            name = "{0}[{1}]".format(path, index)
+            try:
+                yield name, corpus[index]
+            except ValueError as ex:
+                yield name, RelationLoadError(str(ex), name)
+
+
+def toRelation(name: str, value):
+    if isinstance(value, RelationLoadError):
+        return value
+    try:
+        return parseRelation(value, name)
+    except RelationLoadError as ex:
+        return ex
+
+
+def iterateRelations(path: str):
+    '''
+    Generador de las relaciones del archivo path. Lanza el primer
+    RelationLoadError que encuentre
+    '''
+    for _, relation in iterateRelationRecords(path):
+        if isinstance(relation, RelationLoadError):
+            raise relation
+        yield relation
+
+
+def loadRelation(path: str):
+    '''
+    Lee la única relación del archivo Json path. Lanza RelationLoadError si
+    el archivo no se puede leer, no es válido o no tiene exactamente una
+    relación
+    '''
+    relation_iter = iterateRelations(path)
+    relation = next(relation_iter, None)
+    if relation is None:
+        raise RelationSchemaError("El archivo no contiene ninguna relación", path)
+    if next(relation_iter, None) is not None:
+        raise RelationSchemaError("El archivo contiene más de una relación", path)
+    return relation
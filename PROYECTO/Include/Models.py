@@ -1,11 +1,50 @@
+import collections
+import concurrent.futures
 import json
 import itertools
-import threading
+import re
 import time
-from tkinter import *
-from tkinter import ttk
-from tkinter.filedialog import askopenfilename
-import os
+
+from Include import Profiling
+
+def toAttributeSet(attrs, t_set=None):
+    '''
+    Convierte un conjunto de atributos (por ejemplo un lado de una
+    dependencia funcional) en un frozenset con los nombres de los atributos.
+    attrs: lista de nombres, o cadena.
+    t_set: nombres de atributos conocidos.
+
+    Una cadena que es por sí misma un atributo de t_set se toma como
+    un solo nombre ("customer_id"); cualquier otra cadena se toma en el
+    formato original de atributos de un carácter ("ABC" -> A, B, C).
+    '''
+    if isinstance(attrs, str):
+        if t_set is not None and attrs in t_set:
+            return frozenset((attrs,))
+        return frozenset(attrs)
+    return frozenset(attrs)
+
+
+def attributesToJson(attrs):
+    '''
+    Convierte un conjunto de atributos al formato del archivo Json: una
+    cadena si todos los atributos son de un carácter (formato original)
+    o una lista ordenada de nombres en otro caso
+    '''
+    if all(len(attr) == 1 for attr in attrs):
+        return ''.join(sorted(attrs))
+    return sorted(attrs)
+
+
+def attributesToStr(attrs):
+    '''
+    Retorna la representación de un conjunto de atributos para mostrar
+    al usuario: "ABC" para atributos de un carácter, "a b c" en otro caso
+    '''
+    if all(len(attr) == 1 for attr in attrs):
+        return ''.join(sorted(attrs))
+    return ' '.join(sorted(attrs))
+
 
 class RelationModel:
     '''
@@ -14,33 +53,43 @@ class RelationModel:
     Donde R: es la relacion
     T: es el conjunto de atributos
     L: es el conjunto de dependencias funcionales
+
+    Los atributos son nombres de uno o más caracteres. Cada dependencia
+    de L es una tupla (lado izquierdo, lado derecho) de frozensets de nombres.
     '''
     def __init__(self):
         self.t_set = set()
         self.l_set = set()
 
+    def toDict(self):
+        '''
+        Diccionario con el formato del archivo Json
+        '''
+        return {"t_set": sorted(self.t_set),
+                "l_set": [[attributesToJson(side) for side in element] for element in self.l_set]}
+
     def saveAsJson(self, json_path: str):
-        self.l_set = list(self.l_set)
-        self.t_set = list(self.t_set)
-        json_string = json.dumps(self.__dict__)
+        json_string = json.dumps(self.toDict())
         with open(json_path, "w") as file:
             file.write(json_string)
-        self.__convertListToSets()
 
-    def loadSetsFromJson(self, data: dict):
-        if "t_set" in data.keys():
-            self.t_set = data["t_set"]
-        else:
-            raise Exception('No se encontró conjunto T en el archivo Json. "t_set"')
-        if "l_set" in data.keys():
-            self.l_set = data["l_set"]
-        else:
-            raise Exception('No se encontró conjunto L en el archivo Json. "l_set"')
-        self.__convertListToSets()
+    def saveAsBinary(self, binary_path: str):
+        '''
+        Guarda la relación en el formato binario de Include.Binary
+        '''
+        from Include.Binary import BinaryWriter
+        with BinaryWriter(binary_path) as writer:
+            writer.write(self)
 
-    def __convertListToSets(self):
-        self.t_set = set(self.t_set)
-        self.l_set = set(tuple(element) for element in self.l_set)
+    def loadSetsFromJson(self, data: dict):
+        '''
+        Toma T y L del diccionario data de un archivo Json, validándolos
+        con Include.Loader.parseRelation (lanza RelationLoadError)
+        '''
+        from Include.Loader import parseRelation
+        relation = parseRelation(data)
+        self.t_set = relation.t_set
+        self.l_set = relation.l_set
 
 
 def calculateAttributeClosure(attr: str, L: set):
@@ -75,166 +124,791 @@ def calculateAttributeClosure2(attr: str, L: set):
 
     Retorna un conjunto con todos los atributos del cierre de attr
     '''
-    l_set = L.copy()
-    is_closure_changed = True
-    current_closure = set(attr)
-    while is_closure_changed:
-        is_closure_changed = False
-        for element in l_set.copy():
-            if current_closure.issuperset(element[0]):
-                is_closure_changed = True
-                for character in element[1]:
-                    current_closure.add(character)
-                l_set.discard(element)
-    return current_closure
+    return AttributeClosure(L).calculate(attr)
+
+
+class AttributeTable:
+    '''
+    Esta clase interna los atributos de una relación: a cada
+    atributo le asigna una posición de bit, de modo que un conjunto
+    de atributos se representa como un entero (máscara de bits) y una
+    dependencia funcional como un par de máscaras (lado izquierdo,
+    lado derecho). Así la unión, la intersección y las pruebas de
+    subconjunto son operaciones enteras.
+    '''
+    def __init__(self, attributes=()):
+        self.attr_list = []
+        self.bit_dict = {}
+        for attr in sorted(attributes):
+            self.intern(attr)
+
+    def intern(self, attr: str):
+        '''
+        Retorna la posición de bit de attr, asignándole una nueva si
+        el atributo aún no está en la tabla
+        '''
+        if attr not in self.bit_dict:
+            self.bit_dict[attr] = len(self.attr_list)
+            self.attr_list.append(attr)
+        return self.bit_dict[attr]
+
+    def encode(self, attrs):
+        '''
+        Convierte un conjunto de atributos en su máscara de bits.
+        attrs se interpreta como en toAttributeSet
+        '''
+        mask = 0
+        for attr in toAttributeSet(attrs, self.bit_dict):
+            mask |= 1 << self.intern(attr)
+        return mask
+
+    def decode(self, mask: int):
+        '''
+        Convierte una máscara de bits en el conjunto de sus atributos
+        '''
+        attr_set = set()
+        while mask:
+            low_bit = mask & -mask
+            attr_set.add(self.attr_list[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return attr_set
+
+    def decodeFrozen(self, mask: int):
+        '''
+        Convierte una máscara de bits en el frozenset de sus atributos,
+        que es la forma pública de llaves y lados de las DF
+        '''
+        return frozenset(self.decode(mask))
+
+    def encodeFD(self, func_dep: tuple):
+        return self.encode(func_dep[0]), self.encode(func_dep[1])
+
+    def decodeFD(self, fd_mask: tuple):
+        return self.decodeFrozen(fd_mask[0]), self.decodeFrozen(fd_mask[1])
+
+    def encodeFDs(self, L: set):
+        return [self.encodeFD(element) for element in L]
+
+    def decodeFDs(self, fd_mask_list):
+        return set(self.decodeFD(fd_mask) for fd_mask in fd_mask_list)
+
+
+def iterateBits(mask: int):
+    '''
+    Recorre, uno a uno, los bits encendidos de mask como máscaras de un solo bit
+    '''
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit
+        mask ^= low_bit
+
+
+CLOSURE_CACHE_SIZE = 65536
+
+
+class AttributeClosure:
+    '''
+    Esta clase compila una sola vez el conjunto de dependencias
+    funcionales L para calcular cierres por medio del algoritmo
+    LinClosure: cada dependencia lleva un contador con los atributos
+    de su lado izquierdo que faltan por alcanzar, y un índice
+    atributo -> dependencias permite decrementar solo los contadores
+    afectados. Cada cierre cuesta O(|L|) en lugar de O(|L|²).
+
+    Las dependencias se guardan como pares de máscaras de bits de
+    attr_table; si no se entrega una tabla se crea una nueva.
+
+    Los cierres calculados se guardan en un caché LRU de a lo sumo
+    cache_size entradas (0 lo desactiva). La llave del caché es la máscara
+    del conjunto de atributos, de modo que "AB" y "BA" comparten entrada.
+    El caché se vacía cuando se compila otro conjunto de dependencias.
+    '''
+    def __init__(self, L: set, attr_table: AttributeTable = None, cache_size: int = None):
+        self.attr_table = attr_table if attr_table is not None else AttributeTable()
+        self.cache_size = CLOSURE_CACHE_SIZE if cache_size is None else cache_size
+        self.cache = collections.OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.compileFDMasks(self.attr_table.encodeFDs(L))
+
+    @classmethod
+    def fromFDMasks(cls, fd_mask_list, cache_size: int = None):
+        '''
+        Crea el motor directamente a partir de dependencias ya codificadas
+        como pares de máscaras (por ejemplo en un proceso trabajador)
+        '''
+        closure_engine = cls(set(), cache_size=cache_size)
+        closure_engine.compileFDMasks(fd_mask_list)
+        return closure_engine
+
+    def compileFDMasks(self, fd_mask_list, keep_cache: bool = False):
+        '''
+        Compila el conjunto de dependencias fd_mask_list. El caché solo se
+        conserva con keep_cache, cuando el nuevo conjunto es equivalente al
+        anterior y por tanto tiene los mismos cierres.
+        '''
+        if not keep_cache:
+            self.cache.clear()
+        self.fd_mask_list = list(fd_mask_list)
+        self.lhs_len_list = []
+        self.rhs_list = []
+        self.attr_index = {}
+        self.empty_lhs_rhs = 0
+        for lhs_mask, rhs_mask in self.fd_mask_list:
+            fd_index = len(self.rhs_list)
+            self.lhs_len_list.append(bin(lhs_mask).count("1"))
+            self.rhs_list.append(rhs_mask)
+            if not lhs_mask:
+                self.empty_lhs_rhs |= rhs_mask
+            for bit in iterateBits(lhs_mask):
+                self.attr_index.setdefault(bit, []).append(fd_index)
+
+    def calculateMask(self, mask: int):
+        '''
+        Retorna la máscara de bits del cierre de la máscara mask
+        '''
+        if self.cache_size:
+            current_closure = self.cache.get(mask)
+            if current_closure is not None:
+                self.cache_hits += 1
+                self.cache.move_to_end(mask)
+                return current_closure
+            self.cache_misses += 1
+            current_closure = self.__linClosure(mask)
+            if Profiling.active_stats is not None:
+                Profiling.active_stats.countClosure(current_closure)
+            self.cache[mask] = current_closure
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return current_closure
+        current_closure = self.__linClosure(mask)
+        if Profiling.active_stats is not None:
+            Profiling.active_stats.countClosure(current_closure)
+        return current_closure
+
+    def discardClosures(self, attr_mask: int):
+        '''
+        Quita del caché los cierres que contienen a attr_mask. Al agregar o
+        quitar una dependencia X -> Y solo pueden cambiar los cierres que
+        contienen a X; los demás siguen valiendo para el nuevo conjunto
+        '''
+        for mask, current_closure in list(self.cache.items()):
+            if not attr_mask & ~current_closure:
+                del self.cache[mask]
+
+    def getCacheStats(self):
+        return {"hits": self.cache_hits, "misses": self.cache_misses,
+                "size": len(self.cache), "max_size": self.cache_size}
+
+    def impliesMask(self, lhs_mask: int, rhs_mask: int):
+        '''
+        Indica si la dependencia lhs_mask -> rhs_mask se deduce del conjunto
+        compilado. El cierre se detiene en cuanto contiene a rhs_mask; por
+        ser parcial no se guarda en el caché, pero la consulta cuenta como
+        acierto o fallo igual que en calculateMask
+        '''
+        if self.cache_size:
+            current_closure = self.cache.get(lhs_mask)
+            if current_closure is not None:
+                self.cache_hits += 1
+                self.cache.move_to_end(lhs_mask)
+                return not rhs_mask & ~current_closure
+            self.cache_misses += 1
+        current_closure = self.__linClosure(lhs_mask, rhs_mask)
+        if Profiling.active_stats is not None:
+            Profiling.active_stats.countClosure(current_closure)
+        return not rhs_mask & ~current_closure
+
+    def __linClosure(self, mask: int, target_mask: int = 0):
+        '''
+        Cierre de mask por LinClosure. Con target_mask el cálculo se detiene
+        (con un cierre parcial) en cuanto el cierre contiene a target_mask
+        '''
+        counter_list = self.lhs_len_list[:]
+        current_closure = mask | self.empty_lhs_rhs
+        if target_mask and not target_mask & ~current_closure:
+            return current_closure
+        pending = current_closure
+        while pending:
+            bit = pending & -pending
+            pending ^= bit
+            for fd_index in self.attr_index.get(bit, ()):
+                counter_list[fd_index] -= 1
+                if counter_list[fd_index] == 0:
+                    new_attrs = self.rhs_list[fd_index] & ~current_closure
+                    if new_attrs:
+                        current_closure |= new_attrs
+                        pending |= new_attrs
+                        if target_mask and not target_mask & ~current_closure:
+                            return current_closure
+        return current_closure
+
+    def calculate(self, attr: str):
+        '''
+        Retorna un conjunto con todos los atributos del cierre de attr
+        '''
+        return self.attr_table.decode(self.calculateMask(self.attr_table.encode(attr)))
+
+
+class CanonicalCover:
+    '''
+    Esta clase calcula la cobertura mínima de un conjunto de dependencias
+    codificadas como pares de máscaras, en tres fases cuyo tiempo queda en
+    phase_times:
+
+    split: separa los lados derechos en atributos individuales, quitando
+        los triviales, y agrupa las dependencias por lado izquierdo.
+    left: elimina los atributos extraños de los lados izquierdos. Todas
+        las pruebas usan closure_engine, compilado una vez con un conjunto
+        equivalente a L; las dependencias con el mismo lado izquierdo
+        comparten cada cierre, y su caché evita repetir cierres entre grupos.
+    redundant: elimina las dependencias que se deducen de las demás. Se
+        compila un solo índice LinClosure en el que cada dependencia se puede
+        ignorar o desactivar, y cada prueba se detiene en cuanto el cierre
+        alcanza el atributo buscado, sin volver a compilar el conjunto. Una
+        dependencia X -> A solo puede ser redundante si otra dependencia
+        activa W -> A tiene W dentro del cierre de X; si no hay ninguna, la
+        prueba se omite.
+
+    Si no se entrega closure_engine, se crea uno con el resultado de split.
+    Al terminar, closure_engine se compila con la cobertura mínima
+    conservando su caché, pues ambos conjuntos son equivalentes. Con
+    keep_cache se conserva desde el inicio: los cierres guardados deben ser
+    los del conjunto que se va a reducir.
+
+    fixed_fd_masks: dependencias que ya son irreducibles y no redundantes
+    entre ellas (por ejemplo, parte de una cobertura mínima anterior).
+    Participan en los cierres, pero no se reducen, y solo se revisa si son
+    redundantes cuando el lado izquierdo de alguna de las demás
+    dependencias está en el cierre de su lado izquierdo: si no, ninguna de
+    las demás interviene en ese cierre.
+
+    progress: función progress(dependencias revisadas, total) que las fases
+    left y redundant llaman cada PROGRESS_BLOCK_SIZE dependencias. Si lanza
+    una excepción, el cálculo se detiene.
+    '''
+    def __init__(self, fd_mask_list, closure_engine: AttributeClosure = None, progress=None,
+                 fixed_fd_masks=(), keep_cache: bool = False):
+        self.phase_times = {}
+        self.progress = progress
+        start = time.perf_counter()
+        group_dict = self.__splitRight(fd_mask_list)
+        fixed_dict = self.__splitRight(fixed_fd_masks)
+        self.phase_times["split"] = time.perf_counter() - start
+        compiled_list = list(group_dict.items()) + list(fixed_dict.items())
+        if closure_engine is None:
+            closure_engine = AttributeClosure.fromFDMasks(compiled_list)
+        else:
+            closure_engine.compileFDMasks(compiled_list, keep_cache)
+        self.closure_engine = closure_engine
+
+        start = time.perf_counter()
+        group_dict = self.__deleteExtraneousAttributes(group_dict)
+        self.phase_times["left"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fixed_set = set()
+        for lhs_mask, rhs_mask in fixed_dict.items():
+            for bit in iterateBits(rhs_mask & ~group_dict.get(lhs_mask, 0)):
+                fixed_set.add((lhs_mask, bit))
+        fd_list = list(fixed_set)
+        for lhs_mask, rhs_mask in group_dict.items():
+            for bit in iterateBits(rhs_mask):
+                fd_list.append((lhs_mask, bit))
+        fd_list.sort()
+        self.fd_mask_list = self.__deleteRedundantFD(fd_list, fixed_set, list(group_dict))
+        self.phase_times["redundant"] = time.perf_counter() - start
+        Profiling.addStageTimes("cover.", self.phase_times)
+        self.closure_engine.compileFDMasks(self.fd_mask_list, keep_cache=True)
+
+    def __splitRight(self, fd_mask_list):
+        group_dict = {}
+        for lhs_mask, rhs_mask in fd_mask_list:
+            rhs_mask &= ~lhs_mask
+            if rhs_mask:
+                group_dict[lhs_mask] = group_dict.get(lhs_mask, 0) | rhs_mask
+        return group_dict
+
+    def __deleteExtraneousAttributes(self, group_dict: dict):
+        '''
+        Para cada grupo X -> Y prueba quitar, de menor a mayor, cada atributo
+        b de X: los atributos de Y que están en el cierre de X - b pasan a
+        depender de X - b, que se sigue reduciendo; los demás se quedan en X.
+        Un lado izquierdo de un solo atributo no se reduce.
+        '''
+        reduced_dict = {}
+        pending_list = list(group_dict.items())
+        done_num = 0
+        while pending_list:
+            if self.progress is not None and done_num % PROGRESS_BLOCK_SIZE == 0:
+                self.progress(done_num, done_num + len(pending_list))
+            done_num += 1
+            lhs_mask, rhs_mask = pending_list.pop()
+            if lhs_mask & (lhs_mask - 1):
+                for bit in iterateBits(lhs_mask):
+                    moved_mask = rhs_mask & self.closure_engine.calculateMask(lhs_mask & ~bit)
+                    if moved_mask:
+                        pending_list.append((lhs_mask & ~bit, moved_mask))
+                        rhs_mask &= ~moved_mask
+                        if not rhs_mask:
+                            break
+            if rhs_mask:
+                reduced_dict[lhs_mask] = reduced_dict.get(lhs_mask, 0) | rhs_mask
+        return reduced_dict
+
+    def __deleteRedundantFD(self, fd_list: list, fixed_set: set, changed_lhs_list: list):
+        lhs_len_list = []
+        rhs_list = []
+        attr_index = {}
+        empty_lhs_list = []
+        rhs_index = {}
+        for fd_index, (lhs_mask, rhs_mask) in enumerate(fd_list):
+            lhs_len_list.append(bin(lhs_mask).count("1"))
+            rhs_list.append(rhs_mask)
+            rhs_index.setdefault(rhs_mask, []).append(fd_index)
+            if not lhs_mask:
+                empty_lhs_list.append(fd_index)
+            for bit in iterateBits(lhs_mask):
+                attr_index.setdefault(bit, []).append(fd_index)
+        active_list = [True] * len(fd_list)
+        test_num = 0
+        for fd_index, (lhs_mask, rhs_mask) in enumerate(fd_list):
+            if self.progress is not None and fd_index % PROGRESS_BLOCK_SIZE == 0:
+                self.progress(fd_index, len(fd_list))
+            other_list = [other_index for other_index in rhs_index[rhs_mask]
+                          if other_index != fd_index and active_list[other_index]]
+            if not other_list:
+                continue
+            closure_mask = self.closure_engine.calculateMask(lhs_mask)
+            if all(fd_list[other_index][0] & ~closure_mask for other_index in other_list):
+                continue
+            if (lhs_mask, rhs_mask) in fixed_set and all(other_mask & ~closure_mask
+                                                         for other_mask in changed_lhs_list):
+                continue
+            test_num += 1
+            active_list[fd_index] = False
+            counter_list = lhs_len_list[:]
+            current_closure = lhs_mask
+            for empty_index in empty_lhs_list:
+                if active_list[empty_index]:
+                    current_closure |= rhs_list[empty_index]
+            is_redundant = bool(current_closure & rhs_mask)
+            pending = current_closure
+            while pending and not is_redundant:
+                bit = pending & -pending
+                pending ^= bit
+                for other_index in attr_index.get(bit, ()):
+                    counter_list[other_index] -= 1
+                    if counter_list[other_index] == 0 and active_list[other_index]:
+                        new_attrs = rhs_list[other_index] & ~current_closure
+                        if new_attrs & rhs_mask:
+                            is_redundant = True
+                            break
+                        current_closure |= new_attrs
+                        pending |= new_attrs
+            active_list[fd_index] = not is_redundant
+        Profiling.count("redundancy_tests", test_num)
+        return [fd_mask for fd_mask, is_active in zip(fd_list, active_list) if is_active]
+
+
+def compileFDSet(L, attr_table: AttributeTable = None):
+    '''
+    Retorna el motor de cierres del conjunto de dependencias L. Si L ya es
+    un AttributeClosure se usa tal cual, de modo que varias consultas sobre
+    el mismo conjunto comparten un solo índice compilado y su caché
+    '''
+    if isinstance(L, AttributeClosure):
+        return L
+    return AttributeClosure(L, attr_table)
+
+
+def iterateNotImpliedMasks(closure_engine: AttributeClosure, fd_mask_list):
+    '''
+    Generador de las dependencias de fd_mask_list (en su orden) que no se
+    deducen del conjunto compilado en closure_engine. Cada prueba usa un
+    cierre del caché del motor si lo hay, o un cierre que se detiene en
+    cuanto alcanza el lado derecho; quien solo necesita saber si todas se
+    deducen puede detenerse en la primera
+    '''
+    for lhs_mask, rhs_mask in fd_mask_list:
+        if not closure_engine.impliesMask(lhs_mask, rhs_mask):
+            yield lhs_mask, rhs_mask
+
+
+def implies(L, func_dep: tuple):
+    '''
+    Indica si la dependencia func_dep = (lado izquierdo, lado derecho) se
+    deduce del conjunto L (conjunto de dependencias o AttributeClosure). El
+    cierre se detiene en cuanto alcanza el lado derecho
+    '''
+    closure_engine = compileFDSet(L)
+    return closure_engine.impliesMask(*closure_engine.attr_table.encodeFD(func_dep))
+
+
+def impliesAll(L, fd_iter):
+    '''
+    Indica si todas las dependencias de fd_iter se deducen de L. Se detiene
+    en la primera que no se deduce
+    '''
+    closure_engine = compileFDSet(L)
+    fd_mask_iter = (closure_engine.attr_table.encodeFD(func_dep) for func_dep in fd_iter)
+    for _ in iterateNotImpliedMasks(closure_engine, fd_mask_iter):
+        return False
+    return True
+
+
+def notImplied(L, fd_iter):
+    '''
+    Lista de las dependencias de fd_iter que no se deducen de L
+    '''
+    closure_engine = compileFDSet(L)
+    fd_mask_list = [closure_engine.attr_table.encodeFD(func_dep) for func_dep in fd_iter]
+    return [closure_engine.attr_table.decodeFD(fd_mask)
+            for fd_mask in iterateNotImpliedMasks(closure_engine, fd_mask_list)]
+
+
+def equivalent(L1, L2):
+    '''
+    Indica si los conjuntos de dependencias L1 y L2 tienen el mismo cierre:
+    cada uno deduce todas las dependencias del otro. Ambos se codifican con
+    la misma tabla de atributos y se compilan una sola vez
+    '''
+    attr_table = AttributeTable()
+    first_engine = AttributeClosure(L1, attr_table)
+    second_engine = AttributeClosure(L2, attr_table)
+    for _ in iterateNotImpliedMasks(first_engine, second_engine.fd_mask_list):
+        return False
+    for _ in iterateNotImpliedMasks(second_engine, first_engine.fd_mask_list):
+        return False
+    return True
+
+
+class EquivalenceResult:
+    '''
+    Resultado de IrreducibleFD.checkEquivalence. missing_fd es la primera
+    dependencia que un conjunto no deduce del otro, y missing_from indica
+    cuál conjunto no la deduce ("ingresado" o "solución")
+    '''
+    def __init__(self, is_equivalent: bool, is_minimal_cover: bool, missing_fd: tuple = None,
+                 missing_from: str = None):
+        self.is_equivalent = is_equivalent
+        self.is_minimal_cover = is_minimal_cover
+        self.missing_fd = missing_fd
+        self.missing_from = missing_from
+
+    def __bool__(self):
+        return self.is_equivalent and self.is_minimal_cover
+
+    @property
+    def message(self):
+        if self.missing_fd is not None:
+            func_dep = "{0}->{1}".format(attributesToStr(self.missing_fd[0]), attributesToStr(self.missing_fd[1]))
+            if self.missing_from == "ingresado":
+                return "El conjunto L ingresado no genera al conjunto L de nuestra solución ({0})".format(func_dep)
+            return "El conjunto L de nuestra solución no genera al conjunto L ingresado ({0})".format(func_dep)
+        if not self.is_minimal_cover:
+            return "Son equivalentes, pero el conjunto L no es una covertura mínima"
+        return "Si son dependencias funcionales equivalentes"
 
 
 class IrreducibleFD:
     '''
-    Esta clase calcula el conjunto de cobertura minima de las dependencias funcionales
+    Esta clase calcula el conjunto de cobertura minima de las dependencias funcionales.
+    La relación se lee del archivo json_path, o se recibe ya construida en relation.
+    cover_fd_masks: cobertura mínima ya calculada, como pares de máscaras de
+    AttributeTable(T) (por ejemplo, leída de un archivo binario); se usa sin
+    volver a calcularla.
+    fd_mask_list: las dependencias de L ya codificadas con AttributeTable(T);
+    se usan en lugar de validar y codificar relation.l_set.
+    progress: se entrega a CanonicalCover.
     '''
-    def __init__(self, json_path: str):
-        data = dict()
-        try:
-            with open(json_path) as file:
-                data = json.load(file)
-        except Exception as ex:
-            print("Error leyendo archivo . Error: " + str(ex))
-            return
-        self.relation = RelationModel()
-        self.relation.loadSetsFromJson(data)
-        if not self.__validateDependencies(self.relation.t_set, self.relation.l_set):
-            raise Exception("El conjunto de dependencias L contiene atributos que no están en T")
+    def __init__(self, json_path: str = None, relation: RelationModel = None, cover_fd_masks: list = None,
+                 fd_mask_list: list = None, progress=None):
+        if relation is None:
+            from Include.Loader import loadRelation
+            relation = loadRelation(json_path)
+        self.relation = relation
+        self.attr_table = AttributeTable(self.relation.t_set)
+        if fd_mask_list is None:
+            if not self.__validateDependencies(self.relation.t_set, self.relation.l_set):
+                raise Exception("El conjunto de dependencias L contiene atributos que no están en T")
+            fd_mask_list = self.attr_table.encodeFDs(self.relation.l_set)
+        self.fd_mask_list = list(fd_mask_list)
         self.irreducible_rel = RelationModel()
-        self.__calculateCanonicalCover()
+        if cover_fd_masks is None:
+            self.__calculateCanonicalCover(progress)
+        else:
+            self.__useCanonicalCover(cover_fd_masks)
 
     def checkEquivalenceJson(self, json_path: str):
-        data = dict()
-        try:
-            with open(json_path) as file:
-                data = json.load(file)
-        except Exception as ex:
-            print("Error leyendo archivo . Error: " + str(ex))
-            return
-        new_relation = RelationModel()
-        new_relation.loadSetsFromJson(data)
-        self.checkEquivalence(new_relation.l_set)
+        from Include.Loader import loadRelation
+        return self.checkEquivalence(loadRelation(json_path).l_set)
 
     def checkEquivalence(self, L: set):
-        l_set = L.copy()
-        if not self.__validateDependencies(self.relation.t_set, l_set):
-            print("El conjunto L contiene atributos que no están en T")
-            return False
-        l_set = self.__setOneAttributeRight(l_set)
-        l_set = self.__setIrreducibleAttributeLeft(l_set)
-        l_set = self.__deleteRedundantFD(l_set)
-        if not l_set == L:
-            print("El conjunto L no es una covertura mínima")
-            return False
-        if not self.__generateFDfromFD(l_set, self.irreducible_rel.l_set):
-            print("El conjunto L ingresado no genera al conjunto L de nuestra solución")
-            return False
-        if not self.__generateFDfromFD(self.irreducible_rel.l_set, l_set):
-            print("El conjunto L de nuestra solución no genera al conjunto L ingresado")
-            return  False
-        print("Si son dependencias funcionales equivalentes")
-        return True
-
-    def __generateFDfromFD(self, L_generated: set, L_used: set):
-        '''se genera el conjunto de dependencias funcionales
-        L_generated usando las dependencias funcionales del conjunto
-        L_used'''
-        for item in L_generated:
-            closure = calculateAttributeClosure2(item[0], L_used)
-            if not set(item[1]).issubset(closure):
-                return False
-        return True
-
+        '''
+        Compara el conjunto L con la cobertura mínima calculada. Retorna un
+        EquivalenceResult que es verdadero si L es equivalente y además es
+        una cobertura mínima. La equivalencia se revisa primero, en ambos
+        sentidos y deteniéndose en la primera dependencia que no se deduce;
+        la cobertura de L solo se calcula si son equivalentes
+        '''
+        L = set(tuple(toAttributeSet(side, self.relation.t_set) for side in element) for element in L)
+        if not self.__validateDependencies(self.relation.t_set, L):
+            raise ValueError("El conjunto L contiene atributos que no están en T")
+        fd_mask_list = self.attr_table.encodeFDs(L)
+        for fd_mask in iterateNotImpliedMasks(self.closure_engine, fd_mask_list):
+            return EquivalenceResult(False, False, self.attr_table.decodeFD(fd_mask), "solución")
+        given_engine = AttributeClosure.fromFDMasks(fd_mask_list)
+        for fd_mask in iterateNotImpliedMasks(given_engine, self.closure_engine.fd_mask_list):
+            return EquivalenceResult(False, False, self.attr_table.decodeFD(fd_mask), "ingresado")
+        canonical_cover = CanonicalCover(fd_mask_list, given_engine)
+        return EquivalenceResult(True, self.attr_table.decodeFDs(canonical_cover.fd_mask_list) == L)
 
     def saveIrreducibleFD(self, json_path: str):
         self.irreducible_rel.saveAsJson(json_path)
 
 
-    def __calculateCanonicalCover(self):
+    def __calculateCanonicalCover(self, progress=None):
+        '''
+        Calcula la cobertura mínima con CanonicalCover. closure_engine es el
+        motor de cierres que comparte todo el análisis (llaves candidatas y
+        formas normales); phase_times guarda el tiempo de cada fase.
+        '''
+        with Profiling.stage("cover"):
+            canonical_cover = CanonicalCover(self.fd_mask_list, AttributeClosure(set(), self.attr_table), progress)
+        self.closure_engine = canonical_cover.closure_engine
+        self.phase_times = canonical_cover.phase_times
+        self.irreducible_rel.t_set = self.relation.t_set.copy()
+        self.irreducible_rel.l_set = self.attr_table.decodeFDs(canonical_cover.fd_mask_list)
+
+    def __useCanonicalCover(self, cover_fd_masks: list):
+        self.closure_engine = AttributeClosure(set(), self.attr_table)
+        self.closure_engine.compileFDMasks(sorted(cover_fd_masks))
+        self.phase_times = {}
         self.irreducible_rel.t_set = self.relation.t_set.copy()
-        self.irreducible_rel.l_set = self.__setOneAttributeRight(self.relation.l_set)
-        self.irreducible_rel.l_set = self.__setIrreducibleAttributeLeft(self.irreducible_rel.l_set)
-        self.irreducible_rel.l_set = self.__deleteRedundantFD(self.irreducible_rel.l_set)
+        self.irreducible_rel.l_set = self.attr_table.decodeFDs(cover_fd_masks)
 
     def __validateDependencies(self, T: set, L: set):
         for item in L:
-            if len(item) == 2:
-                for character in item[0]:
-                    if character not in T:
-                        return False
-                for character in item[1]:
-                    if character not in T:
-                        return False
-            else:
+            if len(item) != 2 or not T.issuperset(item[0]) or not T.issuperset(item[1]):
                 return False
         return True
 
+PARALLEL_MIN_LEVEL_SIZE = 4096
+PROGRESS_BLOCK_SIZE = 2048
+
+
+def containsKey(key_mask: int, key_mask_list: list):
+    '''
+    Indica si key_mask contiene alguna de las llaves de key_mask_list
+    '''
+    for item in key_mask_list:
+        if not item & ~key_mask:
+            return True
+    return False
+
+
+def searchKeyLevel(closure_engine, t_mask: int, middle_bit_list: list, remaining_mask_list: list,
+                   level_list: list, key_mask_list: list, next_level_list: list,
+                   prune_counter: collections.Counter = None):
+    '''
+    Generador que procesa un nivel de la búsqueda de llaves candidatas.
+    level_list: pares (máscara, índice del siguiente atributo intermedio).
+    key_mask_list: llaves ya encontradas, para descartar sus superconjuntos.
+    next_level_list: recibe los conjuntos del nivel siguiente.
+    prune_counter: si se entrega, cuenta los conjuntos descartados por cada
+    regla (ver Include.Profiling).
+
+    Entrega las máscaras que son llave. Solo se extienden los conjuntos que
+    no son superllave, y únicamente con atributos intermedios de índice
+    mayor a los que ya tienen, por lo que ningún conjunto se genera dos
+    veces. Tampoco se extiende un conjunto cuyo cierre, junto con todos los
+    atributos que aún podría agregar, no alcanza T, ni se le agrega un
+    atributo que ya está en su cierre: ese atributo sería redundante en
+    cualquier superconjunto, que entonces no podría ser una llave mínima.
+    '''
+    for key_mask, next_index in level_list:
+        if containsKey(key_mask, key_mask_list):
+            if prune_counter is not None:
+                prune_counter["key_sets_pruned_superkey"] += 1
+            continue
+        closure_mask = closure_engine.calculateMask(key_mask)
+        if closure_mask == t_mask:
+            yield key_mask
+            continue
+        if closure_engine.calculateMask(key_mask | remaining_mask_list[next_index]) != t_mask:
+            if prune_counter is not None:
+                prune_counter["key_sets_pruned_unreachable"] += 1
+            continue
+        for index in range(next_index, len(middle_bit_list)):
+            if not middle_bit_list[index] & closure_mask:
+                next_level_list.append((key_mask | middle_bit_list[index], index + 1))
+            elif prune_counter is not None:
+                prune_counter["key_extensions_skipped"] += 1
+
+
+key_worker_state = {}
+
+
+def initKeyWorker(fd_mask_list: list, t_mask: int, middle_bit_list: list, remaining_mask_list: list):
+    '''
+    Inicializa un proceso trabajador de la búsqueda de llaves con las
+    dependencias codificadas como pares de máscaras
+    '''
+    key_worker_state["closure_engine"] = AttributeClosure.fromFDMasks(fd_mask_list)
+    key_worker_state["t_mask"] = t_mask
+    key_worker_state["middle_bit_list"] = middle_bit_list
+    key_worker_state["remaining_mask_list"] = remaining_mask_list
+
+
+def searchKeyChunk(level_chunk: list, key_mask_list: list, count_pruned: bool = False):
+    '''
+    Procesa en un proceso trabajador un bloque de un nivel de la búsqueda.
+    Retorna (llaves encontradas, conjuntos del nivel siguiente, contador de
+    descartes o None si no se pidió count_pruned)
+    '''
+    next_level_list = []
+    prune_counter = collections.Counter() if count_pruned else None
+    found_key_list = list(searchKeyLevel(key_worker_state["closure_engine"], key_worker_state["t_mask"],
+                                         key_worker_state["middle_bit_list"], key_worker_state["remaining_mask_list"],
+                                         level_chunk, key_mask_list, next_level_list, prune_counter))
+    return found_key_list, next_level_list, prune_counter
+
+
+def minimizeKey(closure_engine: AttributeClosure, t_mask: int, key_mask: int):
+    '''
+    Reduce la superllave key_mask a una llave candidata quitando, en orden,
+    cada atributo que no hace falta para que el cierre siga siendo T
+    '''
+    for bit in iterateBits(key_mask):
+        if closure_engine.calculateMask(key_mask & ~bit) == t_mask:
+            key_mask &= ~bit
+    return key_mask
+
+
+def minimumKeyMask(closure_engine: AttributeClosure, t_mask: int, key_mask: int):
+    '''
+    La llave candidata de menor máscara contenida en la superllave key_mask.
+    Quitar primero los atributos de bit más alto da la menor superllave,
+    que por eso mismo es una llave
+    '''
+    for bit in reversed(list(iterateBits(key_mask))):
+        if closure_engine.calculateMask(key_mask & ~bit) == t_mask:
+            key_mask &= ~bit
+    return key_mask
+
+
+def iterateKeysFromSeeds(closure_engine: AttributeClosure, t_mask: int, seed_mask_list: list = (),
+                         deadline: float = None, progress=None):
+    '''
+    Generador de todas las llaves candidatas por medio del algoritmo de
+    Lucchesi y Osborn: a partir de una llave K y una dependencia X -> Y, el
+    conjunto X ∪ (K - Y) es superllave; si no contiene una llave conocida,
+    al reducirlo se obtiene una llave nueva. Su costo es polinomial en el
+    número de llaves, dependencias y atributos.
+
+    seed_mask_list: conjuntos de atributos (por ejemplo las llaves de una
+    versión anterior del conjunto L) desde los que se empieza. A cada uno
+    se le agregan los atributos que no alcanza su cierre, lo que da una
+    superllave, y se reduce. Sin semillas se empieza por T.
+    deadline: valor de time.monotonic() en que se deja de buscar, revisado
+    antes de procesar cada llave.
+    progress: como en CandidatesKeys; el nivel es el número de llaves ya
+    procesadas y los conjuntos revisados son las dependencias recorridas
+    con la llave actual, reportadas al empezar y cada PROGRESS_BLOCK_SIZE.
+    '''
+    key_mask_list = []
+    for seed_mask in list(seed_mask_list) or [t_mask]:
+        seed_mask |= t_mask & ~closure_engine.calculateMask(seed_mask)
+        key_mask = minimizeKey(closure_engine, t_mask, seed_mask)
+        if key_mask not in key_mask_list:
+            key_mask_list.append(key_mask)
+            yield key_mask
+    key_index = 0
+    while key_index < len(key_mask_list):
+        if deadline is not None and time.monotonic() > deadline:
+            return
+        key_mask = key_mask_list[key_index]
+        key_index += 1
+        for fd_index, (lhs_mask, rhs_mask) in enumerate(closure_engine.fd_mask_list):
+            if progress is not None and fd_index % PROGRESS_BLOCK_SIZE == 0:
+                progress(key_index - 1, fd_index, len(closure_engine.fd_mask_list), len(key_mask_list))
+            superkey_mask = lhs_mask | (key_mask & ~rhs_mask)
+            if not containsKey(superkey_mask, key_mask_list):
+                new_key_mask = minimizeKey(closure_engine, t_mask, superkey_mask)
+                key_mask_list.append(new_key_mask)
+                yield new_key_mask
+
+
+def growClosedSet(closure_engine: AttributeClosure, closed_mask: int, avoid_bit: int, bit_list: list):
+    '''
+    Agrega al conjunto cerrado closed_mask, en el orden de bit_list, cada
+    atributo cuyo cierre junto con el conjunto no alcanza a avoid_bit. El
+    resultado es un conjunto cerrado maximal que no contiene a avoid_bit
+    '''
+    for bit in bit_list:
+        if bit & closed_mask or bit == avoid_bit:
+            continue
+        grown_mask = closure_engine.calculateMask(closed_mask | bit)
+        if not grown_mask & avoid_bit:
+            closed_mask = grown_mask
+    return closed_mask
+
+
+def findPrimeAttributes(closure_engine: AttributeClosure, t_mask: int, necessary_mask: int, middle_mask: int,
+                        progress=None):
+    '''
+    Atributos primos (los que pertenecen a alguna llave candidata) sin
+    enumerar todas las llaves. Retorna (máscara de los atributos primos,
+    diccionario bit -> una llave que contiene ese atributo).
+
+    Los atributos necesarios están en todas las llaves y los que no son
+    intermedios (ver CandidatesKeys.setAttributeSets) en ninguna. Un
+    atributo intermedio A es primo si y solo si existe un conjunto cerrado C
+    sin A tal que el cierre de C ∪ {A} es T; en ese caso toda llave
+    contenida en C ∪ {A} contiene a A. Para cada atributo aún sin decidir
+    se construye C de forma voraz, en dos órdenes distintos, con
+    growClosedSet. Solo los atributos que esto no decide se resuelven con
+    el algoritmo de Lucchesi y Osborn, que se detiene en cuanto todos
+    aparecen en alguna llave; agotarlo prueba que los restantes no son primos.
+
+    progress: como en CandidatesKeys. Las dos pasadas voraces se reportan
+    como los niveles 0 y 1, con un conjunto por atributo intermedio; la
+    enumeración, como en iterateKeysFromSeeds
+    '''
+    witness_dict = {}
+    prime_mask = 0
+
+    def addKey(key_mask: int):
+        nonlocal prime_mask
+        for bit in iterateBits(key_mask & ~prime_mask):
+            witness_dict[bit] = key_mask
+        prime_mask |= key_mask
+
+    base_mask = closure_engine.calculateMask(necessary_mask)
+    if base_mask == t_mask:
+        addKey(necessary_mask)
+        return prime_mask, witness_dict
+    middle_bit_list = list(iterateBits(middle_mask))
+    for order_num, order_list in enumerate((middle_bit_list, middle_bit_list[::-1])):
+        for bit_index, bit in enumerate(order_list):
+            if progress is not None:
+                progress(order_num, bit_index, len(order_list), len(set(witness_dict.values())))
+            if bit & prime_mask:
+                continue
+            closed_mask = growClosedSet(closure_engine, base_mask, bit, order_list)
+            if closure_engine.calculateMask(closed_mask | bit) == t_mask:
+                addKey(minimizeKey(closure_engine, t_mask, (closed_mask | bit) & (necessary_mask | middle_mask)))
+    pending_mask = middle_mask & ~prime_mask
+    if pending_mask:
+        for key_mask in iterateKeysFromSeeds(closure_engine, t_mask, list(dict.fromkeys(witness_dict.values())),
+                                             progress=progress):
+            addKey(key_mask)
+            pending_mask &= ~key_mask
+            if not pending_mask:
+                break
+    return prime_mask, witness_dict
 
-    def __setOneAttributeRight(self, L: set):
-        """
-            ("fd[0]", "fd[1]")
-        """
-        func_dep = L.copy()
-        for fd in func_dep.copy():
-            if fd:
-                if len(fd[1]) < 1:
-                    func_dep.discard(fd)
-                else:
-                    if set(fd[1]).issubset(set(fd[0])):
-                        func_dep.discard(fd)
-                    else:
-                        func_dep.discard(fd)
-                        for character in fd[1]:
-                            if not set(character).issubset(set(fd[0])):
-                                func_dep.add((fd[0], character))
-            else:
-                func_dep.discard(df)
-        return func_dep
-
-
-    def __setIrreducibleAttributeLeft(self, L: set):
-        func_dep = L.copy()
-        l_set = set()
-        self.closure_dict = {}
-        for element in func_dep:
-            if len(element[0]) == 1:
-                l_set.add(element)
-            elif len(element[0]) > 1:
-                new_fd = self.__deleteExtraneousAttributes(L, element)
-                if new_fd:
-                    l_set.add(new_fd)
-        return  l_set
-
-
-    def __deleteExtraneousAttributes(self, L: set, func_dep: tuple):
-        is_irreducible = False
-        while not is_irreducible:
-            func_dep_copy = func_dep
-            is_irreducible = True
-            for character in func_dep_copy[0]:
-                new_implicating = str(func_dep_copy[0]).replace(character, '')
-                if new_implicating not in self.closure_dict:
-                    self.closure_dict[new_implicating] = calculateAttributeClosure2(new_implicating, L)
-                if func_dep_copy[1] in self.closure_dict[new_implicating]:
-                    func_dep = (func_dep[0].replace(character, ''), func_dep[1])
-                    if len(func_dep[0]) == 1:
-                        break
-                    is_irreducible = False
-        return func_dep
-
-    def __deleteRedundantFD(self, L: set):
-        l_copy = L.copy()
-        for element in L:
-            l_copy.discard(element)
-            closure = calculateAttributeClosure2(element[0], l_copy)
-            if element[1] not in closure:
-                l_copy.add(element)
-        return l_copy
 
 class CandidatesKeys:
     '''
@@ -243,309 +917,490 @@ class CandidatesKeys:
     Para ello hace uso de la clase IrreducibleFD, para
     obtener el conjunto de cobertura mínima.
 
+    worker_num: número de procesos para la búsqueda de llaves. Con 1 (por
+    defecto) toda la búsqueda se hace en el proceso actual.
+    minimal_cover: cobertura mínima ya calculada, si se tiene.
+    key_masks: máscaras de las llaves candidatas ya calculadas (por ejemplo,
+    leídas de un archivo binario); con ellas no se hace la búsqueda.
+    progress: función progress(nivel, conjuntos revisados, tamaño del nivel,
+    llaves encontradas) que la búsqueda llama al empezar cada nivel, cada
+    PROGRESS_BLOCK_SIZE conjuntos y con cada llave. Si lanza una excepción,
+    la búsqueda se detiene; así se puede cancelar desde otro hilo. Con lazy
+    también lo llaman primeMask y keys (ver findPrimeAttributes).
+    lazy: no enumera las llaves al crear el objeto. Las consultas firstKey,
+    primeAttributes y keys(limit, timeout) terminan en cuanto tienen su
+    respuesta, lo que sirve cuando el número de llaves crece de forma
+    exponencial. Mientras is_complete sea False, candidate_key_masks solo
+    contiene las llaves que keys ha encontrado hasta el momento.
+
     Se recomienda la siguiente página para realizar pruebas:
         http://raymondcho.net/RelationalDatabaseTools/RelationalDatabaseTools
     '''
-    def __init__(self, json_path: str):
-        self.minimal_cover = IrreducibleFD(json_path)
+    def __init__(self, json_path: str = None, worker_num: int = 1, relation: RelationModel = None,
+                 minimal_cover: IrreducibleFD = None, key_masks: list = None, progress=None, lazy: bool = False):
+        self.worker_num = worker_num
+        self.progress = progress
+        self.is_complete = False
+        self.prime_mask = None
+        if minimal_cover is None:
+            minimal_cover = IrreducibleFD(json_path, relation)
+        self.minimal_cover = minimal_cover
         self.setAttributeSets()
-        if self.checkPrimaryKey():
-            print("Se encontró una llave primaria: {0}".format(self.necessary_attr_set))
+        if key_masks is not None:
+            self.candidate_key_masks = list(key_masks)
+            self.candidate_keys = set(self.attr_table.decodeFrozen(key_mask) for key_mask in self.candidate_key_masks)
+        elif lazy:
+            self.candidate_key_masks = []
             self.candidate_keys = set()
-            self.candidate_keys.add(''.join(self.necessary_attr_set))
             return
-        self.calculateCandidateKeys()
-
+        else:
+            self.calculateCandidateKeys()
+        self.is_complete = True
 
     def setAttributeSets(self):
-        self.left_attr_set = set()
-        self.right_attr_set = set()
-        for item in self.minimal_cover.irreducible_rel.l_set:
-            for character in item[0]:
-                self.left_attr_set.add(character)
-            for character in item[1]:
-                self.right_attr_set.add(character)
-        self.necessary_attr_set = self.minimal_cover.relation.t_set.difference(self.right_attr_set)
-        self.useless_attr_set = self.minimal_cover.relation.t_set.difference(self.left_attr_set)
-        self.useless_attr_set = self.useless_attr_set.difference(self.necessary_attr_set)
-        aux_set = self.useless_attr_set.union(calculateAttributeClosure2("".join(self.necessary_attr_set), self.minimal_cover.irreducible_rel.l_set))
-        self.middle_attr_set = self.minimal_cover.relation.t_set.difference(aux_set)
+        self.attr_table = self.minimal_cover.attr_table
+        self.closure_engine = self.minimal_cover.closure_engine
+        self.t_mask = self.attr_table.encode(self.minimal_cover.relation.t_set)
+        left_mask = 0
+        right_mask = 0
+        for lhs_mask, rhs_mask in self.closure_engine.fd_mask_list:
+            left_mask |= lhs_mask
+            right_mask |= rhs_mask
+        self.necessary_mask = self.t_mask & ~right_mask
+        self.useless_mask = self.t_mask & ~left_mask & ~self.necessary_mask
+        aux_mask = self.useless_mask | self.closure_engine.calculateMask(self.necessary_mask)
+        self.middle_mask = self.t_mask & ~aux_mask
+        self.left_attr_set = self.attr_table.decode(left_mask)
+        self.right_attr_set = self.attr_table.decode(right_mask)
+        self.necessary_attr_set = self.attr_table.decode(self.necessary_mask)
+        self.useless_attr_set = self.attr_table.decode(self.useless_mask)
+        self.middle_attr_set = self.attr_table.decode(self.middle_mask)
 
     def checkPrimaryKey(self):
-        necessary_closure = calculateAttributeClosure2("".join(self.necessary_attr_set), self.minimal_cover.irreducible_rel.l_set)
-        if necessary_closure == self.minimal_cover.relation.t_set:
+        necessary_closure = self.closure_engine.calculateMask(self.necessary_mask)
+        if necessary_closure == self.t_mask:
             return True
         return  False
 
     def calculateCandidateKeys(self):
-        self.middle_attr_list = list(self.middle_attr_set)
-        level_num = len(self.middle_attr_set)
         self.candidate_keys = set()
-        self.necessary_attr_str = ''.join(self.necessary_attr_set)
-        thread_list = []
-        max_thread_len = 4
-        for i in range(level_num):
-            for j in range(len(self.middle_attr_list)):
-                if len(thread_list) >= max_thread_len:
-                    is_any_thread_finished = False
-                    while not is_any_thread_finished:
-                        for ck_thread in thread_list:
-                            if not ck_thread[0].is_alive():
-                                thread_list.pop(ck_thread[1])
-                                is_any_thread_finished = True
-                                break
-                        time.sleep(0.001)
-                new_thread = threading.Thread(target=self.getKeysAtLevel, kwargs={"level_num": i, "attr_index": j})
-                thread_list.append((new_thread, len(thread_list)))
-                new_thread.start()
-        for ck_thread in thread_list:
-            ck_thread[0].join()
-                #self.getKeysAtLevel(level_num=i, attr_index=j)
-
-    def getKeysAtLevel(self, level_num: int, attr_index: int):
-        middle_attr_copy = self.middle_attr_list[:]
-        attr = middle_attr_copy.pop(attr_index)
-        base_attr = self.necessary_attr_str + attr
-        if self.checkIsSupperKey(set(base_attr)):
+        with Profiling.stage("keys"):
+            for candidate_key in self.iterateCandidateKeys():
+                self.candidate_keys.add(candidate_key)
+
+    def iterateCandidateKeys(self):
+        '''
+        Generador que entrega cada llave candidata (frozenset de atributos)
+        en cuanto se encuentra
+        '''
+        for key_mask in self.iterateKeyMasks():
+            yield self.attr_table.decodeFrozen(key_mask)
+
+    def firstKey(self):
+        '''
+        La llave candidata de menor máscara (frozenset de atributos), sin
+        enumerar las demás. No depende de si las llaves ya se calcularon
+        '''
+        return self.attr_table.decodeFrozen(self.firstKeyMask())
+
+    def firstKeyMask(self):
+        if self.is_complete:
+            return min(self.candidate_key_masks)
+        return minimumKeyMask(self.closure_engine, self.t_mask, self.necessary_mask | self.middle_mask)
+
+    def primeAttributes(self):
+        '''
+        Conjunto de los atributos que pertenecen a alguna llave candidata
+        '''
+        return self.attr_table.decode(self.primeMask())
+
+    def primeMask(self):
+        '''
+        Máscara de los atributos primos: la unión de las llaves si ya se
+        enumeraron; si no, se calcula con findPrimeAttributes
+        '''
+        if self.prime_mask is None:
+            if self.is_complete:
+                self.prime_mask = keysUnionMask(self.candidate_key_masks)
+            else:
+                self.prime_mask, _ = findPrimeAttributes(
+                    self.closure_engine, self.t_mask, self.necessary_mask, self.middle_mask, self.progress)
+        return self.prime_mask
+
+    def keys(self, limit: int = None, timeout: float = None):
+        '''
+        Generador perezoso de las llaves candidatas (frozensets). Termina
+        después de limit llaves o cuando pasan timeout segundos.
+
+        Si las llaves ya se calcularon y no son más de limit, las entrega en
+        su orden. Si no, las busca con iterateKeysFromSeeds a partir de
+        firstKey: a diferencia de la búsqueda por niveles, que recorre todos
+        los conjuntos pequeños antes de encontrar una llave grande, el costo
+        entre una llave y la siguiente es polinomial, pero las llaves no
+        salen en orden de tamaño. Ese orden solo depende de la cobertura
+        mínima, así que las primeras limit llaves son las mismas se hayan
+        calculado las llaves o no. Si la búsqueda se agota, is_complete pasa
+        a ser True
+        '''
+        if self.is_complete and (limit is None or len(self.candidate_key_masks) <= limit):
+            mask_iter = iter(self.candidate_key_masks)
+        else:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            mask_iter = self.__iterateLazyKeyMasks(deadline)
+        for key_mask in itertools.islice(mask_iter, limit):
+            yield self.attr_table.decodeFrozen(key_mask)
+
+    def iterateKeyMasks(self):
+        '''
+        Generador de las máscaras de las llaves candidatas por medio de una
+        búsqueda por niveles: el nivel k contiene los conjuntos formados por
+        los atributos necesarios y k atributos intermedios (ver searchKeyLevel).
+        Como las llaves aparecen en orden de tamaño, descartar los conjuntos
+        que contienen una llave ya encontrada garantiza que las llaves
+        entregadas son mínimas.
+
+        Si worker_num > 1, los niveles con al menos PARALLEL_MIN_LEVEL_SIZE
+        conjuntos se reparten en bloques entre procesos trabajadores; los
+        niveles pequeños se procesan en este mismo proceso. Los bloques se
+        reúnen en orden, así que el resultado es el mismo en ambos modos.
+        '''
+        self.candidate_key_masks = []
+        middle_bit_list = list(iterateBits(self.middle_mask))
+        remaining_mask_list = [0] * (len(middle_bit_list) + 1)
+        for index in range(len(middle_bit_list) - 1, -1, -1):
+            remaining_mask_list[index] = remaining_mask_list[index + 1] | middle_bit_list[index]
+        level_list = [(self.necessary_mask, 0)]
+        level_num = 0
+        executor = None
+        try:
+            while level_list:
+                next_level_list = []
+                prune_counter = collections.Counter() if Profiling.active_stats is not None else None
+                key_num = len(self.candidate_key_masks)
+                self.__reportProgress(level_num, 0, len(level_list))
+                if self.worker_num > 1 and len(level_list) >= PARALLEL_MIN_LEVEL_SIZE:
+                    if executor is None:
+                        executor = concurrent.futures.ProcessPoolExecutor(
+                            max_workers=self.worker_num, initializer=initKeyWorker,
+                            initargs=(self.closure_engine.fd_mask_list, self.t_mask, middle_bit_list, remaining_mask_list))
+                    chunk_len = -(-len(level_list) // (self.worker_num * 4))
+                    chunk_list = [level_list[i:i + chunk_len] for i in range(0, len(level_list), chunk_len)]
+                    key_mask_list = self.candidate_key_masks[:]
+                    checked_num = 0
+                    for found_key_list, chunk_next_level_list, chunk_counter in executor.map(
+                            searchKeyChunk, chunk_list, itertools.repeat(key_mask_list),
+                            itertools.repeat(prune_counter is not None)):
+                        next_level_list.extend(chunk_next_level_list)
+                        if chunk_counter is not None:
+                            prune_counter.update(chunk_counter)
+                        for key_mask in found_key_list:
+                            self.candidate_key_masks.append(key_mask)
+                            yield key_mask
+                        checked_num += chunk_len
+                        self.__reportProgress(level_num, min(checked_num, len(level_list)), len(level_list))
+                else:
+                    block_size = PROGRESS_BLOCK_SIZE if self.progress is not None else max(len(level_list), 1)
+                    for start in range(0, len(level_list), block_size):
+                        block_list = level_list[start:start + block_size] if block_size < len(level_list) else level_list
+                        if start:
+                            self.__reportProgress(level_num, start, len(level_list))
+                        for key_mask in searchKeyLevel(self.closure_engine, self.t_mask, middle_bit_list,
+                                                       remaining_mask_list, block_list, self.candidate_key_masks,
+                                                       next_level_list, prune_counter):
+                            self.candidate_key_masks.append(key_mask)
+                            self.__reportProgress(level_num, start, len(level_list))
+                            yield key_mask
+                if prune_counter is not None:
+                    prune_counter["key_levels"] += 1
+                    prune_counter["key_sets_tested"] += len(level_list)
+                    prune_counter["keys_found"] += len(self.candidate_key_masks) - key_num
+                    Profiling.active_stats.counters.update(prune_counter)
+                level_list = next_level_list
+                level_num += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def __iterateLazyKeyMasks(self, deadline: float):
+        seed_mask = self.firstKeyMask()
+        if self.is_complete:
+            yield from iterateKeysFromSeeds(self.closure_engine, self.t_mask, [seed_mask], deadline, self.progress)
             return
-        attr_list = [base_attr]
-        for char in middle_attr_copy:
-            attr_list.append(char)
-        for combination in itertools.combinations(attr_list, level_num + 1):
-            if base_attr in combination:
-                if not self.checkIsSupperKey(set(combination)):
-                    combination_str = ''.join(combination)
-                    attr_closure = calculateAttributeClosure2(combination_str, self.minimal_cover.irreducible_rel.l_set)
-                    if attr_closure == self.minimal_cover.relation.t_set:
-                        self.candidate_keys.add(combination_str)
-
-    def checkIsSupperKey(self, key: set):
-        for item in self.candidate_keys:
-            if key.issubset(item):
-                return True
-        return False
+        self.candidate_key_masks = []
+        for key_mask in iterateKeysFromSeeds(self.closure_engine, self.t_mask, [seed_mask], deadline, self.progress):
+            self.candidate_key_masks.append(key_mask)
+            yield key_mask
+        if deadline is None or time.monotonic() <= deadline:
+            self.is_complete = True
+            self.candidate_keys = set(self.attr_table.decodeFrozen(key_mask) for key_mask in self.candidate_key_masks)
+
+    def checkIsSupperKey(self, key_mask: int):
+        '''
+        Indica si key_mask contiene alguna de las llaves candidatas ya encontradas
+        '''
+        return containsKey(key_mask, self.candidate_key_masks)
+
+    def __reportProgress(self, level_num: int, checked_num: int, level_size: int):
+        if self.progress is not None:
+            self.progress(level_num, checked_num, level_size, len(self.candidate_key_masks))
 
 class NormalFormsChecker:
-    def __init__(self, json_path: str):
-        self.candidates_keys = CandidatesKeys(json_path)
-        #self.l_set = self.candidates_keys.minimal_cover.irreducible_rel.l_set.copy()
-        self.l_set = self.candidates_keys.minimal_cover.relation.l_set.copy()
+    '''
+    Revisa la 2 FN, la 3 FN y la FNBC de la relación. La FNBC solo usa el
+    cierre de cada lado izquierdo y la 3 FN además los atributos primos
+    (CandidatesKeys.primeMask), así que con lazy_keys las llaves candidatas
+    no se enumeran y la respuesta no depende de cuántas sean
+    '''
+    def __init__(self, json_path: str = None, worker_num: int = 1, relation: RelationModel = None,
+                 candidates_keys: CandidatesKeys = None, progress=None, lazy_keys: bool = False):
+        if candidates_keys is None:
+            candidates_keys = CandidatesKeys(json_path, worker_num, relation, progress=progress, lazy=lazy_keys)
+        self.candidates_keys = candidates_keys
+        self.attr_table = self.candidates_keys.attr_table
+        self.t_mask = self.candidates_keys.t_mask
+        self.fd_mask_list = sorted(self.candidates_keys.minimal_cover.fd_mask_list)
+        self.closure_engine = self.candidates_keys.closure_engine
+        with Profiling.stage("normal_forms"):
+            self.violations_2nf = self.find2NFViolations()
+            self.violations_3nf = self.find3NFViolations()
+            self.violations_bcnf = self.findBCNFViolations()
         self.is_2nf = self.check2NF()
         if not self.is_2nf:
-            print("La relación no cumple 2 FN. Por lo tanto tampoco 3 FN ni FNBC")
             self.is_3nf = False
             self.is_bc_nf = False
             return
-        print("La relación cumple 2 FN")
         self.is_3nf = self.check3NF()
         if not self.is_3nf:
-            print("La relación no cumple 3 FN. Por lo tanto tampoco FNBC")
             self.is_bc_nf = False
             return
-        print("La relación cumple 3 FN")
         self.is_bc_nf = self.checkBCNF()
-        if not self.is_bc_nf:
-            print("La relación no cumple FNBC")
-        else:
-            print("La relación cumple FNBC")
+
+    @property
+    def violations(self):
+        '''
+        Todas las violaciones encontradas, de la 2 FN a la FNBC
+        '''
+        return self.violations_2nf + self.violations_3nf + self.violations_bcnf
+
+    @property
+    def l_set(self):
+        return self.candidates_keys.minimal_cover.relation.l_set
 
     def check2NF(self):
-        for element in self.l_set:
-            for character in element[0]:
-                new_element = element[0].replace(character, "")
-                closure = calculateAttributeClosure2(new_element, self.l_set)
-                if set(element[1]).issubset(closure):
-                    return False
-        return True
+        return not self.violations_2nf
 
     def check3NF(self):
-        for candidate_key in self.candidates_keys.candidate_keys:
-            no_keys_set = self.candidates_keys.minimal_cover.relation.t_set.difference(set(candidate_key))
-            for attr in no_keys_set:
-                closure = calculateAttributeClosure2(attr, self.l_set)
-                if closure.intersection(no_keys_set.difference(set(attr))):
-                    return False
-        return True
+        return not self.violations_3nf
 
     def checkBCNF(self):
-        for candidate_key in self.candidates_keys.candidate_keys:
-            for element in self.l_set:
-                if not set(candidate_key).issubset(set(element[0])):
-                    return False
-        return True
-
-class NormalFormsGUI:
-    def __init__(self):
-        self.root = Tk()
-        self.root.title("Normal Forms")
-        self.mainframe = ttk.Frame(self.root, padding="3 3 12 12")
-        self.mainframe.grid(column=0, row=0, sticky=(N, W, E, S))
-        self.mainframe.columnconfigure(0, weight=1)
-        self.mainframe.rowconfigure(0, weight=1)
-        self.last_init_dir = "C:/Users/Estudiantes/Documents"
-
-        self.file_name = StringVar()
-        self.nf_list = ["2 FN", "3 FN", "BC NF"]
-        self.nf_choice = StringVar()
-        self.message = StringVar()
-        self.input_option = IntVar()
-        self.manual_lset = StringVar()
-        self.manual_tset = StringVar()
-
-        ttk.Label(self.mainframe, text="Choose input option:").grid(column=1, row=1, sticky=W)
-
-        radiobtn_file = ttk.Radiobutton(self.mainframe, text="From File", variable=self.input_option, value=1, command=self.onRadioBtnClic)
-        radiobtn_file.grid(column=1, row=2, columnspan=1, sticky=(W, E))
-
-        radiobtn_manual = ttk.Radiobutton(self.mainframe, text="Manuel Input", variable=self.input_option, value=2, command=self.onRadioBtnClic)
-        radiobtn_manual.grid(column=2, row=2, columnspan=1, sticky=(W, E))
+        return not self.violations_bcnf
+
+    def find2NFViolations(self):
+        violation_list = []
+        for fd_mask, partial_mask in iterate2NFViolations(self.closure_engine, self.fd_mask_list):
+            violation_list.append(NormalFormViolation("2FN", self.attr_table.decodeFD(fd_mask),
+                                                      self.attr_table.decodeFrozen(partial_mask)))
+        return violation_list
+
+    def find3NFViolations(self):
+        violation_list = []
+        prime_mask = self.candidates_keys.primeMask()
+        key_attrs = None
+        for lhs_mask, attr_bit in iterate3NFViolations(self.closure_engine, self.t_mask, self.fd_mask_list, prime_mask):
+            if key_attrs is None:
+                key_attrs = self.candidates_keys.firstKey()
+            violation_list.append(NormalFormViolation("3FN", self.attr_table.decodeFD((lhs_mask, attr_bit)),
+                                                      key_attrs))
+        return violation_list
+
+    def findBCNFViolations(self):
+        violation_list = []
+        key_attrs = None
+        for fd_mask in iterateBCNFViolations(self.closure_engine, self.t_mask, self.fd_mask_list):
+            if key_attrs is None:
+                key_attrs = self.candidates_keys.firstKey()
+            violation_list.append(NormalFormViolation("FNBC", self.attr_table.decodeFD(fd_mask), key_attrs))
+        return violation_list
+
+
+def violates2NF(closure_engine: AttributeClosure, fd_mask: tuple):
+    '''
+    Indica si la dependencia fd_mask impide la 2 FN: su lado derecho ya se
+    obtiene de su lado izquierdo sin alguno de sus atributos
+    '''
+    lhs_mask, rhs_mask = fd_mask
+    for bit in iterateBits(lhs_mask):
+        if closure_engine.impliesMask(lhs_mask & ~bit, rhs_mask):
+            return True
+    return False
 
-        self.input_option.set(1)
 
-        ttk.Label(self.mainframe, text="From file input:").grid(column=2, row=3, sticky=W)
+def iterate2NFViolations(closure_engine: AttributeClosure, fd_mask_list: list):
+    '''
+    Generador de las dependencias de fd_mask_list que impiden la 2 FN. Entrega
+    pares (fd_mask, partial_mask), donde partial_mask es la parte del lado
+    izquierdo de la que ya depende el lado derecho. Las dependencias se
+    agrupan por lado izquierdo, así que el cierre de cada lado izquierdo sin
+    uno de sus atributos se calcula una sola vez y sirve para todos los lados
+    derechos del grupo
+    '''
+    rhs_dict = collections.defaultdict(list)
+    for lhs_mask, rhs_mask in fd_mask_list:
+        rhs_dict[lhs_mask].append(rhs_mask)
+    for lhs_mask, rhs_list in rhs_dict.items():
+        pending_list = rhs_list
+        for bit in iterateBits(lhs_mask):
+            closure = closure_engine.calculateMask(lhs_mask & ~bit)
+            remaining_list = []
+            for rhs_mask in pending_list:
+                if rhs_mask & ~closure:
+                    remaining_list.append(rhs_mask)
+                else:
+                    yield (lhs_mask, rhs_mask), lhs_mask & ~bit
+            pending_list = remaining_list
+            if not pending_list:
+                break
 
-        file_entry = ttk.Entry(self.mainframe, width=7, textvariable=self.file_name, state="readonly")
-        file_entry.grid(column=2, row=4, columnspan=2, sticky=(W, E))
-        ttk.Label(self.mainframe, text="File name:").grid(column=1, row=4, sticky=W)
 
-        ttk.Label(self.mainframe, text="Manual input:").grid(column=2, row=5, sticky=W)
+def iterate3NFViolations(closure_engine: AttributeClosure, t_mask: int, fd_mask_list: list, prime_mask: int):
+    '''
+    Generador de las dependencias que impiden la 3 FN: X -> A con A fuera de
+    X, X que no es superllave y A que no es primo (prime_mask, ver
+    CandidatesKeys.primeMask). Entrega pares (lhs_mask, attr_bit), uno por
+    cada atributo del lado derecho que la impide. Basta revisar las
+    dependencias de un conjunto equivalente a L, como L mismo o su
+    cobertura mínima, y no hace falta conocer las llaves candidatas
+    '''
+    for lhs_mask, rhs_mask in fd_mask_list:
+        nonprime_mask = rhs_mask & ~lhs_mask & ~prime_mask
+        if nonprime_mask and closure_engine.calculateMask(lhs_mask) != t_mask:
+            for attr_bit in iterateBits(nonprime_mask):
+                yield lhs_mask, attr_bit
 
-        ttk.Label(self.mainframe, text="Write L set in this way: ABC->D,BE->F,AB->E. Here we have \nthree functional dependencies.").grid(column=1, row=6, columnspan=2, sticky=W)
-        self.manual_entry_lset = ttk.Entry(self.mainframe, width=10, textvariable=self.manual_lset)
-        self.manual_entry_lset.grid(column=1, row=7, columnspan=2, sticky=(W, E))
 
-        ttk.Label(self.mainframe,text="Write T set in this way: ABCDEF. Here we have six attributes.").grid(column=1, row=8, columnspan=2, sticky=W)
-        self.manual_entry_tset = ttk.Entry(self.mainframe, width=10, textvariable=self.manual_tset)
-        self.manual_entry_tset.grid(column=1, row=9, columnspan=2, sticky=(W, E))
+def check3NFMasks(closure_engine: AttributeClosure, t_mask: int, fd_mask_list: list, prime_mask: int):
+    '''
+    Indica si el lado izquierdo de cada dependencia de fd_mask_list es
+    superllave o su lado derecho solo tiene atributos primos
+    '''
+    for _ in iterate3NFViolations(closure_engine, t_mask, fd_mask_list, prime_mask):
+        return False
+    return True
 
-        fn_entry = OptionMenu(self.mainframe, self.nf_choice, *self.nf_list, command=self.resetMessage)
-        fn_entry.grid(column=2, row=10, columnspan=2, sticky=(W, E))
-        ttk.Label(self.mainframe, text="Choose Normal Form:").grid(column=1, row=10, sticky=W)
-        self.nf_choice.set(self.nf_list[0])
 
-        ttk.Button(self.mainframe, text="Check", command=self.onCheckClic).grid(column=1, row=11, sticky=W)
-        self.examine_btn = ttk.Button(self.mainframe, text="Examine", command=self.onExamineClic)
-        self.examine_btn.grid(column=3, row=11, sticky=E)
+def keysUnionMask(key_mask_list: list):
+    union_mask = 0
+    for key_mask in key_mask_list:
+        union_mask |= key_mask
+    return union_mask
 
-        self.onRadioBtnClic()
 
-        ttk.Label(self.mainframe, textvariable=self.message).grid(column=1, row=12, columnspan=3, sticky=(W, E))
+def violatesBCNF(closure_engine: AttributeClosure, t_mask: int, fd_mask: tuple):
+    '''
+    Indica si la dependencia fd_mask impide la FNBC: no es trivial y su lado
+    izquierdo no es superllave, es decir, su cierre no es todo T. Es la misma
+    prueba que usa RelationDecomposer.decomposeBCNF
+    '''
+    lhs_mask, rhs_mask = fd_mask
+    return bool(rhs_mask & ~lhs_mask) and closure_engine.calculateMask(lhs_mask) != t_mask
 
-        for child in self.mainframe.winfo_children():
-            child.grid_configure(padx=15, pady=15)
 
-        file_entry.focus()
-        self.root.bind('<Return>', self.onCheckClic)
+def iterateBCNFViolations(closure_engine: AttributeClosure, t_mask: int, fd_mask_list: list):
+    '''
+    Generador de las dependencias de fd_mask_list que impiden la FNBC. Como
+    el lado izquierdo no es superllave, no contiene a ninguna llave
+    candidata y cualquiera de ellas sirve de testigo
+    '''
+    for fd_mask in fd_mask_list:
+        if violatesBCNF(closure_engine, t_mask, fd_mask):
+            yield fd_mask
 
-        self.root.mainloop()
 
-    def onRadioBtnClic(self):
-        if self.input_option.get() == 1:
-            self.manual_entry_lset.configure(state=DISABLED)
-            self.manual_entry_tset.configure(state=DISABLED)
-        elif self.input_option.get() == 2:
-            self.manual_entry_lset.configure(state=NORMAL)
-            self.manual_entry_tset.configure(state=NORMAL)
-        else:
-            self.input_option.set(1)
-
-    def onCheckClic(self):
-        if self.input_option.get() == 1:
-            file_name = self.file_name.get()
-        elif self.input_option.get() == 2:
-            if not self.manual_lset.get():
-                self.message.set("Debe ingresar información válida en la caja de L set.")
-                return
-            if not self.manual_tset.get():
-                self.message.set("Debe ingresar información válida en la caja de T set.")
-                return
-            l_set = set()
-            t_set = set()
-            try:
-                for char in self.manual_tset.get():
-                    if char.isalpha():
-                        t_set.add(char.upper())
-                str_split_comma = self.manual_lset.get().split(",")
-                for word in str_split_comma:
-                    fd = ["", ""]
-                    str_split_arrow = word.split("->")
-                    if len(str_split_arrow) != 2:
-                        self.message.set("Debe ingresar información válida en la caja de L set. Error en la DF " + word)
-                        return
-                    for i in range(2):
-                        for char in str_split_arrow[i]:
-                            if char.isalpha():
-                                fd[i] += char.upper()
-                    l_set.add(tuple(fd))
-            except Exception:
-                self.message.set("Debe ingresar información válida en la caja de L set y T set.")
-                return
-            relation = RelationModel()
-            relation.l_set = l_set
-            relation.t_set = t_set
-            file_name = "json/temp.json"
-            relation.saveAsJson(file_name)
-        else:
-            self.input_option.set(1)
-            self.onRadioBtnClic()
-            return
-        if file_name:
-            try:
-                normal_forms = NormalFormsChecker(file_name)
-                if self.nf_choice.get() == self.nf_list[0]:
-                    if normal_forms.is_2nf:
-                        self.message.set("Está en 2 Forma Normal")
-                    else:
-                        self.message.set("NO Está en 2 Forma Normal")
-                elif self.nf_choice.get() == self.nf_list[1]:
-                    if normal_forms.is_3nf:
-                        self.message.set("Está en 3 Forma Normal")
-                    else:
-                        self.message.set("NO Está en 3 Forma Normal")
-                elif self.nf_choice.get() == self.nf_list[2]:
-                    if normal_forms.is_bc_nf:
-                        self.message.set("Está en Boyce-Codd Forma Normal")
-                    else:
-                        self.message.set("NO Está en Boyce-Codd Forma Normal")
-                else:
-                    self.message.set("Not a valid normal form")
-            except Exception as ex:
-                self.message.set("It was not possible to open the file " + str(ex))
-        else:
-            self.message.set("Not file found")
-
-    def onExamineClic(self):
-        file_name = askopenfilename(initialdir=self.last_init_dir,
-                           filetypes =(("JSONFile", "*.json"),("All Files","*.*")),
-                           title = "Choose a file.")
-        self.last_init_dir = os.path.split(file_name)[0]
-        if self.input_option.get() == 1:
-            self.file_name.set(file_name)
-        elif self.input_option.get() == 2:
-            relation = RelationModel()
-            try:
-                data = dict()
-                with open(file_name) as file:
-                    data = json.load(file)
-                relation.loadSetsFromJson(data)
-                self.manual_lset.set("")
-                self.manual_tset.set(''.join(relation.t_set))
-                l_set = ""
-                for fd in relation.l_set:
-                    l_set += "," + fd[0] + "->" + fd[1]
-                self.manual_lset.set(l_set[1:])
-            except Exception as ex:
-                self.message.set("El archivo no continue información válida")
+class NormalFormViolation:
+    '''
+    Dependencia que impide una forma normal, con el testigo que lo muestra:
+        2FN: la parte del lado izquierdo de la que ya depende el lado derecho
+        3FN: una llave candidata, que determina al lado izquierdo sin que
+            este la determine
+        FNBC: una llave candidata, que el lado izquierdo no contiene porque
+            no es superllave
+    '''
+    def __init__(self, normal_form: str, func_dep: tuple, witness: frozenset):
+        self.normal_form = normal_form
+        self.func_dep = func_dep
+        self.witness = witness
+
+    def describe(self):
+        lhs = attributesToStr(self.func_dep[0])
+        rhs = attributesToStr(self.func_dep[1])
+        witness = attributesToStr(self.witness)
+        if self.normal_form == "2FN":
+            return "{0}->{1}: {1} depende solo de {2}, una parte de {0}".format(lhs, rhs, witness)
+        if self.normal_form == "3FN":
+            return "{0}->{1}: {0} no es superllave y {1} no es primo; {2}->{0}->{1} con la llave {2}".format(
+                lhs, rhs, witness)
+        return "{0}->{1}: {0} no es superllave, no contiene a la llave {2}".format(lhs, rhs, witness)
+
+    def toDict(self):
+        return {"normal_form": self.normal_form,
+                "fd": [attributesToJson(self.func_dep[0]), attributesToJson(self.func_dep[1])],
+                "witness": attributesToJson(self.witness),
+                "description": self.describe()}
+
+
+def parseManualRelation(t_text: str, l_text: str):
+    '''
+    Construye una relación a partir de la entrada manual de la interfaz.
+    t_text: conjunto T. "ABCDEF" para atributos de un carácter, o nombres
+        separados por comas o espacios: "customer_id, order_id, total".
+    l_text: conjunto L, con las dependencias separadas por comas: "ABC->D,BE->F".
+        Con nombres de varios caracteres los atributos de cada lado se
+        separan con espacios: "customer_id order_id->total, customer_id->name".
+
+    En el formato de un carácter se ignoran los símbolos que no son letras
+    y se pasan las letras a mayúsculas. El formato se decide con los nombres:
+    es de un carácter si todos los nombres de T lo son, o si T es un solo
+    nombre que no aparece como tal en L ("ABCDEF" con "AB->C"); así un
+    solo atributo de varios caracteres ("Nombre" con "Nombre->Nombre") no
+    se separa en letras. Lanza ValueError si la entrada no es válida.
+    '''
+    name_list = [name for name in re.split(r"[,\s]+", t_text) if name]
+    l_name_set = set(name for side in re.split(r",|->", l_text) for name in side.split())
+    is_single_char = all(len(name) == 1 for name in name_list) or (
+        len(name_list) == 1 and not l_name_set <= set(name_list))
+    relation = RelationModel()
+    if is_single_char:
+        relation.t_set = set(char.upper() for char in t_text if char.isalpha())
+    else:
+        relation.t_set = set(name_list)
+    if not relation.t_set:
+        raise ValueError("Debe ingresar información válida en la caja de T set.")
+    for word in l_text.split(","):
+        str_split_arrow = word.split("->")
+        if len(str_split_arrow) != 2:
+            raise ValueError("Debe ingresar información válida en la caja de L set. Error en la DF " + word)
+        if is_single_char:
+            fd = tuple(frozenset(char.upper() for char in side if char.isalpha()) for side in str_split_arrow)
         else:
-            self.input_option.set(1)
-            self.onRadioBtnClic()
-
-
-
-    def resetMessage(self, value):
-        self.message.set("")
-
-if __name__ == "__main__":
-    wgui = NormalFormsGUI()
+            fd = tuple(frozenset(side.split()) for side in str_split_arrow)
+        relation.l_set.add(fd)
+    return relation
 
 
+def formatManualRelation(relation: RelationModel):
+    '''
+    Retorna las cadenas (T, L) de la relación en el formato de la entrada
+    manual de la interfaz, inverso de parseManualRelation
+    '''
+    fd_list = sorted(attributesToStr(fd[0]) + "->" + attributesToStr(fd[1]) for fd in relation.l_set)
+    if all(len(attr) == 1 for attr in relation.t_set):
+        return attributesToStr(relation.t_set), ",".join(fd_list)
+    return ", ".join(sorted(relation.t_set)), ", ".join(fd_list)
+
+
+def __getattr__(name: str):
+    # La interfaz gráfica se importa solo cuando se usa, para no cargar tkinter
+    if name == "NormalFormsGUI":
+        from Include.GUI import NormalFormsGUI
+        return NormalFormsGUI
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
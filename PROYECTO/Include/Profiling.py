@@ -0,0 +1,217 @@
+'''
+Instrumentación del análisis. Mientras hay una colección activa (enable o
+collectStats), las etapas del análisis registran en un AnalysisStats su
+tiempo y sus contadores. Sin colección activa, cada punto de medición solo
+revisa la variable active_stats, así que el costo es casi nulo y se puede
+activar y desactivar en cualquier momento:
+
+    with collectStats(trace_memory=True, profile_path="analisis.prof") as stats:
+        NormalFormsChecker(relation=relation)
+    print(stats.describe())
+
+El perfil de cProfile se guarda en el formato de pstats
+(python -m pstats analisis.prof) y solo cubre el hilo que activó la
+colección.
+'''
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+active_stats = None
+
+COUNTER_DESCRIPTIONS = collections.OrderedDict((
+    ("closure_calls", "cierres calculados con LinClosure"),
+    ("closure_iterations", "atributos alcanzados por esos cierres"),
+    ("redundancy_tests", "pruebas de dependencia redundante"),
+    ("key_levels", "niveles de la búsqueda de llaves"),
+    ("key_sets_tested", "conjuntos revisados en la búsqueda de llaves"),
+    ("key_sets_pruned_superkey", "descartados por contener una llave"),
+    ("key_sets_pruned_unreachable", "descartados porque no alcanzan T"),
+    ("key_extensions_skipped", "atributos no agregados por estar en el cierre"),
+    ("keys_found", "llaves candidatas encontradas"),
+    ("discovery_levels", "niveles del descubrimiento de dependencias"),
+    ("discovery_partitions", "particiones calculadas en el descubrimiento"),
+    ("discovery_fd_tests", "dependencias probadas en el descubrimiento"),
+))
+
+
+class AnalysisStats:
+    '''
+    Resultado de una colección:
+        stage_times: segundos por etapa, acumulados si la etapa se repite.
+            "cover" y sus fases "cover.split", "cover.left" y
+            "cover.redundant", "keys" y "normal_forms"; "discovery.read" y
+            "discovery.search" en Include.Discovery
+        counters: contadores de COUNTER_DESCRIPTIONS
+        wall_time: segundos entre enable y disable
+        peak_memory: pico de memoria (bytes) registrado por tracemalloc,
+            si se pidió trace_memory
+        peak_rss: pico de memoria del proceso (bytes), si el sistema lo
+            informa. Es el máximo desde que empezó el proceso
+        profiler: el cProfile.Profile, si se pidió el perfil
+    '''
+    def __init__(self):
+        self.stage_times = collections.OrderedDict()
+        self.counters = collections.Counter()
+        self.wall_time = None
+        self.peak_memory = None
+        self.peak_rss = None
+        self.profiler = None
+        self.trace_memory = False
+        self.start_time = time.perf_counter()
+
+    def addTime(self, name: str, seconds: float):
+        self.stage_times[name] = self.stage_times.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def measure(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.addTime(name, time.perf_counter() - start)
+
+    def countClosure(self, closure_mask: int):
+        self.counters["closure_calls"] += 1
+        self.counters["closure_iterations"] += bin(closure_mask).count("1")
+
+    def merge(self, other):
+        '''
+        Suma a estas estadísticas las de other (AnalysisStats o su toDict)
+        '''
+        if isinstance(other, AnalysisStats):
+            other = other.toDict()
+        for name, seconds in other["stage_times"].items():
+            self.addTime(name, seconds)
+        self.counters.update(other["counters"])
+        for name in ("peak_memory", "peak_rss"):
+            if other.get(name) is not None:
+                setattr(self, name, max(getattr(self, name) or 0, other[name]))
+
+    def toDict(self):
+        return {"stage_times": dict(self.stage_times),
+                "counters": dict(self.counters),
+                "wall_time": self.wall_time,
+                "peak_memory": self.peak_memory,
+                "peak_rss": self.peak_rss}
+
+    def dump(self, json_path: str):
+        with open(json_path, "w") as file:
+            json.dump(self.toDict(), file, indent=2)
+
+    def dumpProfile(self, profile_path: str):
+        if self.profiler is None:
+            raise ValueError("La colección no tenía activado el perfil")
+        self.profiler.dump_stats(profile_path)
+
+    def profileSummary(self, limit: int = 20):
+        '''
+        Las limit funciones con más tiempo acumulado según el perfil
+        '''
+        if self.profiler is None:
+            return ""
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+    def describe(self):
+        '''
+        Texto con las etapas, los contadores y la memoria
+        '''
+        line_list = []
+        for name, seconds in self.stage_times.items():
+            line_list.append("{0:<28} {1:>12.4f} s".format(name, seconds))
+        for name, description in COUNTER_DESCRIPTIONS.items():
+            if name in self.counters:
+                line_list.append("{0:<28} {1:>12} {2}".format(name, self.counters[name], description))
+        for name, value in (("peak_memory", self.peak_memory), ("peak_rss", self.peak_rss)):
+            if value is not None:
+                line_list.append("{0:<28} {1:>12.2f} MB".format(name, value / 2 ** 20))
+        return "\n".join(line_list)
+
+
+def stage(name: str):
+    '''
+    Administrador de contexto que mide la etapa name si hay una colección
+    activa
+    '''
+    if active_stats is None:
+        return contextlib.nullcontext()
+    return active_stats.measure(name)
+
+
+def addStageTimes(prefix: str, time_dict: dict):
+    if active_stats is not None:
+        for name, seconds in time_dict.items():
+            active_stats.addTime(prefix + name, seconds)
+
+
+def count(name: str, value: int = 1):
+    if active_stats is not None:
+        active_stats.counters[name] += value
+
+
+def enable(trace_memory: bool = False, profile: bool = False):
+    '''
+    Inicia una colección y la retorna. trace_memory activa tracemalloc
+    (hace el análisis varias veces más lento); profile activa cProfile
+    '''
+    global active_stats
+    if active_stats is not None:
+        raise RuntimeError("Ya hay una colección de estadísticas activa")
+    stats = AnalysisStats()
+    stats.trace_memory = trace_memory and not tracemalloc.is_tracing()
+    if stats.trace_memory:
+        tracemalloc.start()
+    if profile:
+        stats.profiler = cProfile.Profile()
+        stats.profiler.enable()
+    active_stats = stats
+    return stats
+
+
+def disable():
+    '''
+    Termina la colección activa y la retorna, o None si no había una
+    '''
+    global active_stats
+    stats = active_stats
+    if stats is None:
+        return None
+    active_stats = None
+    if stats.profiler is not None:
+        stats.profiler.disable()
+    stats.wall_time = time.perf_counter() - stats.start_time
+    if stats.trace_memory:
+        stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        stats.peak_rss = max_rss if sys.platform == "darwin" else max_rss * 1024
+    return stats
+
+
+@contextlib.contextmanager
+def collectStats(trace_memory: bool = False, profile_path: str = None):
+    '''
+    Colección de estadísticas durante el bloque with. Con profile_path se
+    activa cProfile y el perfil se guarda en ese archivo al salir
+    '''
+    stats = enable(trace_memory, profile_path is not None)
+    try:
+        yield stats
+    finally:
+        disable()
+        if profile_path is not None:
+            stats.dumpProfile(profile_path)
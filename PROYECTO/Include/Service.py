@@ -0,0 +1,359 @@
+'''
+Servicio local de análisis. AnalysisService recibe relaciones en memoria
+(RelationModel) desde corutinas de asyncio, las agrupa en lotes y las
+analiza en un grupo de procesos:
+
+    async with AnalysisService(worker_num=4) as service:
+        result = await service.analyze(relation)
+
+Las relaciones idénticas (misma relationFingerprint) que ya están en
+proceso no se analizan otra vez: todas las solicitudes esperan el mismo
+resultado. La cola de relaciones por analizar tiene un tamaño máximo
+(max_pending); cuando se llena, analyze espera a que haya lugar, y el
+servidor deja de leer solicitudes de esa conexión mientras tanto.
+
+JsonRpcServer expone el servicio como JSON-RPC 2.0 sobre HTTP, sin
+dependencias externas (python main.py --serve 8765). Por defecto solo
+escucha en 127.0.0.1:
+    POST /   {"jsonrpc": "2.0", "id": 1, "method": "analyze",
+              "params": {"relation": {"t_set": [...], "l_set": [...]}}}
+             también acepta un arreglo de llamadas (lote de JSON-RPC)
+    GET /stats   estadísticas del servicio
+Métodos: "analyze" (params: la relación, {"relation": relación} o
+[relación]) y "stats". El resultado de "analyze" tiene el formato de una
+línea del modo por lotes, sin "source".
+'''
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import sys
+
+from Include.Batch import analyzeRelation
+from Include.Cache import relationFingerprint
+from Include.Loader import RelationLoadError, parseRelation
+from Include.Models import RelationModel
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_BATCH_DELAY = 0.005
+DEFAULT_MAX_PENDING = 1024
+MAX_BODY_BYTES = 16 * 2 ** 20
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+ANALYSIS_ERROR = -32000
+
+HTTP_REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large"}
+
+
+def analyzeRelationList(relation_list: list, cache_path: str = None, cache_max_bytes: int = None,
+                        key_limit: int = None):
+    '''
+    Analiza en este proceso las relaciones de relation_list y retorna la
+    lista de sus resultados (ver Batch.analyzeRelation), en el mismo orden.
+    Es la tarea que el servicio envía a cada proceso trabajador
+    '''
+    result_list = []
+    for relation in relation_list:
+        result = analyzeRelation((None, relation), cache_path, cache_max_bytes, key_limit=key_limit)
+        del result["source"]
+        result_list.append(result)
+    return result_list
+
+
+class AnalysisError(Exception):
+    '''
+    La relación no se pudo analizar; el mensaje es el "error" del resultado
+    '''
+
+
+class AnalysisService:
+    '''
+    Análisis asíncrono de relaciones en lotes, con worker_num procesos.
+    Cada lote reúne hasta batch_size relaciones: las que estaban en la cola
+    cuando se liberó un proceso más las que llegan en los siguientes
+    batch_delay segundos. Hay a lo sumo dos lotes por proceso en curso, así
+    que con los procesos ocupados la cola crece y los lotes se agrandan.
+
+    cache_path y cache_max_bytes se entregan a Batch.analyzeRelation para
+    usar el caché de resultados en disco, y key_limit para reportar a lo
+    sumo esa cantidad de llaves candidatas sin enumerarlas todas.
+    '''
+    def __init__(self, worker_num: int = 1, batch_size: int = DEFAULT_BATCH_SIZE,
+                 batch_delay: float = DEFAULT_BATCH_DELAY, max_pending: int = DEFAULT_MAX_PENDING,
+                 cache_path: str = None, cache_max_bytes: int = None, key_limit: int = None):
+        self.worker_num = worker_num
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending
+        self.cache_path = cache_path
+        self.cache_max_bytes = cache_max_bytes
+        self.key_limit = key_limit
+        self.executor = None
+        self.queue = None
+        self.batch_semaphore = None
+        self.dispatch_task = None
+        self.batch_task_set = set()
+        self.in_flight_dict = {}
+        self.request_num = 0
+        self.deduplicated_num = 0
+        self.batch_num = 0
+        self.analyzed_num = 0
+        self.error_num = 0
+        self.max_batch_len = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.worker_num)
+        self.queue = asyncio.Queue(self.max_pending)
+        self.batch_semaphore = asyncio.Semaphore(self.worker_num * 2)
+        self.dispatch_task = asyncio.create_task(self.__dispatch())
+
+    async def close(self):
+        '''
+        Detiene el servicio. Las solicitudes que aún no terminaron reciben
+        asyncio.CancelledError
+        '''
+        if self.dispatch_task is None:
+            return
+        self.dispatch_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self.dispatch_task
+        self.dispatch_task = None
+        for task in list(self.batch_task_set):
+            task.cancel()
+        await asyncio.gather(*self.batch_task_set, return_exceptions=True)
+        for future in self.in_flight_dict.values():
+            future.cancel()
+        self.in_flight_dict.clear()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def analyze(self, relation: RelationModel):
+        '''
+        Resultado del análisis de la relación (diccionario con el formato de
+        Batch.normalFormsToDict). Lanza AnalysisError si no se pudo analizar
+        '''
+        self.request_num += 1
+        fingerprint = relationFingerprint(relation)
+        future = self.in_flight_dict.get(fingerprint)
+        if future is not None:
+            self.deduplicated_num += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self.in_flight_dict[fingerprint] = future
+            try:
+                await self.queue.put((fingerprint, relation))
+            except BaseException:
+                del self.in_flight_dict[fingerprint]
+                future.cancel()
+                raise
+        result = await asyncio.shield(future)
+        if "error" in result:
+            raise AnalysisError(result["error"])
+        return result
+
+    def getStats(self):
+        return {"requests": self.request_num,
+                "deduplicated": self.deduplicated_num,
+                "batches": self.batch_num,
+                "analyzed": self.analyzed_num,
+                "errors": self.error_num,
+                "max_batch": self.max_batch_len,
+                "queued": self.queue.qsize() if self.queue is not None else 0,
+                "in_flight": len(self.in_flight_dict),
+                "workers": self.worker_num}
+
+    async def __dispatch(self):
+        while True:
+            await self.batch_semaphore.acquire()
+            try:
+                batch_list = [await self.queue.get()]
+                self.__drainQueue(batch_list)
+                if len(batch_list) < self.batch_size and self.batch_delay > 0:
+                    await asyncio.sleep(self.batch_delay)
+                    self.__drainQueue(batch_list)
+            except BaseException:
+                self.batch_semaphore.release()
+                raise
+            task = asyncio.create_task(self.__runBatch(batch_list))
+            self.batch_task_set.add(task)
+            task.add_done_callback(self.batch_task_set.discard)
+
+    def __drainQueue(self, batch_list: list):
+        while len(batch_list) < self.batch_size and not self.queue.empty():
+            batch_list.append(self.queue.get_nowait())
+
+    async def __runBatch(self, batch_list: list):
+        self.batch_num += 1
+        self.max_batch_len = max(self.max_batch_len, len(batch_list))
+        try:
+            result_list = await asyncio.get_running_loop().run_in_executor(
+                self.executor, analyzeRelationList, [relation for _, relation in batch_list], self.cache_path,
+                self.cache_max_bytes, self.key_limit)
+        except Exception as ex:
+            result_list = [{"error": "{0}: {1}".format(type(ex).__name__, ex)}] * len(batch_list)
+        finally:
+            self.batch_semaphore.release()
+        for (fingerprint, _), result in zip(batch_list, result_list):
+            self.analyzed_num += 1
+            if "error" in result:
+                self.error_num += 1
+            future = self.in_flight_dict.pop(fingerprint, None)
+            if future is not None and not future.done():
+                future.set_result(result)
+
+
+def rpcError(call_id, code: int, message: str):
+    return {"jsonrpc": "2.0", "id": call_id, "error": {"code": code, "message": message}}
+
+
+def relationFromParams(params):
+    '''
+    RelationModel de los parámetros de "analyze": la relación misma,
+    {"relation": relación} o [relación]. Lanza RelationLoadError
+    '''
+    if isinstance(params, list) and len(params) == 1:
+        params = params[0]
+    elif isinstance(params, dict) and "relation" in params:
+        params = params["relation"]
+    return parseRelation(params)
+
+
+class JsonRpcServer:
+    '''
+    Servidor HTTP/1.1 mínimo para AnalysisService. Cada conexión atiende
+    sus solicitudes una tras otra (keep-alive); las conexiones se atienden
+    en paralelo
+    '''
+    def __init__(self, service: AnalysisService):
+        self.service = service
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = 0):
+        '''
+        Empieza a escuchar y retorna el asyncio.Server. Con port 0 el
+        sistema elige el puerto (ver server.sockets)
+        '''
+        return await asyncio.start_server(self.handleConnection, host, port)
+
+    async def handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(None, 2)
+                header_dict = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    header_dict[name.strip().lower()] = value.strip()
+                body_len = int(header_dict.get("content-length", 0))
+                if body_len > MAX_BODY_BYTES:
+                    await self.__writeResponse(writer, 413, {"error": "La solicitud es demasiado grande"}, False)
+                    break
+                body = await reader.readexactly(body_len)
+                keep_alive = (version.strip() == "HTTP/1.1" and
+                              header_dict.get("connection", "").lower() != "close")
+                status, payload = await self.handleRequest(method, target, body)
+                await self.__writeResponse(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def handleRequest(self, method: str, target: str, body: bytes):
+        '''
+        Retorna (estado HTTP, contenido Json o None)
+        '''
+        path = target.split("?", 1)[0]
+        if path == "/stats":
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, self.service.getStats()
+        if path not in ("/", "/rpc"):
+            return 404, {"error": "No existe {0}".format(path)}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+        try:
+            message = json.loads(body)
+        except ValueError as ex:
+            return 200, rpcError(None, PARSE_ERROR, str(ex))
+        if isinstance(message, list):
+            if not message:
+                return 200, rpcError(None, INVALID_REQUEST, "El lote está vacío")
+            response_list = await asyncio.gather(*(self.handleCall(call) for call in message))
+            response_list = [response for response in response_list if response is not None]
+            return (200, response_list) if response_list else (204, None)
+        response = await self.handleCall(message)
+        return (200, response) if response is not None else (204, None)
+
+    async def handleCall(self, call):
+        '''
+        Respuesta JSON-RPC de una llamada, o None si es una notificación
+        '''
+        if not isinstance(call, dict) or call.get("jsonrpc") != "2.0" or not isinstance(call.get("method"), str):
+            return rpcError(call.get("id") if isinstance(call, dict) else None, INVALID_REQUEST,
+                            "Se esperaba una llamada JSON-RPC 2.0")
+        call_id = call.get("id")
+        try:
+            if call["method"] == "analyze":
+                result = await self.service.analyze(relationFromParams(call.get("params")))
+            elif call["method"] == "stats":
+                result = self.service.getStats()
+            else:
+                response = rpcError(call_id, METHOD_NOT_FOUND, "Método desconocido: {0}".format(call["method"]))
+                return response if "id" in call else None
+        except RelationLoadError as ex:
+            response = rpcError(call_id, INVALID_PARAMS, str(ex))
+        except AnalysisError as ex:
+            response = rpcError(call_id, ANALYSIS_ERROR, str(ex))
+        else:
+            response = {"jsonrpc": "2.0", "id": call_id, "result": result}
+        return response if "id" in call else None
+
+    async def __writeResponse(self, writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        header_list = ["HTTP/1.1 {0} {1}".format(status, HTTP_REASONS[status]),
+                       "Content-Length: {0}".format(len(body)),
+                       "Connection: {0}".format("keep-alive" if keep_alive else "close")]
+        if payload is not None:
+            header_list.append("Content-Type: application/json")
+        writer.write(("\r\n".join(header_list) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def runServer(host: str = DEFAULT_HOST, port: int = 0, worker_num: int = 1, cache_path: str = None,
+                    cache_max_bytes: int = None, key_limit: int = None):
+    async with AnalysisService(worker_num, cache_path=cache_path, cache_max_bytes=cache_max_bytes,
+                               key_limit=key_limit) as service:
+        server = await JsonRpcServer(service).start(host, port)
+        async with server:
+            address = server.sockets[0].getsockname()
+            print("Servicio de análisis en http://{0}:{1}/".format(address[0], address[1]), file=sys.stderr)
+            await server.serve_forever()
+
+
+def serve(host: str = DEFAULT_HOST, port: int = 0, worker_num: int = 1, cache_path: str = None,
+          cache_max_bytes: int = None, key_limit: int = None):
+    '''
+    Ejecuta el servicio JSON-RPC hasta que se interrumpe con Ctrl+C
+    '''
+    try:
+        asyncio.run(runServer(host, port, worker_num, cache_path, cache_max_bytes, key_limit))
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,198 @@
+from Include.Models import (AttributeClosure, CanonicalCover, NormalFormsChecker, RelationModel, check3NFMasks,
+                            containsKey, iterateKeysFromSeeds, keysUnionMask, toAttributeSet, violates2NF)
+
+
+class AnalysisSession:
+    '''
+    Sesión de análisis de larga duración para revisar un esquema
+    dependencia por dependencia. El análisis completo (cobertura mínima,
+    llaves candidatas y formas normales) se hace una sola vez al crear la
+    sesión; addFD y removeFD lo actualizan de forma incremental:
+
+    - Si la dependencia agregada o quitada se deduce de las demás, los
+      cierres no cambian: se conservan la cobertura mínima, las llaves, la
+      3 FN y el caché de cierres, y solo se revisa esa dependencia para la
+      2 FN y la FNBC.
+    - Si los cierres cambian por agregar o quitar X -> Y, solo cambian los
+      que contienen a X. Las dependencias de la cobertura mínima cuyo
+      cierre no contiene a X pasan sin revisarse a la nueva cobertura, que
+      se calcula a partir de ellas y de las demás: al agregar, las de la
+      cobertura anterior más la nueva dependencia; al quitar, las de L cuyo
+      cierre contenía a X. El caché de cierres se conserva salvo los que
+      contienen a X, las llaves se obtienen con el algoritmo de Lucchesi y
+      Osborn a partir de las llaves anteriores y solo se revisan de nuevo
+      las dependencias de L cuyo cierre contenía a X.
+
+    Las dependencias que impiden la 2 FN y la FNBC se guardan en
+    violation_2nf y violation_bcnf, para que quitar una dependencia no
+    obligue a revisar todas las demás.
+    '''
+    def __init__(self, relation: RelationModel, worker_num: int = 1):
+        self.relation = RelationModel()
+        self.relation.t_set = set(relation.t_set)
+        self.relation.l_set = set(relation.l_set)
+        normal_forms = NormalFormsChecker(relation=self.relation, worker_num=worker_num)
+        self.attr_table = normal_forms.attr_table
+        self.t_mask = normal_forms.t_mask
+        self.closure_engine = normal_forms.closure_engine
+        self.candidate_key_masks = list(normal_forms.candidates_keys.candidate_key_masks)
+        self.fd_mask_dict = {}
+        for func_dep in self.relation.l_set:
+            self.fd_mask_dict[func_dep] = self.attr_table.encodeFD(func_dep)
+        self.__checkAllFD()
+
+    @property
+    def l_set(self):
+        return self.relation.l_set
+
+    @property
+    def irreducible_l_set(self):
+        return self.attr_table.decodeFDs(self.closure_engine.fd_mask_list)
+
+    @property
+    def candidate_keys(self):
+        return set(self.attr_table.decodeFrozen(key_mask) for key_mask in self.candidate_key_masks)
+
+    @property
+    def is_2nf(self):
+        return not self.violation_2nf
+
+    @property
+    def is_3nf(self):
+        return self.is_2nf and self.is_3nf_closure
+
+    @property
+    def is_bc_nf(self):
+        return self.is_3nf and not self.violation_bcnf
+
+    def addFD(self, func_dep: tuple):
+        '''
+        Agrega la dependencia func_dep = (lado izquierdo, lado derecho) y
+        actualiza el análisis. Lanza ValueError si usa atributos fuera de T
+        '''
+        func_dep = self.__normalizeFD(func_dep)
+        if func_dep in self.relation.l_set:
+            return
+        fd_mask = self.attr_table.encodeFD(func_dep)
+        if not self.closure_engine.impliesMask(*fd_mask):
+            fixed_list, changed_list = self.__splitByClosure(self.closure_engine.fd_mask_list, fd_mask[0])
+            checked_list = self.__changedFDs(fd_mask[0])
+            self.__updateClosures(fd_mask[0], fixed_list, changed_list + [fd_mask], checked_list, True)
+        self.relation.l_set.add(func_dep)
+        self.fd_mask_dict[func_dep] = fd_mask
+        self.__checkFD(func_dep)
+
+    def removeFD(self, func_dep: tuple):
+        '''
+        Quita la dependencia func_dep de L y actualiza el análisis.
+        Lanza ValueError si func_dep no está en L
+        '''
+        func_dep = self.__normalizeFD(func_dep)
+        if func_dep not in self.relation.l_set:
+            raise ValueError("La dependencia no está en el conjunto L")
+        lhs_mask, rhs_mask = self.fd_mask_dict.pop(func_dep)
+        self.relation.l_set.discard(func_dep)
+        self.violation_2nf.discard(func_dep)
+        self.violation_bcnf.discard(func_dep)
+        fixed_list, _ = self.__splitByClosure(self.closure_engine.fd_mask_list, lhs_mask)
+        checked_list = self.__changedFDs(lhs_mask)
+        changed_list = [self.fd_mask_dict[changed_fd] for changed_fd in checked_list]
+        # Las dependencias de la cobertura cuyos cierres no cambian se deducen
+        # de L sin func_dep, y junto con changed_list deducen al resto de L
+        remaining_engine = AttributeClosure.fromFDMasks(fixed_list + changed_list, cache_size=0)
+        if remaining_engine.impliesMask(lhs_mask, rhs_mask):
+            return
+        self.__updateClosures(lhs_mask, fixed_list, changed_list, checked_list, False)
+
+    def __splitByClosure(self, fd_mask_list, attr_mask: int):
+        '''
+        Separa las dependencias de fd_mask_list en las que el cierre actual
+        de su lado izquierdo no contiene a attr_mask y las que sí. Al agregar
+        o quitar una dependencia con lado izquierdo attr_mask, solo pueden
+        cambiar los cierres de las segundas
+        '''
+        fixed_list = []
+        changed_list = []
+        for fd_mask in fd_mask_list:
+            if not self.closure_engine.impliesMask(fd_mask[0], attr_mask):
+                fixed_list.append(fd_mask)
+            else:
+                changed_list.append(fd_mask)
+        return fixed_list, changed_list
+
+    def __changedFDs(self, attr_mask: int):
+        '''
+        Dependencias de L cuyo cierre del lado izquierdo contiene a attr_mask
+        '''
+        return [func_dep for func_dep, fd_mask in self.fd_mask_dict.items()
+                if self.closure_engine.impliesMask(fd_mask[0], attr_mask)]
+
+    def __normalizeFD(self, func_dep: tuple):
+        if len(func_dep) != 2:
+            raise ValueError("Una dependencia funcional debe tener lado izquierdo y lado derecho")
+        func_dep = tuple(toAttributeSet(side, self.relation.t_set) for side in func_dep)
+        if not func_dep[0].union(func_dep[1]).issubset(self.relation.t_set):
+            raise ValueError("La dependencia contiene atributos que no están en T")
+        return func_dep
+
+    def __updateClosures(self, attr_mask: int, fixed_list: list, changed_list: list, checked_list: list,
+                         is_added: bool):
+        '''
+        Actualiza el análisis cuando los cierres cambiaron por agregar o quitar
+        una dependencia con lado izquierdo attr_mask. fixed_list son las
+        dependencias de la cobertura mínima cuyos cierres no cambian: siguen
+        en la nueva cobertura sin revisarlas, y el resto se obtiene de
+        changed_list (ver CanonicalCover). El caché de cierres se conserva
+        salvo los que contienen a attr_mask; las llaves anteriores sirven de
+        semillas para las nuevas y solo se revisan de nuevo las dependencias
+        de L en checked_list, cuyos cierres pudieron cambiar.
+
+        Al agregar una dependencia (is_added) los cierres solo crecen, así que
+        una dependencia que impedía la 2 FN la sigue impidiendo y una que no
+        impedía la FNBC tampoco la impide; al quitarla ocurre lo contrario.
+        Solo se revisa de nuevo la otra mitad
+        '''
+        self.closure_engine.discardClosures(attr_mask)
+        CanonicalCover(changed_list, self.closure_engine, fixed_fd_masks=fixed_list, keep_cache=True)
+        self.candidate_key_masks = list(iterateKeysFromSeeds(self.closure_engine, self.t_mask, self.candidate_key_masks))
+        for func_dep in checked_list:
+            fd_mask = self.fd_mask_dict[func_dep]
+            if is_added:
+                if func_dep not in self.violation_2nf and violates2NF(self.closure_engine, fd_mask):
+                    self.violation_2nf.add(func_dep)
+                if func_dep in self.violation_bcnf and not self.__violatesBCNF(fd_mask):
+                    self.violation_bcnf.discard(func_dep)
+            else:
+                if func_dep in self.violation_2nf and not violates2NF(self.closure_engine, fd_mask):
+                    self.violation_2nf.discard(func_dep)
+                if func_dep not in self.violation_bcnf and self.__violatesBCNF(fd_mask):
+                    self.violation_bcnf.add(func_dep)
+        self.__check3NF()
+
+    def __checkAllFD(self):
+        self.violation_2nf = set()
+        self.violation_bcnf = set()
+        for func_dep in self.relation.l_set:
+            self.__checkFD(func_dep)
+        self.__check3NF()
+
+    def __check3NF(self):
+        self.key_union_mask = keysUnionMask(self.candidate_key_masks)
+        self.is_3nf_closure = check3NFMasks(self.closure_engine, self.t_mask, self.closure_engine.fd_mask_list,
+                                            self.key_union_mask)
+
+    def __checkFD(self, func_dep: tuple):
+        fd_mask = self.fd_mask_dict[func_dep]
+        if violates2NF(self.closure_engine, fd_mask):
+            self.violation_2nf.add(func_dep)
+        if self.__violatesBCNF(fd_mask):
+            self.violation_bcnf.add(func_dep)
+
+    def __violatesBCNF(self, fd_mask: tuple):
+        '''
+        Igual que violatesBCNF, pero como la sesión conoce todas las llaves
+        candidatas, el lado izquierdo es superllave si contiene alguna, sin
+        calcular su cierre
+        '''
+        lhs_mask, rhs_mask = fd_mask
+        return bool(rhs_mask & ~lhs_mask) and not containsKey(lhs_mask, self.candidate_key_masks)
@@ -0,0 +1,51 @@
+'''
+Compara el cierre de atributos por barrido completo de L
+(calculateAttributeClosure) con el motor LinClosure (AttributeClosure)
+sobre relaciones sintéticas de cientos de atributos y miles de
+dependencias funcionales.
+
+Uso: python benchmarks/bench_closure.py
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Models import AttributeClosure, calculateAttributeClosure
+
+
+def generateRelation(attr_num: int, fd_num: int, seed: int = 0):
+    '''
+    Genera una cadena A0->A1->...->An (el peor caso para el barrido
+    completo, pues cada pasada solo agrega un atributo) más dependencias
+    aleatorias con lados izquierdos de 2 a 4 atributos.
+    '''
+    rand = random.Random(seed)
+    attr_list = ["attr_{0}".format(i) for i in range(attr_num)]
+    l_set = set()
+    for i in range(attr_num - 1):
+        l_set.add((frozenset((attr_list[i],)), frozenset((attr_list[i + 1],))))
+    while len(l_set) < fd_num:
+        lhs = frozenset(rand.sample(attr_list, rand.randint(2, 4)))
+        l_set.add((lhs, frozenset((rand.choice(attr_list),))))
+    return attr_list, l_set
+
+
+def timeIt(function, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == "__main__":
+    print("{0:>6} {1:>6} {2:>12} {3:>12} {4:>12}".format("|T|", "|L|", "scan (s)", "compile (s)", "lin (s)"))
+    for attr_num in (100, 200, 400, 800):
+        attr_list, l_set = generateRelation(attr_num, attr_num * 10)
+        scan_time, scan_closure = timeIt(lambda: calculateAttributeClosure(attr_list[:1], l_set), 1)
+        compile_time, closure_engine = timeIt(lambda: AttributeClosure(l_set), 3)
+        lin_time, lin_closure = timeIt(lambda: closure_engine.calculate(attr_list[:1]), 20)
+        assert scan_closure == lin_closure
+        print("{0:>6} {1:>6} {2:>12.5f} {3:>12.5f} {4:>12.5f}".format(attr_num, len(l_set), scan_time, compile_time, lin_time))
@@ -0,0 +1,89 @@
+'''
+Compara el cálculo de la cobertura mínima anterior (tres pasadas sobre
+conjuntos de tuplas, recompilando el conjunto L para cada prueba de
+redundancia) con CanonicalCover, y muestra el tiempo de cada fase.
+
+Uso: python benchmarks/bench_cover.py
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Models import AttributeClosure, AttributeTable, CanonicalCover, iterateBits
+
+
+def legacyCover(L: set, attr_table: AttributeTable):
+    '''
+    Cobertura mínima como la calculaba IrreducibleFD antes de CanonicalCover
+    '''
+    func_dep = set()
+    for lhs, rhs in L:
+        for attr in rhs:
+            if attr not in lhs:
+                func_dep.add((lhs, frozenset((attr,))))
+    closure_engine = AttributeClosure(func_dep, attr_table)
+    l_set = set()
+    for element in func_dep:
+        if len(element[0]) == 1:
+            l_set.add(element)
+            continue
+        lhs_mask, rhs_mask = attr_table.encodeFD(element)
+        is_irreducible = False
+        while not is_irreducible:
+            is_irreducible = True
+            for bit in iterateBits(lhs_mask):
+                if not rhs_mask & ~closure_engine.calculateMask(lhs_mask & ~bit):
+                    lhs_mask &= ~bit
+                    is_irreducible = bin(lhs_mask).count("1") == 1
+                    break
+        l_set.add(attr_table.decodeFD((lhs_mask, rhs_mask)))
+    l_copy = l_set.copy()
+    for element in l_set:
+        l_copy.discard(element)
+        lhs_mask, rhs_mask = attr_table.encodeFD(element)
+        if rhs_mask & ~AttributeClosure(l_copy, attr_table).calculateMask(lhs_mask):
+            l_copy.add(element)
+    return l_copy
+
+
+def generateRelation(attr_num: int, fd_num: int, seed: int = 0):
+    '''
+    Dependencias de 1 a 3 atributos de índice menor hacia 1 o 2 atributos
+    de índice mayor, con muchas dependencias redundantes y atributos extraños
+    '''
+    rand = random.Random(seed)
+    attr_list = ["attr_{0}".format(i) for i in range(attr_num)]
+    l_set = set()
+    while len(l_set) < fd_num:
+        index = rand.randrange(1, attr_num)
+        lhs = frozenset(rand.sample(attr_list[:index], min(index, rand.randint(1, 3))))
+        rhs = frozenset(rand.sample(attr_list[index:], min(attr_num - index, rand.randint(1, 2))))
+        l_set.add((lhs, rhs))
+    return attr_list, l_set
+
+
+if __name__ == "__main__":
+    print("{0:>6} {1:>6} {2:>7} {3:>12} {4:>12} {5:>9} {6:>9} {7:>11}".format(
+        "|T|", "|L|", "|Lmin|", "anterior (s)", "nuevo (s)", "split", "left", "redundant"))
+    for attr_num, fd_num in ((100, 1000), (200, 2000), (400, 4000), (800, 8000)):
+        attr_list, l_set = generateRelation(attr_num, fd_num)
+        attr_table = AttributeTable(attr_list)
+        start = time.perf_counter()
+        canonical_cover = CanonicalCover(attr_table.encodeFDs(l_set))
+        new_time = time.perf_counter() - start
+        if fd_num <= 4000:
+            start = time.perf_counter()
+            legacy_cover = legacyCover(l_set, attr_table)
+            legacy_time = time.perf_counter() - start
+            legacy_engine = AttributeClosure(legacy_cover, attr_table)
+            for lhs_mask, rhs_mask in canonical_cover.fd_mask_list:
+                assert not rhs_mask & ~legacy_engine.calculateMask(lhs_mask)
+        else:
+            legacy_time = float("nan")
+        phase_times = canonical_cover.phase_times
+        print("{0:>6} {1:>6} {2:>7} {3:>12.4f} {4:>12.4f} {5:>9.4f} {6:>9.4f} {7:>11.4f}".format(
+            attr_num, fd_num, len(canonical_cover.fd_mask_list), legacy_time, new_time,
+            phase_times["split"], phase_times["left"], phase_times["redundant"]))
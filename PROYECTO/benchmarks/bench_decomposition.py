@@ -0,0 +1,47 @@
+'''
+Mide la síntesis en 3 FN, la descomposición en FNBC y los verificadores
+de reunión sin pérdida y de preservación de dependencias
+(RelationDecomposer) sobre relaciones sintéticas grandes.
+
+Uso: python benchmarks/bench_decomposition.py
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Decomposition import RelationDecomposer
+from Include.Models import IrreducibleFD
+from generator import generateChain, generateCyclicKeys, generateLayered, generateRandom
+
+
+def timeIt(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    case_list = [("layered 100/400", lambda: generateLayered(100, 400)),
+                 ("layered 200/1000", lambda: generateLayered(200, 1000)),
+                 ("layered 400/2000", lambda: generateLayered(400, 2000)),
+                 ("random 200/800", lambda: generateRandom(200, 800, (1, 1))),
+                 ("random 400/1600", lambda: generateRandom(400, 1600, (1, 1))),
+                 ("chain 200", lambda: generateChain(200, 200)),
+                 ("cyclic 64 llaves", lambda: generateCyclicKeys(64, 192))]
+    print("{0:<18} {1:>6} {2:>10} {3:>7} {4:>10} {5:>7} {6:>12} {7:>12} {8:>12}".format(
+        "caso", "|L|", "3FN (s)", "esq.", "FNBC (s)", "esq.", "sin pérd.(s)", "preserva (s)", "proy. 3FN (s)"))
+    for name, generate in case_list:
+        relation = generate()
+        decomposer = RelationDecomposer(minimal_cover=IrreducibleFD(relation=relation))
+        synthesis_time, synthesis_list = timeIt(decomposer.synthesize3NF)
+        bcnf_time, bcnf_list = timeIt(decomposer.decomposeBCNF)
+        lossless_time, is_lossless = timeIt(lambda: decomposer.isLosslessJoin(synthesis_list) and
+                                            decomposer.isLosslessJoin(bcnf_list))
+        preserve_time, lost_set = timeIt(lambda: decomposer.lostDependencies(bcnf_list))
+        project_time, _ = timeIt(lambda: decomposer.toRelations(synthesis_list))
+        assert is_lossless and decomposer.preservesDependencies(synthesis_list)
+        print("{0:<18} {1:>6} {2:>10.4f} {3:>7} {4:>10.4f} {5:>7} {6:>12.4f} {7:>12.4f} {8:>12.4f}".format(
+            name, len(relation.l_set), synthesis_time, len(synthesis_list), bcnf_time, len(bcnf_list),
+            lossless_time, preserve_time, project_time))
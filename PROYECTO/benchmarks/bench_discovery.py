@@ -0,0 +1,64 @@
+'''
+Mide el descubrimiento de dependencias (Include/Discovery.py) sobre tablas
+CSV sintéticas, variando el número de filas y el de columnas. Cada tabla
+tiene columnas independientes de pocos valores y columnas calculadas a
+partir de otras, de modo que contiene dependencias conocidas.
+
+Uso: python benchmarks/bench_discovery.py [--quick]
+'''
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include import Profiling
+from Include.Discovery import DependencyDiscovery
+
+
+def writeTable(csv_path: str, row_num: int, col_num: int, seed: int = 0):
+    '''
+    Tabla de col_num columnas: la primera mitad son independientes, con
+    entre 2 y 50 valores; cada columna de la segunda mitad es una función
+    de dos columnas anteriores
+    '''
+    rand = random.Random(seed)
+    base_num = max(2, (col_num + 1) // 2)
+    cardinality_list = [rand.choice((2, 5, 10, 50)) for _ in range(base_num)]
+    source_list = [rand.sample(range(index), 2) for index in range(base_num, col_num)]
+    with open(csv_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["c{0}".format(index) for index in range(col_num)])
+        for _ in range(row_num):
+            row = [rand.randrange(cardinality) for cardinality in cardinality_list]
+            for first, second in source_list:
+                row.append((row[first] * 7 + row[second]) % 11)
+            writer.writerow(row)
+
+
+def measure(csv_path: str, max_lhs: int = None):
+    with Profiling.collectStats() as stats:
+        discovery = DependencyDiscovery(csv_path, max_lhs=max_lhs)
+    return discovery, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rendimiento del descubrimiento de dependencias")
+    parser.add_argument("--quick", action="store_true", help="omite las tablas más grandes")
+    args = parser.parse_args()
+    row_case_list = [(10000, 8), (100000, 8)] + ([] if args.quick else [(1000000, 8)])
+    col_case_list = [(20000, 6), (20000, 10), (20000, 14)] + ([] if args.quick else [(20000, 18)])
+    print("{0:>9} {1:>5} {2:>10} {3:>11} {4:>6} {5:>12} {6:>13}".format(
+        "filas", "cols", "lectura s", "búsqueda s", "DF", "particiones", "particiones MB"))
+    with tempfile.TemporaryDirectory() as directory:
+        for row_num, col_num in row_case_list + col_case_list:
+            csv_path = os.path.join(directory, "tabla_{0}_{1}.csv".format(row_num, col_num))
+            writeTable(csv_path, row_num, col_num)
+            discovery, stats = measure(csv_path)
+            print("{0:>9} {1:>5} {2:>10.3f} {3:>11.3f} {4:>6} {5:>12} {6:>13.1f}".format(
+                row_num, col_num, stats.stage_times["discovery.read"], stats.stage_times["discovery.search"],
+                len(discovery.fd_mask_list), discovery.partition_num, discovery.peak_partition_bytes / 2 ** 20))
+            os.remove(csv_path)
@@ -0,0 +1,103 @@
+'''
+Compara la búsqueda de llaves candidatas por niveles con poda
+(CandidatesKeys.iterateKeyMasks) con la implementación anterior, que
+lanzaba un hilo por cada par (nivel, atributo) y recorría todas las
+combinaciones de cada nivel.
+
+Uso: python benchmarks/bench_keys.py
+'''
+import glob
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Models import CandidatesKeys, iterateBits
+from generator import generateExponentialKeys, generateRandom
+
+WORKER_NUM = 4
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+class ThreadedCandidatesKeys(CandidatesKeys):
+    '''
+    Búsqueda de llaves anterior: un hilo por cada (nivel, atributo intermedio)
+    '''
+    def calculateCandidateKeys(self):
+        self.middle_bit_list = list(iterateBits(self.middle_mask))
+        level_num = len(self.middle_bit_list)
+        self.candidate_keys = set()
+        self.candidate_key_masks = []
+        thread_list = []
+        max_thread_len = 4
+        for i in range(level_num):
+            for j in range(len(self.middle_bit_list)):
+                if len(thread_list) >= max_thread_len:
+                    is_any_thread_finished = False
+                    while not is_any_thread_finished:
+                        for ck_thread in thread_list:
+                            if not ck_thread[0].is_alive():
+                                thread_list.pop(ck_thread[1])
+                                is_any_thread_finished = True
+                                break
+                        time.sleep(0.001)
+                new_thread = threading.Thread(target=self.getKeysAtLevel, kwargs={"level_num": i, "attr_index": j})
+                thread_list.append((new_thread, len(thread_list)))
+                new_thread.start()
+        for ck_thread in thread_list:
+            ck_thread[0].join()
+        if not level_num:
+            self.getKeysAtLevel(0, None)
+
+    def getKeysAtLevel(self, level_num: int, attr_index: int):
+        middle_bit_copy = self.middle_bit_list[:]
+        base_mask = self.necessary_mask
+        if attr_index is not None:
+            base_mask |= middle_bit_copy.pop(attr_index)
+        if self.checkIsSupperKey(base_mask):
+            return
+        for combination in itertools.combinations(middle_bit_copy, level_num):
+            key_mask = base_mask
+            for bit in combination:
+                key_mask |= bit
+            if not self.checkIsSupperKey(key_mask):
+                if self.closure_engine.calculateMask(key_mask) == self.t_mask:
+                    self.candidate_key_masks.append(key_mask)
+                    self.candidate_keys.add(self.attr_table.decodeFrozen(key_mask))
+
+
+def timeKeys(key_class, json_path: str, *args):
+    start = time.perf_counter()
+    candidates_keys = key_class(json_path, *args)
+    return time.perf_counter() - start, candidates_keys.candidate_keys
+
+
+if __name__ == "__main__":
+    case_list = [(os.path.relpath(path, PROJECT_DIR), path) for path in sorted(glob.glob(os.path.join(PROJECT_DIR, "json", "*.json")))]
+    temp_dir = tempfile.mkdtemp()
+    for pair_num in (4, 6, 8, 10, 12):
+        json_path = os.path.join(temp_dir, "exp_{0}.json".format(pair_num))
+        generateExponentialKeys(pair_num).saveAsJson(json_path)
+        case_list.append(("2^{0} llaves".format(pair_num), json_path))
+    for attr_num, fd_num in ((12, 24), (16, 32), (20, 40)):
+        json_path = os.path.join(temp_dir, "random_{0}.json".format(attr_num))
+        generateRandom(attr_num, fd_num).saveAsJson(json_path)
+        case_list.append(("{0} atributos, {1} DF".format(attr_num, fd_num), json_path))
+    print("{0:<28} {1:>7} {2:>12} {3:>12} {4:>14}".format("caso", "llaves", "hilos (s)", "niveles (s)",
+                                                       "{0} procesos (s)".format(WORKER_NUM)))
+    for name, json_path in case_list:
+        if name.startswith(("2^10", "2^12")):
+            threaded_time, threaded_keys = float("nan"), None
+        else:
+            threaded_time, threaded_keys = timeKeys(ThreadedCandidatesKeys, json_path)
+        level_time, level_keys = timeKeys(CandidatesKeys, json_path)
+        process_time, process_keys = timeKeys(CandidatesKeys, json_path, WORKER_NUM)
+        assert level_keys == process_keys
+        match = "" if threaded_keys in (None, level_keys) else "  (resultados distintos)"
+        print("{0:<28} {1:>7} {2:>12.4f} {3:>12.4f} {4:>14.4f}{5}".format(name, len(level_keys), threaded_time, level_time,
+                                                                   process_time, match))
@@ -0,0 +1,55 @@
+'''
+Compara la latencia de editar una dependencia en una AnalysisSession
+(addFD / removeFD) con la de repetir el análisis completo de
+NormalFormsChecker sobre el conjunto L editado.
+
+Uso: python benchmarks/bench_session.py
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Models import NormalFormsChecker, RelationModel
+from Include.Session import AnalysisSession
+from generator import attributeNames, generateLayered
+
+
+def timeIt(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def fullAnalysis(relation: RelationModel, l_set: set):
+    edited = RelationModel()
+    edited.t_set = relation.t_set
+    edited.l_set = l_set
+    NormalFormsChecker(relation=edited)
+
+
+if __name__ == "__main__":
+    print("{0:>6} {1:>6} {2:<26} {3:>12} {4:>12}".format("|T|", "|L|", "edición", "completo (s)", "sesión (s)"))
+    for attr_num, fd_num in ((100, 400), (200, 1000), (400, 2000)):
+        relation = generateLayered(attr_num, fd_num)
+        attr_list = attributeNames(attr_num)
+        session = AnalysisSession(relation)
+        implied_fd = (frozenset(attr_list[:5]), frozenset((attr_list[-1],)))
+        new_key_fd = (frozenset((attr_list[-1],)), frozenset((attr_list[0],)))
+        removed_fd = sorted(relation.l_set, key=lambda fd: (sorted(fd[0]), sorted(fd[1])))[0]
+        edit_list = [("agregar DF deducible", "add", implied_fd),
+                     ("quitar DF deducible", "remove", implied_fd),
+                     ("agregar DF que cambia llaves", "add", new_key_fd),
+                     ("quitar DF que cambia llaves", "remove", new_key_fd),
+                     ("quitar DF de L", "remove", removed_fd)]
+        l_set = set(relation.l_set)
+        for name, action, func_dep in edit_list:
+            if action == "add":
+                l_set.add(func_dep)
+                session_time = timeIt(lambda: session.addFD(func_dep))
+            else:
+                l_set.discard(func_dep)
+                session_time = timeIt(lambda: session.removeFD(func_dep))
+            full_time = timeIt(lambda: fullAnalysis(relation, set(l_set)))
+            print("{0:>6} {1:>6} {2:<26} {3:>12.4f} {4:>12.4f}".format(attr_num, len(l_set), name, full_time, session_time))
@@ -0,0 +1,112 @@
+'''
+Generador de relaciones sintéticas para las pruebas de rendimiento.
+Las funciones aleatorias reciben una semilla, de modo que la misma llamada
+produce siempre la misma relación y los resultados se pueden comparar
+entre versiones del código.
+'''
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Models import RelationModel
+
+
+def attributeNames(attr_num: int, prefix: str = "attr_"):
+    return ["{0}{1}".format(prefix, i) for i in range(attr_num)]
+
+
+def makeRelation(attr_list: list, l_set: set):
+    relation = RelationModel()
+    relation.t_set = set(attr_list)
+    relation.l_set = l_set
+    return relation
+
+
+def generateRandom(attr_num: int, fd_num: int, lhs_width: tuple = (1, 3), rhs_width: tuple = (1, 1), seed: int = 0):
+    '''
+    Dependencias aleatorias: lado izquierdo de lhs_width[0] a lhs_width[1]
+    atributos y lado derecho de rhs_width[0] a rhs_width[1] atributos
+    '''
+    rand = random.Random(seed)
+    attr_list = attributeNames(attr_num)
+    l_set = set()
+    while len(l_set) < fd_num:
+        lhs = frozenset(rand.sample(attr_list, rand.randint(*lhs_width)))
+        rhs = frozenset(rand.sample(attr_list, rand.randint(*rhs_width)))
+        l_set.add((lhs, rhs))
+    return makeRelation(attr_list, l_set)
+
+
+def generateLayered(attr_num: int, fd_num: int, root_num: int = 5, lhs_width: tuple = (1, 3),
+                    rhs_width: tuple = (1, 1), seed: int = 0):
+    '''
+    Relación acíclica: cada dependencia va de atributos de índice menor a
+    atributos de índice mayor y cada atributo que no es raíz tiene al menos
+    una dependencia, por lo que los root_num primeros atributos forman la
+    única llave candidata. Tiene muchas dependencias redundantes y
+    atributos extraños, lo que carga el cálculo de la cobertura mínima
+    '''
+    rand = random.Random(seed)
+    attr_list = attributeNames(attr_num)
+    l_set = set()
+    for index in range(root_num, attr_num):
+        l_set.add((frozenset((attr_list[rand.randrange(index)],)), frozenset((attr_list[index],))))
+    while len(l_set) < fd_num:
+        index = rand.randrange(root_num, attr_num)
+        lhs = frozenset(rand.sample(attr_list[:index], min(index, rand.randint(*lhs_width))))
+        rhs = frozenset(rand.sample(attr_list[index:], min(attr_num - index, rand.randint(*rhs_width))))
+        l_set.add((lhs, rhs))
+    return makeRelation(attr_list, l_set)
+
+
+def generateChain(attr_num: int, extra_fd_num: int = 0, seed: int = 0):
+    '''
+    Cadena attr_0 -> attr_1 -> ... -> attr_n, el peor
+    caso del cierre por barrido completo de L (cada pasada agrega un
+    atributo), más extra_fd_num dependencias de 2 a 4 atributos
+    '''
+    rand = random.Random(seed)
+    attr_list = attributeNames(attr_num)
+    l_set = set()
+    for index in range(attr_num - 1):
+        l_set.add((frozenset((attr_list[index],)), frozenset((attr_list[index + 1],))))
+    while len(l_set) < attr_num - 1 + extra_fd_num:
+        lhs = frozenset(rand.sample(attr_list, rand.randint(2, 4)))
+        l_set.add((lhs, frozenset((rand.choice(attr_list),))))
+    return makeRelation(attr_list, l_set)
+
+
+def generateCyclicKeys(key_num: int, extra_attr_num: int = 0, seed: int = 0):
+    '''
+    Ciclo key_0 -> key_1 -> ... -> key_0 en el que cada atributo del
+    ciclo determina además a extra_attr_num atributos: tiene exactamente
+    key_num llaves candidatas de un atributo
+    '''
+    rand = random.Random(seed)
+    key_list = attributeNames(key_num, "key_")
+    extra_list = attributeNames(extra_attr_num, "attr_")
+    l_set = set()
+    for index, attr in enumerate(key_list):
+        l_set.add((frozenset((attr,)), frozenset((key_list[(index + 1) % key_num],))))
+    for attr in extra_list:
+        l_set.add((frozenset((rand.choice(key_list),)), frozenset((attr,))))
+    return makeRelation(key_list + extra_list, l_set)
+
+
+def generateExponentialKeys(pair_num: int, extra_attr_num: int = 1):
+    '''
+    Pares a_i <-> b_i y atributos extra que dependen de todos los a_i:
+    tiene 2^pair_num llaves candidatas de pair_num atributos
+    '''
+    a_list = attributeNames(pair_num, "a")
+    b_list = attributeNames(pair_num, "b")
+    extra_list = attributeNames(max(extra_attr_num, 1), "c")
+    l_set = set()
+    for a_attr, b_attr in zip(a_list, b_list):
+        l_set.add((frozenset((a_attr,)), frozenset((b_attr,))))
+        l_set.add((frozenset((b_attr,)), frozenset((a_attr,))))
+    for attr in extra_list:
+        l_set.add((frozenset(a_list), frozenset((attr,))))
+    return makeRelation(a_list + b_list + extra_list, l_set)
@@ -0,0 +1,191 @@
+'''
+Suite de rendimiento: genera relaciones sintéticas con generator.py
+(variando el número de atributos, de dependencias, el ancho del lado
+izquierdo y el número de llaves candidatas), mide el tiempo de cada etapa
+del análisis (cobertura mínima, llaves candidatas y formas normales), el
+pico de memoria y los contadores de Include.Profiling, y escribe los resultados en un archivo Json para
+compararlos entre versiones del código.
+
+Uso:
+    python benchmarks/run_benchmarks.py [-o resultados.json] [--repeat N]
+                                        [--quick] [--filter texto]
+                                        [--compare anteriores.json]
+'''
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include import Profiling
+from Include.Models import CandidatesKeys, IrreducibleFD, NormalFormsChecker
+from generator import generateChain, generateCyclicKeys, generateExponentialKeys, generateLayered, generateRandom
+
+STAGE_LIST = ("cover", "keys", "normal_forms")
+
+
+def buildScenarios(quick: bool = False):
+    '''
+    Lista de escenarios (nombre, parámetros, función que genera la relación).
+    Las relaciones aleatorias con lados izquierdos anchos tienen muchas
+    llaves, por lo que se usan con pocos atributos. Con quick se omiten los
+    casos marcados como grandes
+    '''
+    scenario_list = []
+    random_list = [(16, 48, (1, 2), False), (16, 48, (2, 4), False), (16, 48, (3, 6), False),
+                   (24, 72, (1, 2), False), (24, 72, (2, 4), False),
+                   (400, 1600, (1, 1), False), (1000, 5000, (1, 1), True)]
+    for attr_num, fd_num, lhs_width, is_large in random_list:
+        params = {"attr_num": attr_num, "fd_num": fd_num, "lhs_width": lhs_width}
+        scenario_list.append(("random", params, is_large,
+                              lambda p=params: generateRandom(p["attr_num"], p["fd_num"], p["lhs_width"])))
+    for attr_num, fd_num, is_large in ((100, 400, False), (400, 2000, False), (800, 8000, True)):
+        params = {"attr_num": attr_num, "fd_num": fd_num}
+        scenario_list.append(("layered", params, is_large,
+                              lambda p=params: generateLayered(p["attr_num"], p["fd_num"])))
+    for attr_num, is_large in ((200, False), (800, True)):
+        params = {"attr_num": attr_num, "extra_fd_num": attr_num * 4}
+        scenario_list.append(("chain", params, is_large,
+                              lambda p=params: generateChain(p["attr_num"], p["extra_fd_num"])))
+    for key_num, is_large in ((16, False), (64, False), (256, True)):
+        params = {"key_num": key_num, "extra_attr_num": key_num}
+        scenario_list.append(("cyclic_keys", params, is_large,
+                              lambda p=params: generateCyclicKeys(p["key_num"], p["extra_attr_num"])))
+    for pair_num, is_large in ((4, False), (8, False), (10, True), (12, True)):
+        params = {"pair_num": pair_num}
+        scenario_list.append(("exponential_keys", params, is_large,
+                              lambda p=params: generateExponentialKeys(p["pair_num"])))
+    return [(kind, params, generate) for kind, params, is_large, generate in scenario_list
+            if not (quick and is_large)]
+
+
+def scenarioName(kind: str, params: dict):
+    return kind + "(" + ", ".join("{0}={1}".format(key, value) for key, value in params.items()) + ")"
+
+
+def runStages(relation):
+    '''
+    Ejecuta el análisis etapa por etapa y retorna los tiempos de cada una
+    junto con el analizador de formas normales
+    '''
+    stage_times = {}
+    start = time.perf_counter()
+    minimal_cover = IrreducibleFD(relation=relation)
+    stage_times["cover"] = time.perf_counter() - start
+    start = time.perf_counter()
+    candidates_keys = CandidatesKeys(minimal_cover=minimal_cover)
+    stage_times["keys"] = time.perf_counter() - start
+    start = time.perf_counter()
+    normal_forms = NormalFormsChecker(candidates_keys=candidates_keys)
+    stage_times["normal_forms"] = time.perf_counter() - start
+    return stage_times, normal_forms
+
+
+def measureInstrumented(relation):
+    '''
+    Pico de memoria (bytes) y contadores (ver Include.Profiling) del
+    análisis completo. Se miden en una pasada aparte porque tracemalloc
+    hace más lento el código medido
+    '''
+    with Profiling.collectStats(trace_memory=True) as stats:
+        runStages(relation)
+    return stats.peak_memory, dict(stats.counters)
+
+
+def runScenario(kind: str, params: dict, generate, repeat: int):
+    relation = generate()
+    best_times = None
+    for _ in range(repeat):
+        stage_times, normal_forms = runStages(relation)
+        if best_times is None:
+            best_times = stage_times
+        else:
+            best_times = {stage: min(best_times[stage], stage_times[stage]) for stage in STAGE_LIST}
+    minimal_cover = normal_forms.candidates_keys.minimal_cover
+    peak_memory, counters = measureInstrumented(relation)
+    return {"name": scenarioName(kind, params),
+            "kind": kind,
+            "params": params,
+            "attr_num": len(relation.t_set),
+            "fd_num": len(relation.l_set),
+            "cover_fd_num": len(minimal_cover.irreducible_rel.l_set),
+            "key_num": len(normal_forms.candidates_keys.candidate_key_masks),
+            "is_2nf": normal_forms.is_2nf,
+            "is_3nf": normal_forms.is_3nf,
+            "is_bc_nf": normal_forms.is_bc_nf,
+            "times": best_times,
+            "cover_phase_times": minimal_cover.phase_times,
+            "total_time": sum(best_times.values()),
+            "peak_memory": peak_memory,
+            "counters": counters}
+
+
+def getMetadata(repeat: int):
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=project_dir, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "repeat": repeat}
+
+
+def printComparison(result_list: list, compare_path: str):
+    '''
+    Muestra la razón tiempo actual / tiempo anterior por etapa para los
+    escenarios que están en ambos archivos
+    '''
+    with open(compare_path) as file:
+        previous_dict = {result["name"]: result for result in json.load(file)["results"]}
+    print()
+    print("{0:<52} {1:>10} {2:>10} {3:>12} {4:>10}".format("escenario", "cover", "keys", "normal_forms", "memoria"))
+    for result in result_list:
+        previous = previous_dict.get(result["name"])
+        if previous is None:
+            continue
+        ratio_list = []
+        for stage in STAGE_LIST:
+            old_time = previous["times"].get(stage)
+            ratio_list.append(result["times"][stage] / old_time if old_time else float("nan"))
+        old_memory = previous.get("peak_memory")
+        ratio_list.append(result["peak_memory"] / old_memory if old_memory else float("nan"))
+        print("{0:<52} {1:>9.2f}x {2:>9.2f}x {3:>11.2f}x {4:>9.2f}x".format(result["name"], *ratio_list))
+
+
+def parseArguments(argv: list):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento del análisis de relaciones")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="archivo Json de resultados")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="repeticiones por escenario; se guarda el menor tiempo de cada etapa")
+    parser.add_argument("--quick", action="store_true", help="omite los escenarios más grandes")
+    parser.add_argument("--filter", default="", help="solo los escenarios cuyo nombre contiene este texto")
+    parser.add_argument("--compare", help="archivo de resultados anterior con el cual comparar")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parseArguments(sys.argv[1:])
+    result_list = []
+    print("{0:<52} {1:>6} {2:>7} {3:>10} {4:>10} {5:>12} {6:>10}".format("escenario", "|L|", "llaves", "cover (s)",
+                                                                         "keys (s)", "formas (s)", "pico (MB)"))
+    for kind, params, generate in buildScenarios(args.quick):
+        if args.filter not in scenarioName(kind, params):
+            continue
+        result = runScenario(kind, params, generate, max(args.repeat, 1))
+        result_list.append(result)
+        print("{0:<52} {1:>6} {2:>7} {3:>10.4f} {4:>10.4f} {5:>12.4f} {6:>10.2f}".format(
+            result["name"], result["fd_num"], result["key_num"], result["times"]["cover"], result["times"]["keys"],
+            result["times"]["normal_forms"], result["peak_memory"] / 2 ** 20))
+    with open(args.output, "w") as file:
+        json.dump({"metadata": getMetadata(args.repeat), "results": result_list}, file, indent=2)
+    if args.compare:
+        printComparison(result_list, args.compare)
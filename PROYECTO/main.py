@@ -1,3 +1,63 @@
-import Include.Models as Models
+import argparse
+import os
+import sys
 
-wgui = Models.NormalFormsGUI()
+from Include.Cache import DEFAULT_CACHE_PATH
+
+
+def parseArguments(argv: list):
+    parser = argparse.ArgumentParser(description="Cobertura mínima, llaves candidatas y formas normales de relaciones. "
+                                                 "Sin entradas se abre la interfaz gráfica.")
+    parser.add_argument("inputs", nargs="*",
+                        help="directorios, patrones glob o archivos .json/.jsonl/.relb; '-' lee relaciones JSONL de la "
+                             "entrada estándar")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="número de procesos del modo por lotes (por defecto, uno por CPU)")
+    parser.add_argument("-o", "--output", help="archivo JSONL de resultados (por defecto, la salida estándar)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH, metavar="ARCHIVO",
+                        help="usa el caché de resultados en disco (por defecto, " + DEFAULT_CACHE_PATH + ")")
+    parser.add_argument("--cache-size", type=int, metavar="MB", help="tamaño máximo del caché de resultados en MB")
+    parser.add_argument("--stats", action="store_true",
+                        help="agrega a cada resultado el tiempo por etapa y los contadores del análisis, y muestra su "
+                             "suma al final")
+    parser.add_argument("--max-keys", type=int, metavar="N",
+                        help="no enumera todas las llaves candidatas: reporta a lo sumo N y la llave keys_complete "
+                             "(las formas normales no necesitan la lista completa); también aplica a --serve")
+    parser.add_argument("--profile", metavar="ARCHIVO",
+                        help="analiza en un solo proceso con cProfile y guarda el perfil en ARCHIVO (formato pstats)")
+    parser.add_argument("-b", "--binary", metavar="ARCHIVO",
+                        help="en lugar de analizar, guarda las entradas en un archivo binario .relb")
+    parser.add_argument("--with-results", action="store_true",
+                        help="con --binary, guarda también la cobertura mínima y las llaves candidatas")
+    parser.add_argument("--discover", metavar="CSV",
+                        help="descubre las dependencias funcionales mínimas del archivo CSV y escribe la relación en "
+                             "Json (en -o o en la salida estándar)")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="con --discover, memoria máxima para los datos y las particiones")
+    parser.add_argument("--max-lhs", type=int, metavar="N",
+                        help="con --discover, número máximo de atributos del lado izquierdo")
+    parser.add_argument("--serve", type=int, metavar="PUERTO",
+                        help="inicia el servicio JSON-RPC sobre HTTP en PUERTO (0 elige uno libre) con -w procesos")
+    parser.add_argument("--host", default="127.0.0.1", help="dirección del servicio (por defecto, 127.0.0.1)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parseArguments(sys.argv[1:])
+    if args.discover is not None:
+        import Include.Discovery as Discovery
+        sys.exit(Discovery.runDiscovery(args.discover, args.output, args.memory_budget, args.max_lhs))
+    if args.serve is not None:
+        import Include.Service as Service
+        cache_max_bytes = args.cache_size * 2 ** 20 if args.cache_size else None
+        sys.exit(Service.serve(args.host, args.serve, args.workers, args.cache, cache_max_bytes, args.max_keys))
+    if not args.inputs:
+        from Include.GUI import NormalFormsGUI
+        wgui = NormalFormsGUI()
+    else:
+        import Include.Batch as Batch
+        if args.binary:
+            sys.exit(Batch.convertToBinary(args.inputs, args.binary, args.with_results))
+        cache_max_bytes = args.cache_size * 2 ** 20 if args.cache_size else None
+        sys.exit(Batch.runBatch(args.inputs, args.output, args.workers, args.cache, cache_max_bytes, args.stats,
+                                args.profile, args.max_keys))
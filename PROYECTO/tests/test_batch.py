@@ -0,0 +1,91 @@
+'''
+Pruebas del modo por lotes (Include/Batch.py)
+'''
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include import Batch
+from Include.Binary import BinaryCorpus, BinaryWriter
+from Include.Loader import loadRelation
+from Include.Models import CandidatesKeys, RelationModel
+
+JSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "json")
+
+
+def pairRelation(pair_num: int):
+    '''
+    Relación con 2 ** pair_num llaves: cada a_i determina a b_i y b_i a a_i y c0
+    '''
+    relation = RelationModel()
+    relation.t_set = {"c0"}
+    for index in range(pair_num):
+        a_name, b_name = "a{0}".format(index), "b{0}".format(index)
+        relation.t_set |= {a_name, b_name}
+        relation.l_set.add((frozenset([a_name]), frozenset([b_name])))
+        relation.l_set.add((frozenset([b_name]), frozenset([a_name, "c0"])))
+    return relation
+
+
+def randomRelation(rand: random.Random, attrs: str = "ABCDEFG"):
+    relation = RelationModel()
+    relation.t_set = set(attrs)
+    for _ in range(rand.randint(2, 7)):
+        relation.l_set.add((frozenset(rand.sample(attrs, rand.randint(1, 2))), frozenset(rand.sample(attrs, 1))))
+    return relation
+
+
+def stripResult(result: dict):
+    return {name: value for name, value in result.items() if name not in ("source", "cache", "closure_cache")}
+
+
+class KeyLimitTest(unittest.TestCase):
+    '''
+    Con key_limit el resultado no depende de si las llaves se enumeran
+    (análisis perezoso), vienen guardadas en un archivo binario o salen
+    del caché de resultados
+    '''
+    def setUp(self):
+        rand = random.Random(3)
+        self.relation_list = [loadRelation(os.path.join(JSON_DIR, "relation_examp1.json")), pairRelation(4)]
+        self.relation_list += [randomRelation(rand) for _ in range(40)]
+        self.directory = tempfile.TemporaryDirectory()
+        self.binary_path = os.path.join(self.directory.name, "relations.relb")
+        with BinaryWriter(self.binary_path) as writer:
+            for relation in self.relation_list:
+                writer.write(relation, CandidatesKeys(relation=relation))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testSameKeysInEveryMode(self):
+        with BinaryCorpus(self.binary_path) as corpus:
+            for index, relation in enumerate(self.relation_list):
+                cache_path = os.path.join(self.directory.name, "cache{0}.sqlite".format(index))
+                Batch.analyzeRelation((None, relation), cache_path)
+                for key_limit in (0, 1, 2, 5):
+                    expected = stripResult(Batch.analyzeRelation((None, relation), key_limit=key_limit))
+                    stored = stripResult(Batch.analyzeRelation((None, corpus[index]), key_limit=key_limit))
+                    cached = stripResult(Batch.analyzeRelation((None, relation), cache_path, key_limit=key_limit))
+                    self.assertEqual(stored, expected)
+                    self.assertEqual(cached, expected)
+                    self.assertLessEqual(len(expected["candidate_keys"]), key_limit)
+
+    def testExampleKeys(self):
+        relation = self.relation_list[0]
+        full = Batch.analyzeRelation((None, relation))
+        self.assertEqual(full["candidate_keys"], ["ABCE", "BCDE"])
+        limited = Batch.analyzeRelation((None, relation), key_limit=1)
+        self.assertEqual(limited["candidate_keys"], ["ABCE"])
+        self.assertFalse(limited["keys_complete"])
+        self.assertEqual([violation["witness"] for violation in limited["violations"]],
+                         [violation["witness"] for violation in full["violations"]])
+        self.assertTrue(Batch.analyzeRelation((None, relation), key_limit=2)["keys_complete"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+'''
+Pruebas de la cobertura mínima (CanonicalCover, IrreducibleFD) y del motor
+de cierres, comparados con un cierre por conjuntos
+'''
+import itertools
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Loader import loadRelation
+from Include.Models import AttributeClosure, IrreducibleFD, RelationModel, equivalent, implies
+
+JSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "json")
+
+
+def randomRelation(rand: random.Random, attrs: str = "ABCDEFG"):
+    '''
+    Relación con atributos de attrs y entre 1 y 12 dependencias, algunas
+    con lado izquierdo vacío o con atributos repetidos a la derecha
+    '''
+    relation = RelationModel()
+    relation.t_set = set(attrs)
+    for _ in range(rand.randint(1, 12)):
+        lhs = frozenset(rand.sample(attrs, rand.choice((0, 1, 1, 2, 2, 3))))
+        rhs = frozenset(rand.sample(attrs, rand.randint(1, 3)))
+        relation.l_set.add((lhs, rhs))
+    return relation
+
+
+def setClosure(attrs, L: set):
+    '''
+    Cierre por conjuntos: recorre L hasta que ninguna dependencia agrega
+    atributos. A diferencia de calculateAttributeClosure, el cierre del
+    conjunto vacío incluye los lados derechos de las dependencias sin lado
+    izquierdo
+    '''
+    closure = set(attrs)
+    is_changed = True
+    while is_changed:
+        is_changed = False
+        for lhs, rhs in L:
+            if lhs.issubset(closure) and not rhs.issubset(closure):
+                closure |= rhs
+                is_changed = True
+    return closure
+
+
+def setImplies(L: set, func_dep: tuple):
+    return set(func_dep[1]).issubset(setClosure(func_dep[0], L))
+
+
+class BundledCoverTest(unittest.TestCase):
+    '''
+    Coberturas de los ejemplos de json/, iguales a las del cálculo anterior
+    '''
+    expected_dict = {
+        "relation_clase.json": {("A", "E"), ("B", "F"), ("D", "E"), ("F", "A"), ("G", "F")},
+        "relation_class.json": {("A", "B"), ("B", "C"), ("B", "D"), ("C", "E"), ("C", "G")},
+        "relation_examp1.json": {("ABC", "D"), ("D", "A")},
+        "relation_test.json": {("A", "E"), ("B", "F"), ("D", "E"), ("F", "A"), ("G", "F")},
+    }
+
+    def testExamples(self):
+        for file_name, expected_set in self.expected_dict.items():
+            minimal_cover = IrreducibleFD(os.path.join(JSON_DIR, file_name))
+            cover_set = set(("".join(sorted(lhs)), "".join(sorted(rhs)))
+                            for lhs, rhs in minimal_cover.irreducible_rel.l_set)
+            self.assertEqual(cover_set, expected_set, file_name)
+
+
+class RandomCoverTest(unittest.TestCase):
+    def setUp(self):
+        rand = random.Random(9)
+        self.relation_list = [randomRelation(rand) for _ in range(150)]
+
+    def testClosures(self):
+        for relation in self.relation_list:
+            closure_engine = AttributeClosure(relation.l_set)
+            for size in range(len(relation.t_set) + 1):
+                for attrs in itertools.combinations(sorted(relation.t_set), size):
+                    self.assertEqual(closure_engine.calculate(attrs), setClosure(attrs, relation.l_set))
+
+    def testImplication(self):
+        rand = random.Random(10)
+        for relation in self.relation_list:
+            other = randomRelation(rand)
+            for func_dep in other.l_set:
+                self.assertEqual(implies(relation.l_set, func_dep), setImplies(relation.l_set, func_dep))
+            is_equivalent = (all(setImplies(relation.l_set, func_dep) for func_dep in other.l_set) and
+                             all(setImplies(other.l_set, func_dep) for func_dep in relation.l_set))
+            self.assertEqual(equivalent(relation.l_set, other.l_set), is_equivalent)
+
+    def testMinimalCover(self):
+        for relation in self.relation_list:
+            minimal_cover = IrreducibleFD(relation=relation)
+            cover_set = minimal_cover.irreducible_rel.l_set
+            for func_dep in relation.l_set:
+                self.assertTrue(setImplies(cover_set, func_dep))
+            for func_dep in cover_set:
+                lhs, rhs = func_dep
+                self.assertTrue(setImplies(relation.l_set, func_dep))
+                self.assertEqual(len(rhs), 1)
+                self.assertFalse(rhs.issubset(lhs))
+                # como en el cálculo anterior, un lado izquierdo de un solo
+                # atributo no se reduce al conjunto vacío
+                for attr in (lhs if len(lhs) > 1 else ()):
+                    self.assertFalse(setImplies(cover_set, (lhs - {attr}, rhs)), (func_dep, attr))
+                self.assertFalse(setImplies(cover_set - {func_dep}, func_dep), func_dep)
+            self.assertTrue(minimal_cover.checkEquivalence(cover_set))
+            self.assertTrue(minimal_cover.checkEquivalence(relation.l_set).is_equivalent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+'''
+Pruebas del descubrimiento de dependencias (Include/Discovery.py): el
+resultado de TANE se compara con la enumeración de todas las dependencias
+mínimas que se cumplen en tablas pequeñas
+'''
+import csv
+import itertools
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Discovery import DependencyDiscovery, MemoryBudgetError
+
+
+def writeCSV(csv_path: str, header: list, row_list: list):
+    with open(csv_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(row_list)
+
+
+def randomRows(rand: random.Random):
+    '''
+    Tabla de hasta 6 columnas y 30 filas con pocos valores distintos; con 3
+    columnas o más, la tercera se calcula a partir de las dos primeras
+    '''
+    column_num = rand.randint(1, 6)
+    row_list = [[str(rand.randint(0, rand.choice((1, 2, 3, 5)))) for _ in range(column_num)]
+                for _ in range(rand.randint(0, 30))]
+    if column_num >= 3:
+        for row in row_list:
+            row[2] = str((int(row[0]) + int(row[1])) % 3)
+    return column_num, row_list
+
+
+def holds(row_list: list, lhs: tuple, column: int):
+    value_dict = {}
+    for row in row_list:
+        if value_dict.setdefault(tuple(row[index] for index in lhs), row[column]) != row[column]:
+            return False
+    return True
+
+
+def exhaustiveFDs(row_list: list, column_num: int, max_lhs: int = None):
+    '''
+    Dependencias mínimas y no triviales (lado izquierdo, columna): para cada
+    columna se revisan todos los lados izquierdos de menor a mayor tamaño
+    '''
+    max_lhs = column_num if max_lhs is None else max_lhs
+    fd_set = set()
+    for column in range(column_num):
+        other_list = [index for index in range(column_num) if index != column]
+        lhs_list = []
+        for size in range(min(max_lhs, len(other_list)) + 1):
+            for lhs in itertools.combinations(other_list, size):
+                if not any(set(found).issubset(lhs) for found in lhs_list) and holds(row_list, lhs, column):
+                    lhs_list.append(lhs)
+        fd_set |= set((frozenset(lhs), column) for lhs in lhs_list)
+    return fd_set
+
+
+def discoveredFDs(discovery: DependencyDiscovery):
+    return set((frozenset(index for index in range(len(discovery.attr_list)) if lhs_mask >> index & 1),
+                bit.bit_length() - 1) for lhs_mask, bit in discovery.fd_mask_list)
+
+
+class DiscoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.directory.name, "table.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testSmallTable(self):
+        writeCSV(self.csv_path, ["emp", "dept", "manager"],
+                 [["1", "a", "x"], ["2", "a", "x"], ["3", "b", "y"], ["4", "c", "y"]])
+        discovery = DependencyDiscovery(self.csv_path)
+        self.assertEqual(discovery.relation.t_set, {"emp", "dept", "manager"})
+        self.assertEqual(discovery.relation.l_set, {(frozenset(["emp"]), frozenset(["dept", "manager"])),
+                                                    (frozenset(["dept"]), frozenset(["manager"]))})
+
+    def testRandomTables(self):
+        rand = random.Random(22)
+        for _ in range(120):
+            column_num, row_list = randomRows(rand)
+            writeCSV(self.csv_path, ["c{0}".format(index) for index in range(column_num)], row_list)
+            expected_set = exhaustiveFDs(row_list, column_num)
+            # con presupuestos pequeños parte de las particiones no se
+            # guarda y se recalcula; en las tablas más grandes los datos
+            # mismos ya no caben
+            for memory_budget in (10 ** 9, 3000, 1500, 600):
+                try:
+                    discovery = DependencyDiscovery(self.csv_path, memory_budget=memory_budget, chunk_rows=7)
+                except MemoryBudgetError:
+                    continue
+                self.assertEqual(discoveredFDs(discovery), expected_set)
+                self.assertEqual(len(discovery.fd_mask_list), len(expected_set))
+            for max_lhs in (0, 1, 2):
+                discovery = DependencyDiscovery(self.csv_path, max_lhs=max_lhs)
+                self.assertEqual(discoveredFDs(discovery), exhaustiveFDs(row_list, column_num, max_lhs))
+
+    def testMemoryBudget(self):
+        writeCSV(self.csv_path, ["a", "b"], [[str(index), str(index % 2)] for index in range(50)])
+        with self.assertRaises(MemoryBudgetError):
+            DependencyDiscovery(self.csv_path, memory_budget=100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+'''
+Pruebas de las llaves candidatas y de las formas normales (CandidatesKeys,
+NormalFormsChecker), comparadas con una revisión directa por conjuntos
+'''
+import itertools
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Include.Models import CandidatesKeys, NormalFormsChecker, RelationModel
+
+
+def randomRelation(rand: random.Random, attrs: str = "ABCDEFG"):
+    relation = RelationModel()
+    relation.t_set = set(attrs[:rand.randint(3, len(attrs))])
+    attr_list = sorted(relation.t_set)
+    for _ in range(rand.randint(1, 9)):
+        lhs = frozenset(rand.sample(attr_list, rand.choice((0, 1, 1, 2, 2, 3))))
+        rhs = frozenset(rand.sample(attr_list, rand.randint(1, 2)))
+        relation.l_set.add((lhs, rhs))
+    return relation
+
+
+def setClosure(attrs, L: set):
+    closure = set(attrs)
+    is_changed = True
+    while is_changed:
+        is_changed = False
+        for lhs, rhs in L:
+            if lhs.issubset(closure) and not rhs.issubset(closure):
+                closure |= rhs
+                is_changed = True
+    return closure
+
+
+def setKeys(relation: RelationModel):
+    '''
+    Llaves candidatas: los conjuntos cuyo cierre es T y que no contienen a
+    otra llave, revisados de menor a mayor tamaño
+    '''
+    key_list = []
+    for size in range(len(relation.t_set) + 1):
+        for attrs in itertools.combinations(sorted(relation.t_set), size):
+            attrs = frozenset(attrs)
+            if any(key.issubset(attrs) for key in key_list):
+                continue
+            if setClosure(attrs, relation.l_set) == relation.t_set:
+                key_list.append(attrs)
+    return set(key_list)
+
+
+def setViolations(relation: RelationModel, prime_set: set):
+    '''
+    Dependencias de L que impiden cada forma normal, con las definiciones
+    que usa NormalFormsChecker
+    '''
+    violations_2nf, violations_3nf, violations_bcnf = set(), set(), set()
+    for lhs, rhs in relation.l_set:
+        if any(rhs.issubset(setClosure(lhs - {attr}, relation.l_set)) for attr in lhs):
+            violations_2nf.add((lhs, rhs))
+        is_superkey = setClosure(lhs, relation.l_set) == relation.t_set
+        for attr in rhs - lhs - prime_set:
+            if not is_superkey:
+                violations_3nf.add((lhs, frozenset(attr)))
+        if not rhs.issubset(lhs) and not is_superkey:
+            violations_bcnf.add((lhs, rhs))
+    return violations_2nf, violations_3nf, violations_bcnf
+
+
+class RandomNormalFormsTest(unittest.TestCase):
+    def setUp(self):
+        rand = random.Random(11)
+        self.relation_list = [randomRelation(rand) for _ in range(200)]
+
+    def testKeys(self):
+        for relation in self.relation_list:
+            key_set = setKeys(relation)
+            candidates_keys = CandidatesKeys(relation=relation)
+            self.assertEqual(candidates_keys.candidate_keys, key_set)
+            self.assertEqual(candidates_keys.primeAttributes(), set().union(*key_set))
+            self.assertEqual(candidates_keys.firstKeyMask(), min(candidates_keys.candidate_key_masks))
+
+    def testLazyKeys(self):
+        for relation in self.relation_list:
+            key_set = setKeys(relation)
+            candidates_keys = CandidatesKeys(relation=relation, lazy=True)
+            self.assertEqual(candidates_keys.primeAttributes(), set().union(*key_set))
+            self.assertEqual(candidates_keys.firstKey(), CandidatesKeys(relation=relation).firstKey())
+            self.assertEqual(set(candidates_keys.keys()), key_set)
+
+    def testViolations(self):
+        for relation in self.relation_list:
+            key_set = setKeys(relation)
+            violations_2nf, violations_3nf, violations_bcnf = setViolations(relation, set().union(*key_set))
+            for lazy_keys in (False, True):
+                checker = NormalFormsChecker(relation=relation, lazy_keys=lazy_keys)
+                self.assertEqual(set(item.func_dep for item in checker.violations_2nf), violations_2nf)
+                self.assertEqual(set(item.func_dep for item in checker.violations_3nf), violations_3nf)
+                self.assertEqual(set(item.func_dep for item in checker.violations_bcnf), violations_bcnf)
+                for item in checker.violations_2nf:
+                    lhs, rhs = item.func_dep
+                    self.assertTrue(item.witness < lhs)
+                    self.assertTrue(rhs.issubset(setClosure(item.witness, relation.l_set)))
+                for item in checker.violations_3nf + checker.violations_bcnf:
+                    self.assertIn(item.witness, key_set)
+                self.assertEqual(checker.is_2nf, not violations_2nf)
+                self.assertEqual(checker.is_3nf, checker.is_2nf and not violations_3nf)
+                self.assertEqual(checker.is_bc_nf, checker.is_3nf and not violations_bcnf)
+
+
+if __name__ == "__main__":
+    unittest.main()